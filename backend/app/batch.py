@@ -0,0 +1,266 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Any, AsyncIterator, Iterable, Iterator
+
+from .executor import ExecutorSaturated, Lane, Reservation, run_db, run_infer
+from .inference import infer_batch, record_runs
+from .model_registry import model_registry
+
+BATCH_WORKERS = int(os.environ.get("MNC_BATCH_WORKERS", "0")) or (os.cpu_count() or 1)
+# Below this many notes per worker the IPC and pickling cost outweighs the parallelism.
+BATCH_MIN_CHUNK = int(os.environ.get("MNC_BATCH_MIN_CHUNK", "8"))
+# Streamed batches are cut into small chunks so the first results arrive quickly; at most
+# STREAM_INFLIGHT chunks per worker are outstanding, which bounds memory for any input size.
+STREAM_CHUNK = int(os.environ.get("MNC_STREAM_CHUNK", "8"))
+STREAM_INFLIGHT = int(os.environ.get("MNC_STREAM_INFLIGHT", "2"))
+# Chunks outstanding in the process pool across all requests; past this, batch requests get a 503.
+POOL_MAX_PENDING = int(os.environ.get("MNC_POOL_MAX_PENDING", "0")) or BATCH_WORKERS * STREAM_INFLIGHT * 2
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+# Only its admission accounting is used: the work itself runs in the process pool.
+pool_lane = Lane("pool", BATCH_WORKERS, POOL_MAX_PENDING)
+
+
+def get_pool(workers: int = BATCH_WORKERS) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn, not fork: the API process has live threads and SQLite connections.
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def chunk_texts(texts: list[str], workers: int, min_chunk: int = BATCH_MIN_CHUNK) -> list[list[str]]:
+    if not texts:
+        return []
+    size = max(min_chunk, math.ceil(len(texts) / max(1, workers)))
+    return [texts[i:i + size] for i in range(0, len(texts), size)]
+
+
+def _infer_chunk(texts: list[str], model_version_id: str | None, keep_threshold: float) -> list[dict[str, Any]]:
+    return infer_batch(texts, model_version_id, keep_threshold, persist=False)
+
+
+def _infer_chunk_outcomes(texts: list[str], model_version_id: str | None, keep_threshold: float) -> list[dict[str, Any]]:
+    try:
+        results = infer_batch(texts, model_version_id, keep_threshold, persist=False)
+    except Exception:
+        results = None
+    if results is not None:
+        return [{"result": r} for r in results]
+    # Re-run note by note so one bad note only fails itself.
+    outcomes = []
+    for text in texts:
+        try:
+            outcomes.append({"result": infer_batch([text], model_version_id, keep_threshold, persist=False)[0]})
+        except Exception as exc:
+            outcomes.append({"error": f"{type(exc).__name__}: {exc}"})
+    return outcomes
+
+
+def _chunk_events(start: int, texts: list[str], outcomes: list[dict[str, Any]], persist: bool) -> list[dict[str, Any]]:
+    ok = [(t, o["result"]) for t, o in zip(texts, outcomes) if "result" in o]
+    if persist and ok:
+        record_runs([t for t, _ in ok], [r for _, r in ok])
+    return [
+        {"event": "result", "index": start + i, "result": o["result"]}
+        if "result" in o
+        else {"event": "error", "index": start + i, "detail": o["error"]}
+        for i, o in enumerate(outcomes)
+    ]
+
+
+def _error_events(start: int, count: int, detail: str) -> list[dict[str, Any]]:
+    return [{"event": "error", "index": start + i, "detail": detail} for i in range(count)]
+
+
+def _progress(done: int, errors: int, total: int | None) -> dict[str, Any]:
+    return {"event": "progress", "done": done, "errors": errors, "total": total}
+
+
+def iter_batch(
+    texts: Iterable[str],
+    model_version_id: str | None = None,
+    keep_threshold: float = 0.5,
+    workers: int = BATCH_WORKERS,
+    chunk_size: int = STREAM_CHUNK,
+    persist: bool = True,
+    ordered: bool = False,
+) -> Iterator[dict[str, Any]]:
+    total = len(texts) if hasattr(texts, "__len__") else None
+    model_id = model_registry.resolve(model_version_id)
+    source = iter(texts)
+    done = errors = start = 0
+    pending: dict[Future, tuple[int, list[str]]] = {}
+    pool = get_pool(workers) if workers > 1 else None
+    try:
+        while True:
+            while pool is not None and len(pending) < workers * STREAM_INFLIGHT:
+                chunk = list(islice(source, chunk_size))
+                if not chunk:
+                    break
+                pending[pool.submit(_infer_chunk_outcomes, chunk, model_id, keep_threshold)] = (start, chunk)
+                start += len(chunk)
+            if pool is None:
+                chunk = list(islice(source, chunk_size))
+                if not chunk:
+                    break
+                completed = [(start, chunk, _infer_chunk_outcomes(chunk, model_id, keep_threshold))]
+                start += len(chunk)
+            elif not pending:
+                break
+            elif ordered:
+                fut = min(pending, key=lambda f: pending[f][0])
+                completed = [(*pending.pop(fut), fut.result())]
+            else:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                completed = [(*pending.pop(f), f.result()) for f in sorted(finished, key=lambda f: pending[f][0])]
+            for chunk_start, chunk, outcomes in completed:
+                events = _chunk_events(chunk_start, chunk, outcomes, persist)
+                done += len(events)
+                errors += sum(e["event"] == "error" for e in events)
+                yield from events
+                yield _progress(done, errors, total)
+    finally:
+        for fut in pending:
+            fut.cancel()
+    yield {"event": "done", "count": done, "errors": errors}
+
+
+async def iter_batch_async(
+    texts: list[str],
+    model_version_id: str | None = None,
+    keep_threshold: float = 0.5,
+    workers: int = BATCH_WORKERS,
+    chunk_size: int = STREAM_CHUNK,
+    reservation: Reservation | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    loop = asyncio.get_running_loop()
+    # Without a process pool the chunks go through the shared inference lane one at a time,
+    # so a long stream holds a single slot instead of crowding out interactive requests.
+    limit = workers * STREAM_INFLIGHT if workers > 1 else 1
+    if reservation is None and workers > 1:
+        reservation = pool_lane.reserve(limit)
+    pending: dict[asyncio.Future, tuple[int, list[str]]] = {}
+    done = errors = 0
+    try:
+        # The response has already started, so a saturated DB lane can't become a 503 any more:
+        # the notes it affects are reported as error events and the stream carries on.
+        try:
+            model_id = await run_db(model_registry.resolve, model_version_id)
+            chunks = ((i, texts[i:i + chunk_size]) for i in range(0, len(texts), chunk_size))
+        except ExecutorSaturated as exc:
+            chunks = iter(())
+            done = errors = len(texts)
+            for event in _error_events(0, len(texts), f"{type(exc).__name__}: {exc}"):
+                yield event
+            yield _progress(done, errors, len(texts))
+        while True:
+            for start, chunk in islice(chunks, limit - len(pending)):
+                if workers > 1:
+                    fut = loop.run_in_executor(get_pool(workers), _infer_chunk_outcomes, chunk, model_id, keep_threshold)
+                else:
+                    fut = asyncio.ensure_future(run_infer(_infer_chunk_outcomes, chunk, model_id, keep_threshold))
+                pending[fut] = (start, chunk)
+            if not pending:
+                break
+            finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for fut in sorted(finished, key=lambda f: pending[f][0]):
+                start, chunk = pending.pop(fut)
+                try:
+                    outcomes = fut.result()
+                except Exception as exc:
+                    outcomes = [{"error": f"{type(exc).__name__}: {exc}"}] * len(chunk)
+                try:
+                    events = await run_db(_chunk_events, start, chunk, outcomes, True)
+                except ExecutorSaturated as exc:
+                    # Scored but not persisted: each note is reported as failed rather than as a result with no run.
+                    events = _error_events(start, len(chunk), f"{type(exc).__name__}: {exc}")
+                done += len(events)
+                errors += sum(e["event"] == "error" for e in events)
+                for event in events:
+                    yield event
+                yield _progress(done, errors, len(texts))
+    finally:
+        for fut in pending:
+            fut.cancel()
+        if reservation is not None:
+            reservation.release()
+    yield {"event": "done", "count": done, "errors": errors}
+
+
+def open_batch_stream(
+    texts: list[str],
+    model_version_id: str | None = None,
+    keep_threshold: float = 0.5,
+    workers: int = BATCH_WORKERS,
+) -> AsyncIterator[dict[str, Any]]:
+    # Pool slots are reserved before the response starts, so a saturated pool is a 503 rather
+    # than a stream that breaks after its headers were sent.
+    reservation = pool_lane.reserve(workers * STREAM_INFLIGHT) if workers > 1 else None
+    events = iter_batch_async(texts, model_version_id, keep_threshold, workers, reservation=reservation)
+    if reservation is not None:
+        # A stream the server never iterates (client gone before the first chunk) still returns its slots.
+        weakref.finalize(events, reservation.release)
+    return events
+
+
+def run_batch(
+    texts: list[str],
+    model_version_id: str | None = None,
+    keep_threshold: float = 0.5,
+    workers: int = BATCH_WORKERS,
+) -> list[dict[str, Any]]:
+    chunks = chunk_texts(texts, workers)
+    if len(chunks) <= 1:
+        return infer_batch(texts, model_version_id, keep_threshold)
+    # Pin "latest" once so every chunk is scored by the same model version.
+    model_id = model_registry.resolve(model_version_id)
+    pool = get_pool(workers)
+    chunk_results = pool.map(_infer_chunk, chunks, [model_id] * len(chunks), [keep_threshold] * len(chunks))
+    results = [r for chunk in chunk_results for r in chunk]
+    record_runs(texts, results)
+    return results
+
+
+async def run_batch_async(
+    texts: list[str],
+    model_version_id: str | None = None,
+    keep_threshold: float = 0.5,
+    workers: int = BATCH_WORKERS,
+) -> list[dict[str, Any]]:
+    loop = asyncio.get_running_loop()
+    chunks = chunk_texts(texts, workers)
+    if len(chunks) <= 1:
+        return await run_infer(infer_batch, texts, model_version_id, keep_threshold)
+    reservation = pool_lane.reserve(len(chunks))
+    try:
+        model_id = await run_db(model_registry.resolve, model_version_id)
+        pool = get_pool(workers)
+        chunk_results = await asyncio.gather(
+            *(loop.run_in_executor(pool, _infer_chunk, chunk, model_id, keep_threshold) for chunk in chunks)
+        )
+    finally:
+        reservation.release()
+    results = [r for chunk in chunk_results for r in chunk]
+    await run_db(record_runs, texts, results)
+    return results
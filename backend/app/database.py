@@ -1,29 +1,86 @@
 import json
+import os
 import sqlite3
+import threading
 import uuid
 from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Iterable
 
-DB_PATH = Path(__file__).resolve().parents[1] / "mednotecleaner.db"
+from .migrations import migrate
 
+DB_PATH = Path(os.environ.get("MNC_DB_PATH") or Path(__file__).resolve().parents[1] / "mednotecleaner.db")
+# Trained sentence/spaCy artifacts; model_versions rows store absolute paths into it.
+MODEL_DIR = Path(os.environ.get("MNC_MODEL_DIR") or Path(__file__).resolve().parents[1] / "models")
 
-def get_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
+SQLITE_CACHE_KB = int(os.environ.get("MNC_SQLITE_CACHE_KB", "65536"))
+SQLITE_MMAP_BYTES = int(os.environ.get("MNC_SQLITE_MMAP_BYTES", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("MNC_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+_local = threading.local()
+_all_conns: list[tuple[threading.Thread, sqlite3.Connection]] = []
+_all_conns_lock = threading.Lock()
+_generation = 0
+
+
+def connect(path: str | Path | None = None) -> sqlite3.Connection:
+    # check_same_thread is off only so close_all_conns() can close other threads' connections.
+    conn = sqlite3.connect(path or DB_PATH, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_KB}")
+    conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_BYTES}")
+    conn.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA temp_store = MEMORY")
     conn.execute("PRAGMA foreign_keys = ON")
     return conn
 
 
+def get_conn() -> sqlite3.Connection:
+    # One long-lived connection per thread (and DB path), reused across db() blocks.
+    if getattr(_local, "generation", None) != _generation:
+        _local.conns = {}
+        _local.generation = _generation
+    key = str(DB_PATH)
+    conn = _local.conns.get(key)
+    if conn is None:
+        conn = _local.conns[key] = connect(DB_PATH)
+        with _all_conns_lock:
+            # Reap connections left behind by threads that have exited.
+            for thread, stale in [c for c in _all_conns if not c[0].is_alive()]:
+                stale.close()
+            _all_conns[:] = [c for c in _all_conns if c[0].is_alive()]
+            _all_conns.append((threading.current_thread(), conn))
+    return conn
+
+
+def close_all_conns() -> None:
+    global _generation
+    with _all_conns_lock:
+        _generation += 1
+        conns = list(_all_conns)
+        _all_conns.clear()
+    for _, conn in conns:
+        conn.close()
+
+
 @contextmanager
 def db() -> Iterable[sqlite3.Connection]:
     conn = get_conn()
+    depth = getattr(_local, "depth", 0)
+    _local.depth = depth + 1
     try:
         yield conn
-        conn.commit()
+        if depth == 0:
+            conn.commit()
+    except BaseException:
+        if depth == 0:
+            conn.rollback()
+        raise
     finally:
-        conn.close()
+        _local.depth = depth
 
 
 def now_iso() -> str:
@@ -35,9 +92,30 @@ def new_id() -> str:
 
 
 def init_db() -> None:
-    schema_path = Path(__file__).resolve().parents[1] / "migrations.sql"
     with db() as conn:
-        conn.executescript(schema_path.read_text())
+        migrate(conn)
+
+
+NOTES_FTS_BACKFILL_CHUNK = int(os.environ.get("MNC_FTS_BACKFILL_CHUNK", "500"))
+
+
+def backfill_notes_fts(chunk_size: int = NOTES_FTS_BACKFILL_CHUNK) -> int:
+    # Indexes pre-existing notes in short transactions so writers are never blocked for long.
+    # The cursor is persisted per chunk, so an interrupted backfill resumes where it stopped.
+    indexed = 0
+    while True:
+        with db() as conn:
+            state = conn.execute("SELECT cursor, upto FROM fts_backfill WHERE name='notes_fts'").fetchone()
+            if state is None or state["cursor"] >= state["upto"]:
+                return indexed
+            rows = conn.execute(
+                "SELECT key, raw_text FROM notes_fts_content WHERE key > ? AND key <= ? ORDER BY key LIMIT ?",
+                (state["cursor"], state["upto"], chunk_size),
+            ).fetchall()
+            cursor = rows[-1]["key"] if rows else state["upto"]
+            conn.executemany("INSERT INTO notes_fts(rowid, raw_text) VALUES (?, ?)", [(r["key"], r["raw_text"]) for r in rows])
+            conn.execute("UPDATE fts_backfill SET cursor=? WHERE name='notes_fts'", (cursor,))
+            indexed += len(rows)
 
 
 def seed_data_if_empty() -> None:
@@ -59,7 +137,9 @@ def seed_data_if_empty() -> None:
             )
         for sl in payload["sentence_labels"]:
             conn.execute(
-                "INSERT INTO sentence_labels (id, sentence_id, label, created_at, created_by) VALUES (?, ?, ?, ?, ?)",
+                # The seed file labels some sentences twice; the last label wins, as in migration 0003.
+                "INSERT INTO sentence_labels (id, sentence_id, label, created_at, created_by) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(sentence_id) DO UPDATE SET label=excluded.label, created_at=excluded.created_at",
                 (sl["id"], sl["sentence_id"], sl["label"], now_iso(), "seed"),
             )
         for sp in payload["span_annotations"]:
@@ -1,11 +1,48 @@
+import base64
+import json
+import re
 import sqlite3
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional
+
+from ..database import connect, get_conn, new_id, now_iso
 
 DB_PATH = "mednotecleaner.db"
+NOTE_PREVIEW_CHARS = 300
+
+_NOTE_TEXT_COLUMNS = {"full": "raw_text", "preview": f"substr(raw_text, 1, {NOTE_PREVIEW_CHARS})"}
+
+_FTS_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_match_expression(query: str, prefix: bool = True) -> str:
+    # Quote every token so user input can never be parsed as FTS5 operators.
+    tokens = _FTS_TOKEN_RE.findall(query)
+    return " ".join(f'"{t}"*' if prefix else f'"{t}"' for t in tokens)
+
+
+def encode_cursor(*values: Any) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    # Every malformed cursor is a ValueError, which the endpoints answer with a 400.
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(values, list) or len(values) != size or not all(isinstance(v, (str, int, float)) for v in values):
+        raise ValueError("Invalid cursor")
+    return values
+
 
 class Repository:
-    def __init__(self, conn: sqlite3.Connection):
-        self.conn = conn
+    def __init__(self, conn: Optional[sqlite3.Connection] = None):
+        self._conn = conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Without an explicit connection, use the calling thread's pooled one.
+        return self._conn if self._conn is not None else get_conn()
 
     def get_stats(self) -> Dict[str, Any]:
         counts = {
@@ -31,17 +68,62 @@ class Repository:
             for r in rows
         ]
 
-    def all_notes(self) -> List[Dict[str, Any]]:
-        rows = self.conn.execute("SELECT id, raw_text, created_at FROM notes ORDER BY created_at DESC").fetchall()
-        return [{"id": r[0], "text": r[1], "date": r[2]} for r in rows]
+    def all_notes(self, limit: int = 50, cursor: Optional[str] = None, fields: str = "full") -> Dict[str, Any]:
+        params: List[Any] = []
+        after = ""
+        if cursor:
+            created_at, note_id = decode_cursor(cursor, 2)
+            after = "WHERE (created_at, id) < (?, ?)"
+            params += [created_at, note_id]
+        rows = self.conn.execute(f"""
+            SELECT id, {_NOTE_TEXT_COLUMNS[fields]}, created_at FROM notes {after}
+            ORDER BY created_at DESC, id DESC LIMIT ?
+        """, (*params, limit + 1)).fetchall()
+        page = rows[:limit]
+        next_cursor = encode_cursor(page[-1][2], page[-1][0]) if len(rows) > limit else None
+        return {"results": [{"id": r[0], "text": r[1], "date": r[2]} for r in page], "next_cursor": next_cursor}
 
-    def search_notes(self, query: str) -> List[Dict[str, Any]]:
-        rows = self.conn.execute("""
-            SELECT id, raw_text, created_at FROM notes 
-            WHERE raw_text LIKE ? 
-            ORDER BY created_at DESC LIMIT 50
-        """, (f"%{query}%",)).fetchall()
-        return [{"id": r[0], "text": r[1], "date": r[2]} for r in rows]
+    def iter_notes(self, fields: str = "full", chunk_size: int = 500) -> Iterator[Dict[str, Any]]:
+        # Streams on a dedicated connection: the caller may resume this generator from any thread.
+        conn = connect()
+        try:
+            cur = conn.execute(
+                f"SELECT id, {_NOTE_TEXT_COLUMNS[fields]}, created_at FROM notes ORDER BY created_at DESC, id DESC"
+            )
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    return
+                for r in rows:
+                    yield {"id": r[0], "text": r[1], "date": r[2]}
+        finally:
+            conn.close()
+
+    def search_notes(self, query: str, limit: int = 20, cursor: Optional[str] = None, prefix: bool = True) -> Dict[str, Any]:
+        match = fts_match_expression(query, prefix)
+        if not match:
+            return {"results": [], "next_cursor": None}
+        params: List[Any] = [match]
+        after = ""
+        if cursor:
+            rank, key = decode_cursor(cursor, 2)
+            after = "AND (f.rank > ? OR (f.rank = ? AND f.rowid > ?))"
+            params += [rank, rank, key]
+        rows = self.conn.execute(f"""
+            SELECT n.id, n.created_at, f.rank, f.rowid,
+                   snippet(notes_fts, 0, '<mark>', '</mark>', '…', 16) AS snippet,
+                   substr(n.raw_text, 1, {NOTE_PREVIEW_CHARS}) AS preview
+            FROM notes_fts f JOIN notes_fts_keys k ON k.key = f.rowid JOIN notes n ON n.id = k.note_id
+            WHERE notes_fts MATCH ? {after}
+            ORDER BY f.rank, f.rowid
+            LIMIT ?
+        """, (*params, limit + 1)).fetchall()
+        page = rows[:limit]
+        next_cursor = encode_cursor(page[-1][2], page[-1][3]) if len(rows) > limit else None
+        return {
+            "results": [{"id": r[0], "date": r[1], "rank": r[2], "snippet": r[4], "text": r[5]} for r in page],
+            "next_cursor": next_cursor,
+        }
 
     def get_sentences_for_labeling(self, limit: int = 50) -> List[Dict[str, Any]]:
         rows = self.conn.execute("""
@@ -53,13 +135,21 @@ class Repository:
         return [{"id": r[0], "text": r[1], "last_label": r[2]} for r in rows]
 
     def submit_label(self, sentence_id: str, label: str):
-        self.conn.execute("""
-            INSERT INTO sentence_labels (sentence_id, label) VALUES (?, ?)
-            ON CONFLICT(sentence_id) DO UPDATE SET label=excluded.label, created_at=CURRENT_TIMESTAMP
-        """, (sentence_id, label))
-        self.conn.commit()
+        # The connection is pooled per thread, so a failed write must not leave a transaction open.
+        with self.conn as conn:
+            conn.execute("""
+                INSERT INTO sentence_labels (id, sentence_id, label, created_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(sentence_id) DO UPDATE SET label=excluded.label, created_at=excluded.created_at
+            """, (new_id(), sentence_id, label, now_iso()))
 
     def get_note(self, note_id: str) -> Optional[Dict[str, Any]]:
         row = self.conn.execute("SELECT id, raw_text, created_at FROM notes WHERE id = ?", (note_id,)).fetchone()
         if not row: return None
         return {"id": row[0], "text": row[1], "date": row[2]}
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            "SELECT id, created_at, model_version_id, input_text, confidence_json FROM inference_runs WHERE id = ?", (run_id,)
+        ).fetchone()
+        if not row: return None
+        return {"id": row[0], "created_at": row[1], "model_version_id": row[2], "input_text": row[3], "confidence": json.loads(row[4] or "{}")}
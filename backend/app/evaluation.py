@@ -0,0 +1,96 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import spacy
+
+EVAL_WORKERS = int(os.environ.get("MNC_EVAL_WORKERS", "0")) or (os.cpu_count() or 1)
+EVAL_BATCH_SIZE = int(os.environ.get("MNC_EVAL_BATCH_SIZE", "32"))
+# Below this many notes per worker, loading the model in another process costs more than it saves.
+EVAL_MIN_CHUNK = int(os.environ.get("MNC_EVAL_MIN_CHUNK", "64"))
+
+Note = tuple[str, list[tuple[int, int, str]]]
+# Per label: [matched predictions, predictions, matched gold spans, gold spans].
+Counts = dict[str, list[int]]
+
+_models: dict[str, Any] = {}
+
+
+def _load(model_path: str):
+    if model_path not in _models:
+        _models[model_path] = spacy.load(model_path)
+    return _models[model_path]
+
+
+def _add(total: Counts, label: str, counts: list[int]) -> None:
+    row = total.setdefault(label, [0, 0, 0, 0])
+    for i, c in enumerate(counts):
+        row[i] += c
+
+
+def _overlaps(a: tuple[int, int, str], b: tuple[int, int, str]) -> bool:
+    return a[2] == b[2] and a[0] < b[1] and b[0] < a[1]
+
+
+def score_chunk(model_path: str, notes: list[Note], batch_size: int = EVAL_BATCH_SIZE) -> dict[str, Counts]:
+    # Raw counts rather than spaCy's Scorer ratios, so chunks scored in different processes add up exactly.
+    nlp = _load(model_path)
+    exact: Counts = {}
+    partial: Counts = {}
+    for (_, gold), doc in zip(notes, nlp.pipe((t for t, _ in notes), batch_size=batch_size)):
+        pred = [(e.start_char, e.end_char, e.label_) for e in doc.ents]
+        for label in {s[2] for s in pred} | {s[2] for s in gold}:
+            p = [s for s in pred if s[2] == label]
+            g = [s for s in gold if s[2] == label]
+            tp = len(set(p) & set(g))
+            _add(exact, label, [tp, len(p), tp, len(g)])
+            _add(partial, label, [
+                sum(any(_overlaps(a, b) for b in g) for a in p),
+                len(p),
+                sum(any(_overlaps(a, b) for a in p) for b in g),
+                len(g),
+            ])
+    return {"exact": exact, "partial": partial}
+
+
+def _prf(counts: list[int]) -> dict[str, float]:
+    p = counts[0] / counts[1] if counts[1] else 0.0
+    r = counts[2] / counts[3] if counts[3] else 0.0
+    return {"precision": p, "recall": r, "f1": 2 * p * r / (p + r) if p + r else 0.0}
+
+
+def evaluate_ner(
+    model_path: str,
+    notes: list[Note],
+    workers: int = EVAL_WORKERS,
+    batch_size: int = EVAL_BATCH_SIZE,
+    min_chunk: int = EVAL_MIN_CHUNK,
+) -> dict[str, Any]:
+    size = max(min_chunk, math.ceil(len(notes) / max(1, workers)))
+    chunks = [notes[i:i + size] for i in range(0, len(notes), size)]
+    # A daemonic process (e.g. a pool worker) may not start children of its own.
+    processes = 1 if len(chunks) <= 1 or multiprocessing.current_process().daemon else min(workers, len(chunks))
+    if processes == 1:
+        results = [score_chunk(model_path, c, batch_size) for c in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(score_chunk, [model_path] * len(chunks), chunks, [batch_size] * len(chunks)))
+
+    totals: dict[str, Counts] = {"exact": {}, "partial": {}}
+    for res in results:
+        for mode in totals:
+            for label, counts in res[mode].items():
+                _add(totals[mode], label, counts)
+
+    per_label = {}
+    for label in sorted(set(totals["exact"]) | set(totals["partial"])):
+        exact = totals["exact"].get(label, [0, 0, 0, 0])
+        per_label[label] = {
+            **_prf(exact),
+            "partial": _prf(totals["partial"].get(label, [0, 0, 0, 0])),
+            "support": exact[3],
+        }
+    micro = {mode: _prf([sum(c[i] for c in totals[mode].values()) for i in range(4)]) for mode in totals}
+    return {"per_label": per_label, "exact": micro["exact"], "partial": micro["partial"], "documents": len(notes), "processes": processes}
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+INFER_THREADS = int(os.environ.get("MNC_INFER_THREADS", "2"))
+INFER_MAX_PENDING = int(os.environ.get("MNC_INFER_MAX_PENDING", "16"))
+DB_THREADS = int(os.environ.get("MNC_DB_THREADS", "8"))
+DB_MAX_PENDING = int(os.environ.get("MNC_DB_MAX_PENDING", "256"))
+
+
+class ExecutorSaturated(Exception):
+    def __init__(self, lane: str):
+        super().__init__(f"{lane} executor is saturated")
+        self.lane = lane
+
+
+class Reservation:
+    def __init__(self, lane: "Lane", slots: int):
+        self.lane = lane
+        self.slots = slots
+        self._released = False
+
+    def release(self) -> None:
+        with self.lane._lock:
+            if not self._released:
+                self._released = True
+                self.lane._pending -= self.slots
+
+
+# A bounded thread pool that rejects work instead of queueing without limit.
+class Lane:
+    def __init__(self, name: str, workers: int, max_pending: int):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"mnc-{self.name}")
+            return self._executor
+
+    def try_reserve(self, slots: int = 1) -> Reservation | None:
+        # All-or-nothing, so a request that needs several slots never holds some of them while rejected.
+        with self._lock:
+            if self._pending + slots > self.max_pending:
+                return None
+            self._pending += slots
+        return Reservation(self, slots)
+
+    def reserve(self, slots: int = 1) -> Reservation:
+        reservation = self.try_reserve(slots)
+        if reservation is None:
+            with self._lock:
+                self._rejected += 1
+            raise ExecutorSaturated(self.name)
+        return reservation
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        reservation = self.reserve()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+        finally:
+            reservation.release()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {"workers": self.workers, "max_pending": self.max_pending, "pending": self._pending, "rejected": self._rejected}
+
+
+infer_lane = Lane("infer", INFER_THREADS, INFER_MAX_PENDING)
+db_lane = Lane("db", DB_THREADS, DB_MAX_PENDING)
+
+
+async def run_infer(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return await infer_lane.run(fn, *args, **kwargs)
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return await db_lane.run(fn, *args, **kwargs)
+
+
+def shutdown_lanes() -> None:
+    infer_lane.shutdown()
+    db_lane.shutdown()
@@ -1,52 +1,51 @@
 import json
+import os
 import pickle
 from pathlib import Path
 from typing import Any
 
-import spacy
+import numpy as np
 
-from .database import db, new_id, now_iso, row_to_dict
-from .nlp import assemble_structured, detect_negated, detect_temporal, segment_text
+from .database import new_id, now_iso
+from .model_registry import model_registry
+from .nlp import assemble_structured_many, assign_entity_context, segment_many
+from .result_cache import cache_key, result_cache
+from .sentence_artifact import load_sentence_artifact
+from .sentence_scorer import SentenceScorer
+from .run_writer import run_writer
 
+NER_BATCH_SIZE = int(os.environ.get("MNC_NER_BATCH_SIZE", "32"))
 
 
-def _load_model(model_version_id: str | None):
-    with db() as conn:
-        if model_version_id:
-            row = conn.execute("SELECT * FROM model_versions WHERE id=?", (model_version_id,)).fetchone()
-        else:
-            row = conn.execute("SELECT * FROM model_versions ORDER BY created_at DESC LIMIT 1").fetchone()
-    if not row:
-        return None, None, None
-    rec = row_to_dict(row)
-    with open(rec["sentence_model_path"], "rb") as f:
-        sent_model = pickle.load(f)
-    nlp = spacy.load(rec["spacy_model_path"])
-    return rec["id"], sent_model, nlp
+def load_sentence_model(path: str | Path) -> SentenceScorer:
+    path = Path(path)
+    if path.is_dir():
+        return load_sentence_artifact(path)
+    # Model versions trained before the compact format still point at a pickle.
+    with open(path, "rb") as f:
+        return SentenceScorer.from_sklearn(pickle.load(f))
 
 
-def infer_text(text: str, model_version_id: str | None = None, keep_threshold: float = 0.5) -> dict[str, Any]:
-    model_id, sent_model, ner_nlp = _load_model(model_version_id)
-    warnings = []
-    sents = segment_text(text)
-    sentence_keep_probs = []
-    keep_texts = []
+def _load_model(model_version_id: str | None):
+    return model_registry.get(model_version_id)
 
-    if sent_model:
-        X = sent_model["vectorizer"].transform([s["text"] for s in sents])
-        probs = sent_model["classifier"].predict_proba(X)[:, 1]
-    else:
-        warnings.append("No trained model found. Using default KEEP for all sentences.")
-        probs = [1.0] * len(sents)
 
-    for s, p in zip(sents, probs):
-        sentence_keep_probs.append({"sentence": s["text"], "prob_keep": float(p)})
-        if p >= keep_threshold:
-            keep_texts.append(text[s["start_char"]: s["end_char"]])
+def _keep_probs(sent_model: Any, sents_per_doc: list[list[dict[str, Any]]]) -> list[list[float]]:
+    # One scorer pass over every sentence in the batch, then split back per note.
+    flat = [s["text"] for sents in sents_per_doc for s in sents]
+    if not sent_model:
+        return [[1.0] * len(sents) for sents in sents_per_doc]
+    probs = sent_model.keep_probs(flat)
+    bounds = np.cumsum([len(sents) for sents in sents_per_doc])[:-1]
+    return [p.tolist() for p in np.split(probs, bounds)]
+
 
-    entities = []
-    if ner_nlp:
-        doc = ner_nlp(text)
+def _entities(ner_nlp: Any, texts: list[str], n_process: int = 1) -> list[list[dict[str, Any]]]:
+    if not ner_nlp:
+        return [[] for _ in texts]
+    out = []
+    for doc in ner_nlp.pipe(texts, batch_size=NER_BATCH_SIZE, n_process=n_process):
+        entities = []
         for ent in doc.ents:
             e_txt = ent.text
             entities.append(
@@ -56,33 +55,130 @@ def infer_text(text: str, model_version_id: str | None = None, keep_threshold: f
                     "start_char": ent.start_char,
                     "end_char": ent.end_char,
                     "prob": 0.7,
-                    "negated": detect_negated(e_txt),
-                    "temporal": detect_temporal(e_txt),
+                    "negated": False,
+                    "temporal": None,
                 }
             )
-    else:
-        warnings.append("No NER model found. Structured extraction may be empty.")
+        out.append(entities)
+    return out
+
 
-    structured_json = assemble_structured(entities)
+def clean_by_threshold(text: str, sentence_keep_probs: list[dict[str, Any]], keep_threshold: float) -> tuple[str, int]:
+    keep_texts = []
+    for s in sentence_keep_probs:
+        if s["prob_keep"] >= keep_threshold:
+            # Runs stored before offsets were recorded only have the sentence text.
+            keep_texts.append(text[s["start_char"]: s["end_char"]] if "start_char" in s else s["sentence"])
     cleaned = "\n".join([t.strip() for t in keep_texts if t.strip()])
-    confidence = {"sentence_keep_probs": sentence_keep_probs, "entities": entities}
+    return cleaned, len(keep_texts)
 
-    with db() as conn:
-        run_id = new_id()
-        conn.execute(
-            "INSERT INTO inference_runs (id, created_at, model_version_id, input_text, cleaned_text, output_json, confidence_json) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (run_id, now_iso(), model_id, text, cleaned, json.dumps(structured_json), json.dumps(confidence)),
-        )
 
+def reclean_run(run: dict[str, Any], keep_threshold: float) -> dict[str, Any]:
+    sentence_keep_probs = run["confidence"].get("sentence_keep_probs", [])
+    cleaned, kept = clean_by_threshold(run["input_text"], sentence_keep_probs, keep_threshold)
+    return {
+        "run_id": run["id"],
+        "cleaned_text": cleaned,
+        "meta": {
+            "model_version_id": run["model_version_id"],
+            "keep_threshold": keep_threshold,
+            "kept_sentence_count": kept,
+            "total_sentence_count": len(sentence_keep_probs),
+        },
+    }
+
+
+def _build_result(
+    text: str,
+    sents: list[dict[str, Any]],
+    probs: list[float],
+    entities: list[dict[str, Any]],
+    structured_json: dict[str, Any],
+    model_id: str | None,
+    keep_threshold: float,
+    warnings: list[str],
+) -> dict[str, Any]:
+    sentence_keep_probs = [
+        {"sentence": s["text"], "prob_keep": float(p), "start_char": s["start_char"], "end_char": s["end_char"]}
+        for s, p in zip(sents, probs)
+    ]
+    cleaned, kept = clean_by_threshold(text, sentence_keep_probs, keep_threshold)
+    confidence = {"sentence_keep_probs": sentence_keep_probs, "entities": entities}
     return {
         "cleaned_text": cleaned,
         "structured_json": structured_json,
         "confidence": confidence,
-        "warnings": warnings,
+        "warnings": list(warnings),
         "meta": {
             "model_version_id": model_id,
             "keep_threshold": keep_threshold,
-            "kept_sentence_count": len(keep_texts),
+            "kept_sentence_count": kept,
             "total_sentence_count": len(sents),
         },
     }
+
+
+def run_rows(texts: list[str], results: list[dict[str, Any]]) -> list[tuple]:
+    for r in results:
+        r["meta"]["run_id"] = new_id()
+    return [
+        (
+            r["meta"]["run_id"],
+            now_iso(),
+            r["meta"]["model_version_id"],
+            text,
+            r["cleaned_text"],
+            json.dumps(r["structured_json"]),
+            json.dumps(r["confidence"]),
+        )
+        for text, r in zip(texts, results)
+    ]
+
+
+def record_runs(texts: list[str], results: list[dict[str, Any]]) -> None:
+    run_writer.write(run_rows(texts, results))
+
+
+def infer_batch(
+    texts: list[str],
+    model_version_id: str | None = None,
+    keep_threshold: float = 0.5,
+    n_process: int = 1,
+    persist: bool = True,
+) -> list[dict[str, Any]]:
+    model_id, sent_model, ner_nlp = _load_model(model_version_id)
+    warnings = []
+    if not sent_model:
+        warnings.append("No trained model found. Using default KEEP for all sentences.")
+    if not ner_nlp:
+        warnings.append("No NER model found. Structured extraction may be empty.")
+
+    # Segmentation, keep probabilities and entities don't depend on keep_threshold, so they
+    # are cached per (text, model) and only the threshold filter is redone on a hit.
+    keys = [cache_key(t, model_id) for t in texts]
+    cached = [result_cache.get(k) for k in keys]
+    misses = [i for i, c in enumerate(cached) if c is None]
+    if misses:
+        miss_texts = [texts[i] for i in misses]
+        sents_per_miss = segment_many(miss_texts)
+        probs_per_miss = _keep_probs(sent_model, sents_per_miss)
+        entities_per_miss = _entities(ner_nlp, miss_texts, n_process)
+        for i, text, sents, probs, entities in zip(misses, miss_texts, sents_per_miss, probs_per_miss, entities_per_miss):
+            assign_entity_context(text, sents, entities)
+            cached[i] = {"sentences": sents, "probs": probs, "entities": entities}
+            result_cache.put(keys[i], cached[i])
+    sents_per_doc = [c["sentences"] for c in cached]
+    probs_per_doc = [c["probs"] for c in cached]
+    entities_per_doc = [c["entities"] for c in cached]
+    structured_per_doc = assemble_structured_many(entities_per_doc)
+    results = [
+        _build_result(text, sents, probs, entities, structured, model_id, keep_threshold, warnings)
+        for text, sents, probs, entities, structured in zip(texts, sents_per_doc, probs_per_doc, entities_per_doc, structured_per_doc)
+    ]
+    if persist and results:
+        record_runs(texts, results)
+    return results
+
+
+def infer_text(text: str, model_version_id: str | None = None, keep_threshold: float = 0.5) -> dict[str, Any]:
+    return infer_batch([text], model_version_id, keep_threshold)[0]
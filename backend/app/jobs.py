@@ -0,0 +1,282 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from datetime import datetime, timedelta
+from typing import Any, Iterator
+
+from .batch import BATCH_WORKERS, _infer_chunk_outcomes, get_pool, pool_lane
+from .database import connect, db, new_id, now_iso
+from .executor import Reservation
+from .inference import run_rows
+from .model_registry import model_registry
+from .run_writer import insert_runs
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.environ.get("MNC_JOB_WORKERS", "1"))
+JOB_CHUNK = int(os.environ.get("MNC_JOB_CHUNK", "64"))
+JOB_POLL_INTERVAL = float(os.environ.get("MNC_JOB_POLL_INTERVAL", "2"))
+# A running job whose heartbeat is older than this was orphaned by a dead process and is claimed again.
+JOB_STALE_SECONDS = float(os.environ.get("MNC_JOB_STALE_SECONDS", "120"))
+
+_JOB_COLUMNS = "id, created_at, updated_at, status, model_version_id, keep_threshold, chunk_size, total, processed, failed, error, started_at, finished_at"
+
+
+def submit_job(texts: list[str], model_version_id: str | None = None, keep_threshold: float = 0.5, chunk_size: int = JOB_CHUNK) -> dict[str, Any]:
+    # Pin "latest" now so a job resumed after a retrain is still scored by one model.
+    model_id = model_registry.resolve(model_version_id)
+    job_id = new_id()
+    ts = now_iso()
+    with db() as conn:
+        conn.execute(
+            "INSERT INTO inference_jobs (id, created_at, updated_at, status, model_version_id, keep_threshold, chunk_size, total) VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+            (job_id, ts, ts, model_id, keep_threshold, chunk_size, len(texts)),
+        )
+        conn.executemany(
+            "INSERT INTO inference_job_items (job_id, idx, text) VALUES (?, ?, ?)",
+            ((job_id, i, t) for i, t in enumerate(texts)),
+        )
+    job_runner.wake()
+    return get_job(job_id)
+
+
+def get_job(job_id: str) -> dict[str, Any] | None:
+    with db() as conn:
+        row = conn.execute(f"SELECT {_JOB_COLUMNS} FROM inference_jobs WHERE id = ?", (job_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def list_jobs(limit: int = 20) -> list[dict[str, Any]]:
+    with db() as conn:
+        rows = conn.execute(f"SELECT {_JOB_COLUMNS} FROM inference_jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+    return [dict(r) for r in rows]
+
+
+def cancel_job(job_id: str) -> dict[str, Any] | None:
+    ts = now_iso()
+    with db() as conn:
+        conn.execute(
+            "UPDATE inference_jobs SET status='cancelled', finished_at=?, updated_at=? WHERE id=? AND status IN ('queued','running')",
+            (ts, ts, job_id),
+        )
+    return get_job(job_id)
+
+
+def iter_job_results(job_id: str, chunk_size: int = 500) -> Iterator[dict[str, Any]]:
+    # A dedicated connection, so a slow download doesn't pin a pooled connection's read snapshot.
+    conn = connect()
+    try:
+        cur = conn.execute(
+            """
+            SELECT i.idx, i.run_id, i.error, r.cleaned_text, r.output_json, r.confidence_json
+            FROM inference_job_items i LEFT JOIN inference_runs r ON r.id = i.run_id
+            WHERE i.job_id = ? AND (i.run_id IS NOT NULL OR i.error IS NOT NULL)
+            ORDER BY i.idx
+            """,
+            (job_id,),
+        )
+        while rows := cur.fetchmany(chunk_size):
+            for r in rows:
+                if r["run_id"] is None:
+                    yield {"index": r["idx"], "error": r["error"]}
+                else:
+                    yield {
+                        "index": r["idx"],
+                        "run_id": r["run_id"],
+                        "cleaned_text": r["cleaned_text"],
+                        "structured_json": json.loads(r["output_json"]),
+                        "confidence": json.loads(r["confidence_json"]),
+                    }
+    finally:
+        conn.close()
+
+
+def claim_job(stale_seconds: float = JOB_STALE_SECONDS) -> dict[str, Any] | None:
+    ts = now_iso()
+    stale = (datetime.utcnow() - timedelta(seconds=stale_seconds)).isoformat()
+    # A single UPDATE is atomic, so two workers (or two API processes) never claim the same job.
+    with db() as conn:
+        row = conn.execute(
+            """
+            UPDATE inference_jobs SET status='running', started_at=COALESCE(started_at, ?), heartbeat_at=?, updated_at=?
+            WHERE id = (
+                SELECT id FROM inference_jobs
+                WHERE status='queued' OR (status='running' AND heartbeat_at < ?)
+                ORDER BY created_at LIMIT 1
+            )
+            RETURNING id, model_version_id, keep_threshold, chunk_size, next_idx
+            """,
+            (ts, ts, ts, stale),
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def _commit_chunk(job: dict[str, Any], rows: list[Any], outcomes: list[dict[str, Any]]) -> bool:
+    ok = [(r["text"], o["result"]) for r, o in zip(rows, outcomes) if "result" in o]
+    runs = run_rows([t for t, _ in ok], [res for _, res in ok])
+    next_idx = rows[-1]["idx"] + 1
+    failed = sum("error" in o for o in outcomes)
+    ts = now_iso()
+    with db() as conn:
+        # Guarded on next_idx: if another worker took over a stale job, only one commit of a chunk wins.
+        cur = conn.execute(
+            "UPDATE inference_jobs SET next_idx=?, processed=processed+?, failed=failed+?, heartbeat_at=?, updated_at=? WHERE id=? AND status='running' AND next_idx=?",
+            (next_idx, len(rows), failed, ts, ts, job["id"], job["next_idx"]),
+        )
+        if cur.rowcount == 0:
+            return False
+        insert_runs(runs)
+        conn.executemany(
+            "UPDATE inference_job_items SET text=NULL, run_id=?, error=NULL WHERE job_id=? AND idx=?",
+            [(o["result"]["meta"]["run_id"], job["id"], r["idx"]) for r, o in zip(rows, outcomes) if "result" in o],
+        )
+        conn.executemany(
+            "UPDATE inference_job_items SET error=? WHERE job_id=? AND idx=?",
+            [(o["error"], job["id"], r["idx"]) for r, o in zip(rows, outcomes) if "error" in o],
+        )
+    job["next_idx"] = next_idx
+    return True
+
+
+class JobRunner:
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        processes: int = BATCH_WORKERS,
+        poll_interval: float = JOB_POLL_INTERVAL,
+        stale_seconds: float = JOB_STALE_SECONDS,
+    ):
+        self.workers = workers
+        self.processes = processes
+        self.poll_interval = poll_interval
+        self.stale_seconds = stale_seconds
+        # Several heartbeats per stale window, so a slow chunk never looks like a dead worker.
+        self.heartbeat_interval = stale_seconds / 4
+        self._inline: ThreadPoolExecutor | None = None
+        self._threads: list[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            for i in range(self.workers):
+                t = threading.Thread(target=self._run, name=f"mnc-job-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def stop(self, timeout: float | None = None) -> None:
+        with self._lock:
+            threads, self._threads = self._threads, []
+        self._stop.set()
+        self._wake.set()
+        for t in threads:
+            t.join(timeout)
+        with self._lock:
+            inline, self._inline = self._inline, None
+        if inline is not None:
+            inline.shutdown(wait=False)
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            job = claim_job(self.stale_seconds)
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            try:
+                self.run_job(job)
+            except Exception as exc:
+                if self._stop.is_set():
+                    self._release(job)
+                    return
+                logger.exception("Inference job %s failed", job["id"])
+                self._finish(job, "failed", f"{type(exc).__name__}: {exc}")
+
+    def run_job(self, job: dict[str, Any]) -> None:
+        while True:
+            if self._stop.is_set():
+                self._release(job)
+                return
+            with db() as conn:
+                status = conn.execute("SELECT status FROM inference_jobs WHERE id=?", (job["id"],)).fetchone()
+                rows = conn.execute(
+                    "SELECT idx, text FROM inference_job_items WHERE job_id=? AND idx>=? ORDER BY idx LIMIT ?",
+                    (job["id"], job["next_idx"], job["chunk_size"]),
+                ).fetchall()
+            if status is None or status["status"] != "running":
+                return
+            if not rows:
+                self._finish(job, "completed")
+                return
+            outcomes = self._score(job, [r["text"] for r in rows])
+            if outcomes is None:
+                self._release(job)
+                return
+            if not _commit_chunk(job, rows, outcomes):
+                return
+
+    def _score(self, job: dict[str, Any], texts: list[str]) -> list[dict[str, Any]] | None:
+        args = (_infer_chunk_outcomes, texts, job["model_version_id"], job["keep_threshold"])
+        if self.processes <= 1:
+            # Scored on a helper thread all the same, so this one can keep the heartbeat fresh.
+            return self._wait(job, self._inline_executor().submit(*args))
+        reservation = self._reserve_pool(job)
+        if reservation is None:
+            return None
+        try:
+            return self._wait(job, get_pool(self.processes).submit(*args))
+        finally:
+            reservation.release()
+
+    def _reserve_pool(self, job: dict[str, Any]) -> Reservation | None:
+        # Job chunks take pool slots from the same lane as batch requests. A full pool means
+        # "later", not a failed chunk: the job keeps its heartbeat and waits for a slot.
+        while (reservation := pool_lane.try_reserve()) is None:
+            self._heartbeat(job)
+            if self._stop.wait(min(self.poll_interval, self.heartbeat_interval)):
+                return None
+        return reservation
+
+    def _wait(self, job: dict[str, Any], fut: Future) -> list[dict[str, Any]]:
+        while True:
+            try:
+                return fut.result(timeout=self.heartbeat_interval)
+            except FutureTimeout:
+                self._heartbeat(job)
+
+    def _inline_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._inline is None:
+                self._inline = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="mnc-job-inline")
+            return self._inline
+
+    def _heartbeat(self, job: dict[str, Any]) -> None:
+        ts = now_iso()
+        with db() as conn:
+            conn.execute("UPDATE inference_jobs SET heartbeat_at=?, updated_at=? WHERE id=? AND status='running'", (ts, ts, job["id"]))
+
+    def _finish(self, job: dict[str, Any], status: str, error: str | None = None) -> None:
+        ts = now_iso()
+        with db() as conn:
+            conn.execute(
+                "UPDATE inference_jobs SET status=?, error=?, finished_at=?, updated_at=? WHERE id=? AND status='running'",
+                (status, error, ts, ts, job["id"]),
+            )
+
+    def _release(self, job: dict[str, Any]) -> None:
+        # Hand the job back so the next start (of this or another process) resumes at next_idx.
+        with db() as conn:
+            conn.execute("UPDATE inference_jobs SET status='queued', updated_at=? WHERE id=? AND status='running'", (now_iso(), job["id"]))
+
+
+job_runner = JobRunner()
@@ -1,11 +1,23 @@
-import sqlite3
-from fastapi import FastAPI, BackgroundTasks, HTTPException, Depends
-from fastapi.middleware.cors import CORSMiddleware
+import json
+import threading
+from typing import Literal, Optional
 
-from .database import DB_PATH, init_db, seed_data_if_empty
-from .inference import infer_text
-from .schemas import BatchInferRequest, FeedbackRequest, InferRequest, LabelRequest, NoteCreate, SentenceLabelIn, SpanCreate, TrainRequest
-from .training import train_all, get_training_progress
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from sse_starlette.sse import EventSourceResponse
+
+from .batch import open_batch_stream, pool_lane, run_batch_async, shutdown_pool
+from .database import backfill_notes_fts, close_all_conns, init_db, seed_data_if_empty
+from .executor import ExecutorSaturated, db_lane, infer_lane, run_db, run_infer, shutdown_lanes
+from .inference import infer_text, reclean_run
+from .jobs import cancel_job, get_job, iter_job_results, job_runner, list_jobs, submit_job
+from .model_registry import model_registry
+from .result_cache import result_cache
+from .run_writer import run_writer
+from .schemas import BatchInferRequest, FeedbackRequest, InferenceJobCreate, InferRequest, LabelRequest, NoteCreate, RecleanRequest, SentenceLabelIn, SpanCreate, StreamBatchInferRequest, TrainRequest
+from .training_jobs import TrainingBusy, cancel_training, get_training_job, get_training_progress, list_training_jobs, shutdown_training, start_training
+from .warmup import warmup
 from .db.repository import Repository
 
 app = FastAPI(title="MedNoteCleaner API")
@@ -22,45 +34,102 @@ app.add_middleware(
 async def startup():
     init_db()
     seed_data_if_empty()
+    threading.Thread(target=backfill_notes_fts, name="mnc-fts-backfill", daemon=True).start()
+    job_runner.start()
+    warmup.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Stop job workers first so an in-flight chunk isn't cut off by the pool shutdown.
+    job_runner.stop()
+    shutdown_training()
+    shutdown_pool()
+    shutdown_lanes()
+    run_writer.close()
+    close_all_conns()
+
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated(request: Request, exc: ExecutorSaturated):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
 
 
 def get_repo():
-    conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
-    try:
-        yield Repository(conn)
-    finally:
-        conn.close()
+    return Repository()
+
+
+@app.get("/api/health")
+async def health():
+    state = warmup.state()
+    # Liveness: unhealthy only while warm-up (retries included) is still running. A warm-up that
+    # gave up reports "degraded" with a 200, so the platform doesn't restart an instance that can serve.
+    return JSONResponse(status_code=503 if state["status"] in ("pending", "warming") else 200, content=state)
+
+
+@app.get("/api/ready")
+async def ready():
+    state = warmup.state()
+    # Readiness: only once the model is loaded and the pipeline has run once.
+    return JSONResponse(status_code=200 if state["status"] == "ready" else 503, content=state)
 
 
 @app.get("/api/dashboard/stats")
 async def dashboard_stats(repo: Repository = Depends(get_repo)):
-    return repo.get_stats()
+    return await run_db(repo.get_stats)
 
 
+@app.post("/api/infer/batch")
 @app.post("/api/infer/batch/export")
 async def infer_batch_export(req: BatchInferRequest):
-    results = [
-        infer_text(text, req.model_version_id, req.keep_threshold)
-        for text in req.texts
-    ]
+    results = await run_batch_async(req.texts, req.model_version_id, req.keep_threshold)
     return {"count": len(results), "results": results}
 
 
+@app.post("/api/infer/batch/stream")
+async def infer_batch_stream(req: StreamBatchInferRequest, format: Literal["ndjson", "sse"] = "ndjson"):
+    events = open_batch_stream(req.texts, req.model_version_id, req.keep_threshold)
+    if format == "sse":
+        return EventSourceResponse({"event": e["event"], "data": json.dumps(e)} async for e in events)
+    return StreamingResponse((json.dumps(e) + "\n" async for e in events), media_type="application/x-ndjson")
+
+
 @app.get("/api/notes/search")
-async def search_notes(q: str, repo: Repository = Depends(get_repo)):
-    return repo.search_notes(q)
+async def search_notes(
+    q: str,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    prefix: bool = True,
+    repo: Repository = Depends(get_repo),
+):
+    try:
+        return await run_db(repo.search_notes, q, limit, cursor, prefix)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 @app.get("/api/notes/all")
-async def get_all_notes(repo: Repository = Depends(get_repo)):
-    return repo.all_notes()
+async def get_all_notes(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Literal["full", "preview"] = "full",
+    repo: Repository = Depends(get_repo),
+):
+    try:
+        return await run_db(repo.all_notes, limit, cursor, fields)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@app.get("/api/notes/all/stream")
+async def stream_all_notes(fields: Literal["full", "preview"] = "full", repo: Repository = Depends(get_repo)):
+    lines = (json.dumps(n) + "\n" for n in repo.iter_notes(fields))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
 
 
 @app.get("/api/notes/{note_id}")
 async def get_note(note_id: str, repo: Repository = Depends(get_repo)):
-    note = repo.get_note(note_id)
+    note = await run_db(repo.get_note, note_id)
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
     return note
@@ -68,32 +137,117 @@ async def get_note(note_id: str, repo: Repository = Depends(get_repo)):
 
 @app.get("/api/sentences")
 async def get_sentences(repo: Repository = Depends(get_repo)):
-    return repo.get_sentences_for_labeling()
+    return await run_db(repo.get_sentences_for_labeling)
 
 
 @app.post("/api/sentences/{sentence_id}/label")
 async def label_sentence(sentence_id: str, req: LabelRequest, repo: Repository = Depends(get_repo)):
-    repo.submit_label(sentence_id, req.label)
+    await run_db(repo.submit_label, sentence_id, req.label)
     return {"status": "ok"}
 
 
 @app.get("/api/models")
 async def get_models(repo: Repository = Depends(get_repo)):
-    return repo.get_models()
+    return await run_db(repo.get_models)
+
+
+@app.get("/api/models/registry")
+async def get_model_registry_stats():
+    return model_registry.stats()
+
+
+@app.get("/api/infer/cache")
+async def get_result_cache_stats():
+    return result_cache.stats()
+
+
+@app.get("/api/executors")
+async def get_executor_stats():
+    return {"infer": infer_lane.stats(), "db": db_lane.stats(), "pool": pool_lane.stats(), "run_writer": run_writer.stats()}
 
 
 @app.post("/api/infer")
 async def infer(req: InferRequest):
-    return infer_text(req.text, req.model_version_id, req.keep_threshold)
+    return await run_infer(infer_text, req.text, req.model_version_id, req.keep_threshold)
+
+
+@app.post("/api/inference-runs/{run_id}/reclean")
+async def reclean(run_id: str, req: RecleanRequest, repo: Repository = Depends(get_repo)):
+    run = await run_db(repo.get_run, run_id)
+    if not run:
+        # The run may still be queued in the background writer.
+        await run_db(run_writer.flush, 1.0)
+        run = await run_db(repo.get_run, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Inference run not found")
+    return reclean_run(run, req.keep_threshold)
+
+
+@app.post("/api/inference-jobs")
+async def create_inference_job(req: InferenceJobCreate):
+    return await run_db(submit_job, req.texts, req.model_version_id, req.keep_threshold, req.chunk_size)
+
+
+@app.get("/api/inference-jobs")
+async def get_inference_jobs(limit: int = Query(20, ge=1, le=200)):
+    return await run_db(list_jobs, limit)
+
+
+@app.get("/api/inference-jobs/{job_id}")
+async def get_inference_job(job_id: str):
+    job = await run_db(get_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Inference job not found")
+    return job
+
+
+@app.post("/api/inference-jobs/{job_id}/cancel")
+async def cancel_inference_job(job_id: str):
+    job = await run_db(cancel_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Inference job not found")
+    return job
+
+
+@app.get("/api/inference-jobs/{job_id}/results")
+async def download_inference_job(job_id: str):
+    if not await run_db(get_job, job_id):
+        raise HTTPException(status_code=404, detail="Inference job not found")
+    lines = (json.dumps(r) + "\n" for r in iter_job_results(job_id))
+    return StreamingResponse(lines, media_type="application/x-ndjson", headers={"Content-Disposition": f'attachment; filename="{job_id}.ndjson"'})
 
 
 @app.post("/api/train")
-async def train(req: TrainRequest, background_tasks: BackgroundTasks):
-    # Unpack TrainRequest into positional args matching train_all(max_steps, lr, base_model)
-    background_tasks.add_task(train_all, req.max_steps, req.lr, req.base_model)
-    return {"status": "training initiated"}
+async def train(req: TrainRequest):
+    # Training runs in its own process so the GIL-bound fit loops never stall request handling.
+    try:
+        job = await run_db(start_training, req.model_dump())
+    except TrainingBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return {"status": "training initiated", "job_id": job["id"]}
 
 
 @app.get("/api/train/progress")
 async def train_progress():
-    return get_training_progress()
+    return await run_db(get_training_progress)
+
+
+@app.get("/api/train/jobs")
+async def get_training_jobs(limit: int = Query(20, ge=1, le=200)):
+    return await run_db(list_training_jobs, limit)
+
+
+@app.get("/api/train/jobs/{job_id}")
+async def get_training_job_status(job_id: str):
+    job = await run_db(get_training_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return job
+
+
+@app.post("/api/train/jobs/{job_id}/cancel")
+async def cancel_training_job(job_id: str):
+    job = await run_db(cancel_training, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return job
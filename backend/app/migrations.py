@@ -0,0 +1,71 @@
+import re
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "migrations"
+_MIGRATION_RE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> list[tuple[int, str, Path]]:
+    found = []
+    for path in directory.iterdir():
+        m = _MIGRATION_RE.match(path.name)
+        if m:
+            found.append((int(m.group(1)), m.group(2), path))
+    found.sort()
+    versions = [v for v, _, _ in found]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions in {directory}")
+    return found
+
+
+def split_statements(sql: str) -> Iterator[str]:
+    # complete_statement understands trigger bodies, so BEGIN ... END blocks stay whole.
+    buf = ""
+    for line in sql.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            yield buf.strip()
+            buf = ""
+    leftover = "\n".join(l for l in buf.splitlines() if not l.strip().startswith("--")).strip()
+    if leftover:
+        raise ValueError(f"Incomplete SQL statement: {leftover[:80]}")
+
+
+def applied_versions(conn: sqlite3.Connection) -> set[int]:
+    return {r[0] for r in conn.execute("SELECT version FROM schema_migrations")}
+
+
+def migrate(conn: sqlite3.Connection, target: int | None = None, directory: Path = MIGRATIONS_DIR) -> list[int]:
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS schema_migrations (version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at TEXT NOT NULL)"
+    )
+    conn.commit()
+    done = applied_versions(conn)
+    applied = []
+    for version, name, path in discover(directory):
+        if target is not None and version > target:
+            break
+        if version in done:
+            continue
+        # Each migration runs in its own write transaction; re-check inside it so that
+        # workers starting concurrently apply every migration exactly once.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM schema_migrations WHERE version=?", (version,)).fetchone():
+                conn.rollback()
+                continue
+            for stmt in split_statements(path.read_text()):
+                conn.execute(stmt)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.utcnow().isoformat()),
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
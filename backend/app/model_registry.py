@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from .database import db, row_to_dict
+
+MODEL_CACHE_SIZE = int(os.environ.get("MNC_MODEL_CACHE_SIZE", "2"))
+# How long a resolved "latest" id is trusted before re-checking model_versions.
+# train_all invalidates in-process; the TTL covers trainings done by other workers.
+LATEST_TTL_SECONDS = float(os.environ.get("MNC_MODEL_LATEST_TTL", "30"))
+
+LoadedModel = tuple[Any, Any]
+
+
+def _latest_model_id() -> str | None:
+    with db() as conn:
+        row = conn.execute("SELECT id FROM model_versions ORDER BY created_at DESC LIMIT 1").fetchone()
+    return row["id"] if row else None
+
+
+def _load_from_disk(model_version_id: str) -> LoadedModel | None:
+    with db() as conn:
+        row = conn.execute("SELECT * FROM model_versions WHERE id=?", (model_version_id,)).fetchone()
+    if not row:
+        return None
+    rec = row_to_dict(row)
+    # Imported here: inference imports this module for the registry singleton, and spaCy
+    # only loads once a model does, so importing the registry stays cheap.
+    import spacy
+
+    from .inference import load_sentence_model
+
+    sent_model = load_sentence_model(rec["sentence_model_path"])
+    nlp = spacy.load(rec["spacy_model_path"])
+    return sent_model, nlp
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        max_models: int = MODEL_CACHE_SIZE,
+        loader: Callable[[str], LoadedModel | None] = _load_from_disk,
+        latest_resolver: Callable[[], str | None] = _latest_model_id,
+        latest_ttl: float = LATEST_TTL_SECONDS,
+    ):
+        self.max_models = max(1, max_models)
+        self._loader = loader
+        self._latest_resolver = latest_resolver
+        self._latest_ttl = latest_ttl
+        self._models: "OrderedDict[str, LoadedModel]" = OrderedDict()
+        self._latest: tuple[str | None, float] | None = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "evictions": 0,
+            "latest_lookups": 0,
+            "load_seconds_total": 0.0,
+            "last_load_seconds": None,
+        }
+
+    def resolve(self, model_version_id: str | None) -> str | None:
+        if model_version_id:
+            return model_version_id
+        with self._lock:
+            latest = self._latest
+        if latest is not None and time.monotonic() - latest[1] < self._latest_ttl:
+            return latest[0]
+        model_id = self._latest_resolver()
+        with self._lock:
+            self._latest = (model_id, time.monotonic())
+            self._stats["latest_lookups"] += 1
+        return model_id
+
+    def get(self, model_version_id: str | None) -> tuple[str | None, Any, Any]:
+        model_id = self.resolve(model_version_id)
+        if model_id is None:
+            return None, None, None
+        with self._lock:
+            if model_id in self._models:
+                self._models.move_to_end(model_id)
+                self._stats["hits"] += 1
+                return (model_id, *self._models[model_id])
+        # Loads are serialized so concurrent misses on the same id load it once.
+        with self._load_lock:
+            with self._lock:
+                if model_id in self._models:
+                    self._models.move_to_end(model_id)
+                    self._stats["hits"] += 1
+                    return (model_id, *self._models[model_id])
+                self._stats["misses"] += 1
+            started = time.perf_counter()
+            loaded = self._loader(model_id)
+            elapsed = time.perf_counter() - started
+            if loaded is None:
+                return None, None, None
+            with self._lock:
+                self._stats["loads"] += 1
+                self._stats["load_seconds_total"] += elapsed
+                self._stats["last_load_seconds"] = elapsed
+                self._models[model_id] = loaded
+                while len(self._models) > self.max_models:
+                    self._models.popitem(last=False)
+                    self._stats["evictions"] += 1
+        return (model_id, *loaded)
+
+    def invalidate(self, model_version_id: str | None = None) -> None:
+        with self._lock:
+            self._latest = None
+            if model_version_id is not None:
+                self._models.pop(model_version_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._latest = None
+            self._models.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else None,
+                "max_models": self.max_models,
+                "resident": list(self._models.keys()),
+                "latest_model_version_id": self._latest[0] if self._latest else None,
+            }
+
+
+model_registry = ModelRegistry()
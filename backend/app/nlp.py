@@ -1,9 +1,13 @@
+import os
 import re
+import threading
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
-from typing import Any
+from typing import Any, Iterable
 
 import spacy
 from spacy.language import Language
+from spacy.tokens import Doc
 
 NEGATION_PATTERNS = [r"\bno\b", r"\bdenies\b", r"\bwithout\b", r"\bnegative for\b"]
 TEMPORAL_PATTERNS = {
@@ -13,83 +17,204 @@ TEMPORAL_PATTERNS = {
 }
 
 
-def get_segmenter() -> Language:
+BULLET_RE = re.compile(r"\n[-*]\s*")
+SEGMENT_BATCH_SIZE = 64
+
+_segmenter: Language | None = None
+_segmenter_lock = threading.Lock()
+
+
+def build_segmenter() -> Language:
     nlp = spacy.blank("en")
     if "sentencizer" not in nlp.pipe_names:
         nlp.add_pipe("sentencizer")
     return nlp
 
 
+def get_segmenter() -> Language:
+    global _segmenter
+    if _segmenter is None:
+        with _segmenter_lock:
+            if _segmenter is None:
+                _segmenter = build_segmenter()
+    return _segmenter
+
+
+def _normalize_for_segmentation(text: str) -> tuple[str, list[int]]:
+    # ICU shorthand bullets normalization for segmentation only. offset_map[i] is the
+    # original index of normalized char i, or -1 for the synthetic ". " separators.
+    parts: list[str] = []
+    offset_map: list[int] = []
+    pos = 0
+    for m in BULLET_RE.finditer(text):
+        parts.append(text[pos:m.start()])
+        offset_map.extend(range(pos, m.start()))
+        # Don't double up punctuation ("intact.." is not a sentence boundary to spaCy).
+        sep = " " if text[pos:m.start()].rstrip()[-1:] in (".", "!", "?") else ". "
+        parts.append(sep)
+        offset_map.extend([-1] * len(sep))
+        pos = m.end()
+    parts.append(text[pos:])
+    offset_map.extend(range(pos, len(text)))
+    return "".join(parts), offset_map
+
+
+def _sentences_from_doc(text: str, doc: Doc, offset_map: list[int]) -> list[dict[str, Any]]:
+    normalized = doc.text
+    out = []
+    for sent in doc.sents:
+        st, en = sent.start_char, sent.end_char
+        while st < en and (offset_map[st] < 0 or normalized[st].isspace()):
+            st += 1
+        while en > st and (offset_map[en - 1] < 0 or normalized[en - 1].isspace()):
+            en -= 1
+        if st == en:
+            continue
+        start_char, end_char = offset_map[st], offset_map[en - 1] + 1
+        out.append({"idx": len(out), "text": text[start_char:end_char], "start_char": start_char, "end_char": end_char})
+    return out
+
+
 def segment_text(text: str) -> list[dict[str, Any]]:
     nlp = get_segmenter()
-    # ICU shorthand bullets normalization for segmentation only
-    normalized = re.sub(r"\n[-*]\s*", ". ", text)
-    doc = nlp(normalized)
-    out = []
-    cursor = 0
-    for idx, sent in enumerate(doc.sents):
-        st = text.find(sent.text.strip(), cursor)
-        if st < 0:
-            st = cursor
-        en = st + len(sent.text.strip())
-        cursor = en
-        out.append({"idx": idx, "text": sent.text.strip(), "start_char": st, "end_char": en})
-    return [s for s in out if s["text"]]
+    normalized, offset_map = _normalize_for_segmentation(text)
+    # The tokenizer keeps internal caches, so calls on the shared pipeline are serialized.
+    with _segmenter_lock:
+        doc = nlp(normalized)
+    return _sentences_from_doc(text, doc, offset_map)
+
+
+def segment_many(texts: Iterable[str], batch_size: int = SEGMENT_BATCH_SIZE) -> list[list[dict[str, Any]]]:
+    nlp = get_segmenter()
+    texts = list(texts)
+    normalized = [_normalize_for_segmentation(t) for t in texts]
+    with _segmenter_lock:
+        docs = list(nlp.pipe((n for n, _ in normalized), batch_size=batch_size))
+    return [_sentences_from_doc(t, d, m) for t, d, (_, m) in zip(texts, docs, normalized)]
+
+
+def _compile_triggers() -> re.Pattern:
+    # One alternation over every trigger; the named group says which kind matched.
+    groups = [f"(?P<neg>{'|'.join(NEGATION_PATTERNS)})"]
+    groups += [f"(?P<t_{k}>{'|'.join(patterns)})" for k, patterns in TEMPORAL_PATTERNS.items()]
+    return re.compile("|".join(groups), re.IGNORECASE)
+
+
+TRIGGER_RE = _compile_triggers()
+TEMPORAL_PRIORITY = {k: i for i, k in enumerate(TEMPORAL_PATTERNS)}
+# NegEx-style scope: a trigger covers the next N tokens, cut short by a scope terminator.
+NEGATION_WINDOW_TOKENS = int(os.environ.get("MNC_NEGATION_WINDOW", "5"))
+TEMPORAL_WINDOW_TOKENS = int(os.environ.get("MNC_TEMPORAL_WINDOW", "6"))
+SCOPE_TERMINATOR_RE = re.compile(r"\b(?:but|however|although|though|except|aside from|apart from)\b|;", re.IGNORECASE)
+_TOKEN_RE = re.compile(r"\S+")
 
 
 def detect_negated(text: str) -> bool:
-    lowered = text.lower()
-    return any(re.search(p, lowered) for p in NEGATION_PATTERNS)
+    return any(m.lastgroup == "neg" for m in TRIGGER_RE.finditer(text))
 
 
 def detect_temporal(text: str) -> str | None:
-    lowered = text.lower()
-    for k, patterns in TEMPORAL_PATTERNS.items():
-        if any(re.search(p, lowered) for p in patterns):
-            return k
-    return None
+    found = [m.lastgroup[2:] for m in TRIGGER_RE.finditer(text) if m.lastgroup != "neg"]
+    return min(found, key=TEMPORAL_PRIORITY.__getitem__) if found else None
 
 
-def assemble_structured(entities: list[dict[str, Any]]) -> dict[str, Any]:
-    out: dict[str, Any] = {
-        "neuro_exam": "",
-        "imaging": [],
-        "vent": {"raw": []},
-        "hemodynamics": {"pressors": [], "map": None, "raw": []},
-        "labs": {"values": {}, "raw": []},
-        "medications": [],
-        "procedures": [],
-        "assessment": "",
-    }
-    lab_re = re.compile(r"([A-Za-z]+)\s*[:=]\s*([0-9.]+)")
-    map_re = re.compile(r"MAP\s*[:=]?\s*(\d+)", re.I)
+def _trigger_scopes(sentence: str, negation_window: int, temporal_window: int) -> list[tuple[int, int, str]]:
+    triggers = list(TRIGGER_RE.finditer(sentence))
+    if not triggers:
+        return []
+    token_starts, token_ends = [], []
+    for m in _TOKEN_RE.finditer(sentence):
+        token_starts.append(m.start())
+        token_ends.append(m.end())
+    terminators = [m.start() for m in SCOPE_TERMINATOR_RE.finditer(sentence)]
+    scopes = []
+    for m in triggers:
+        window = negation_window if m.lastgroup == "neg" else temporal_window
+        i = bisect_left(token_starts, m.end())
+        end = token_ends[min(i + window, len(token_ends)) - 1] if window > 0 and i < len(token_ends) else m.end()
+        t = bisect_left(terminators, m.end())
+        if t < len(terminators):
+            end = min(end, terminators[t])
+        scopes.append((m.start(), max(end, m.end()), m.lastgroup))
+    return scopes
+
+
+def assign_entity_context(
+    text: str,
+    sentences: list[dict[str, Any]],
+    entities: list[dict[str, Any]],
+    negation_window: int = NEGATION_WINDOW_TOKENS,
+    temporal_window: int = TEMPORAL_WINDOW_TOKENS,
+) -> list[dict[str, Any]]:
+    # Scans each sentence for triggers once and sets "negated"/"temporal" on every entity in it.
+    # Entities outside any sentence are scoped against their own text.
+    bounds = [(s["start_char"], s["end_char"]) for s in sentences]
+    starts = [b[0] for b in bounds]
+    scopes_by_sentence: dict[int, list[tuple[int, int, str]]] = {}
     for e in entities:
-        txt = e["text"]
-        label = e["label"]
-        if label == "NEURO_EXAM":
-            out["neuro_exam"] += (" " + txt).strip()
-        elif label == "IMAGING":
-            out["imaging"].append(txt)
-        elif label == "VENT":
-            out["vent"]["raw"].append(txt)
-        elif label == "HEMODYNAMICS":
-            out["hemodynamics"]["raw"].append(txt)
-            mm = map_re.search(txt)
+        i = bisect_right(starts, e["start_char"]) - 1
+        if i >= 0 and e["start_char"] < bounds[i][1]:
+            offset = bounds[i][0]
+            if i not in scopes_by_sentence:
+                scopes_by_sentence[i] = _trigger_scopes(text[offset:bounds[i][1]], negation_window, temporal_window)
+            scopes = scopes_by_sentence[i]
+        else:
+            offset = e["start_char"]
+            scopes = _trigger_scopes(e["text"], negation_window, temporal_window)
+        es, ee = e["start_char"] - offset, e["end_char"] - offset
+        hits = [kind for ss, se, kind in scopes if ss < ee and es < se]
+        e["negated"] = "neg" in hits
+        temporal = [k[2:] for k in hits if k != "neg"]
+        e["temporal"] = min(temporal, key=TEMPORAL_PRIORITY.__getitem__) if temporal else None
+    return entities
+
+
+LAB_RE = re.compile(r"([A-Za-z]+)\s*[:=]\s*([0-9.]+)")
+MAP_RE = re.compile(r"MAP\s*[:=]?\s*(\d+)", re.I)
+
+
+def assemble_structured(entities: list[dict[str, Any]]) -> dict[str, Any]:
+    return assemble_structured_many([entities])[0]
+
+
+def assemble_structured_many(entities_per_doc: Iterable[list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    # Setup is paid once per batch: the regex methods are bound here, and each document only
+    # groups its entity texts by label (one dict op per entity) before the output is built.
+    map_search = MAP_RE.search
+    lab_findall = LAB_RE.findall
+    results = []
+    for entities in entities_per_doc:
+        by_label: dict[str, list[str]] = {}
+        for e in entities:
+            texts = by_label.get(e["label"])
+            if texts is None:
+                by_label[e["label"]] = [e["text"]]
+            else:
+                texts.append(e["text"])
+        hemo_raw = by_label.get("HEMODYNAMICS", [])
+        bp = None
+        pressors = []
+        for txt in hemo_raw:
+            mm = map_search(txt)
             if mm:
-                out["hemodynamics"]["map"] = int(mm.group(1))
-            if "norepi" in txt.lower() or "vaso" in txt.lower():
-                out["hemodynamics"]["pressors"].append(txt)
-        elif label == "LAB":
-            out["labs"]["raw"].append(txt)
-            for m in lab_re.finditer(txt):
-                out["labs"]["values"][m.group(1)] = m.group(2)
-        elif label == "MEDICATION":
-            out["medications"].append(txt)
-        elif label == "PROCEDURE":
-            out["procedures"].append(txt)
-        elif label == "ASSESSMENT":
-            out["assessment"] += (" " + txt).strip()
-    return out
+                bp = int(mm.group(1))
+            lowered = txt.lower()
+            if "norepi" in lowered or "vaso" in lowered:
+                pressors.append(txt)
+        lab_raw = by_label.get("LAB", [])
+        results.append({
+            # Parts are concatenated without a separator, matching the historical `+=` output.
+            "neuro_exam": "".join([t.strip() for t in by_label.get("NEURO_EXAM", ())]),
+            "imaging": by_label.get("IMAGING", []),
+            "vent": {"raw": by_label.get("VENT", [])},
+            "hemodynamics": {"pressors": pressors, "map": bp, "raw": hemo_raw},
+            # NUL can't be matched by LAB_RE, so joining never creates matches across entities.
+            "labs": {"values": dict(lab_findall("\0".join(lab_raw))) if lab_raw else {}, "raw": lab_raw},
+            "medications": by_label.get("MEDICATION", []),
+            "procedures": by_label.get("PROCEDURE", []),
+            "assessment": "".join([t.strip() for t in by_label.get("ASSESSMENT", ())]),
+        })
+    return results
 
 
 def group_spans_by_note(spans: list[dict[str, Any]]) -> dict[str, list[tuple[int, int, str]]]:
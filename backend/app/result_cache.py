@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from .database import connect, now_iso
+
+RESULT_CACHE_MB = float(os.environ.get("MNC_RESULT_CACHE_MB", "64"))
+# Empty disables the on-disk tier; otherwise a SQLite file separate from the main DB,
+# so cache writes never contend with labeling and training on the main writer lock.
+RESULT_CACHE_DB = os.environ.get("MNC_RESULT_CACHE_DB", "")
+RESULT_CACHE_DISK_ROWS = int(os.environ.get("MNC_RESULT_CACHE_DISK_ROWS", "100000"))
+_PRUNE_EVERY = 256
+
+
+def cache_key(text: str, model_version_id: str | None) -> str:
+    # Only trailing whitespace is normalized away: anything earlier in the text would move
+    # the cached sentence/entity offsets.
+    h = hashlib.sha256(text.rstrip().encode("utf-8")).hexdigest()
+    return f"{model_version_id or '-'}:{h}"
+
+
+class ResultCache:
+    def __init__(
+        self,
+        max_bytes: int = int(RESULT_CACHE_MB * 1024 * 1024),
+        disk_path: str | Path | None = RESULT_CACHE_DB or None,
+        disk_rows: int = RESULT_CACHE_DISK_ROWS,
+    ):
+        self.max_bytes = max_bytes
+        self.disk_rows = disk_rows
+        self._mem: "OrderedDict[str, str]" = OrderedDict()
+        self._mem_bytes = 0
+        self._lock = threading.Lock()
+        self._disk: sqlite3.Connection | None = None
+        self._disk_lock = threading.Lock()
+        self._disk_puts = 0
+        if disk_path:
+            self._disk = connect(disk_path)
+            self._disk.execute("CREATE TABLE IF NOT EXISTS result_cache (key TEXT PRIMARY KEY, payload TEXT NOT NULL, created_at TEXT NOT NULL)")
+            self._disk.execute("CREATE INDEX IF NOT EXISTS idx_result_cache_created_at ON result_cache(created_at)")
+            self._disk.commit()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            payload = self._mem.get(key)
+            if payload is not None:
+                self._mem.move_to_end(key)
+                self._stats["memory_hits"] += 1
+        if payload is None and self._disk is not None:
+            with self._disk_lock:
+                row = self._disk.execute("SELECT payload FROM result_cache WHERE key=?", (key,)).fetchone()
+            if row is not None:
+                payload = row[0]
+                self._remember(key, payload)
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+        if payload is None:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        # Entries are stored serialized, so every hit hands out fresh objects.
+        return json.loads(payload)
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        payload = json.dumps(value)
+        self._remember(key, payload)
+        if self._disk is not None:
+            with self._disk_lock:
+                with self._disk:
+                    self._disk.execute(
+                        "INSERT OR REPLACE INTO result_cache (key, payload, created_at) VALUES (?, ?, ?)",
+                        (key, payload, now_iso()),
+                    )
+                self._disk_puts += 1
+                if self._disk_puts % _PRUNE_EVERY == 0:
+                    with self._disk:
+                        self._disk.execute(
+                            "DELETE FROM result_cache WHERE key IN (SELECT key FROM result_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                            (self.disk_rows,),
+                        )
+
+    def _remember(self, key: str, payload: str) -> None:
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._mem.pop(key, None)
+            if old is not None:
+                self._mem_bytes -= len(old)
+            self._mem[key] = payload
+            self._mem_bytes += size
+            while self._mem_bytes > self.max_bytes:
+                _, evicted = self._mem.popitem(last=False)
+                self._mem_bytes -= len(evicted)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._mem_bytes = 0
+        if self._disk is not None:
+            with self._disk_lock:
+                with self._disk:
+                    self._disk.execute("DELETE FROM result_cache")
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            lookups = hits + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": hits / lookups if lookups else None,
+                "entries": len(self._mem),
+                "bytes": self._mem_bytes,
+                "max_bytes": self.max_bytes,
+                "disk_enabled": self._disk is not None,
+            }
+
+
+result_cache = ResultCache()
@@ -0,0 +1,133 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any
+
+from .database import db
+
+logger = logging.getLogger(__name__)
+
+# sync: commit before returning; async: queue and flush in the background; off: don't persist.
+RUN_DURABILITY = os.environ.get("MNC_RUN_DURABILITY", "async")
+RUN_QUEUE_SIZE = int(os.environ.get("MNC_RUN_QUEUE_SIZE", "10000"))
+RUN_FLUSH_ROWS = int(os.environ.get("MNC_RUN_FLUSH_ROWS", "200"))
+RUN_FLUSH_INTERVAL = float(os.environ.get("MNC_RUN_FLUSH_INTERVAL", "0.5"))
+
+_STOP = object()
+
+
+def insert_runs(rows: list[tuple]) -> None:
+    with db() as conn:
+        conn.executemany(
+            "INSERT INTO inference_runs (id, created_at, model_version_id, input_text, cleaned_text, output_json, confidence_json) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+
+class RunWriter:
+    def __init__(
+        self,
+        mode: str = RUN_DURABILITY,
+        max_queue: int = RUN_QUEUE_SIZE,
+        flush_rows: int = RUN_FLUSH_ROWS,
+        flush_interval: float = RUN_FLUSH_INTERVAL,
+    ):
+        if mode not in ("sync", "async", "off"):
+            raise ValueError(f"Unknown durability mode: {mode}")
+        self.mode = mode
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stats = {"written": 0, "flushes": 0, "overflow_sync_writes": 0, "dropped": 0, "errors": 0}
+
+    def write(self, rows: list[tuple]) -> None:
+        if self.mode == "off":
+            self._count("dropped", len(rows))
+            return
+        if self.mode == "sync":
+            insert_runs(rows)
+            self._count("written", len(rows))
+            return
+        self._ensure_started()
+        for row in rows:
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                # Backpressure: a full queue degrades to a synchronous write rather than losing the run.
+                insert_runs([row])
+                self._count("overflow_sync_writes", 1)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        return {**stats, "mode": self.mode, "queued": self._queue.qsize()}
+
+    def _count(self, key: str, n: int) -> None:
+        # Request threads and the writer thread both update the counters.
+        with self._lock:
+            self._stats[key] += n
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="mnc-run-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: list[tuple] = []
+            waiters: list[threading.Event] = []
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or waiters or len(batch) >= self.flush_rows:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    insert_runs(batch)
+                    self._count("written", len(batch))
+                    self._count("flushes", 1)
+                except Exception:
+                    self._count("errors", 1)
+                    logger.exception("Failed to persist %d inference runs", len(batch))
+            for w in waiters:
+                w.set()
+            if stop:
+                return
+
+
+run_writer = RunWriter()
+atexit.register(run_writer.close)
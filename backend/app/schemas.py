@@ -1,5 +1,7 @@
-from pydantic import BaseModel, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal, Optional
+
+MAX_BATCH_TEXTS = 100
 
 
 class NoteCreate(BaseModel):
@@ -13,6 +15,10 @@ class InferRequest(BaseModel):
     keep_threshold: float = 0.5
 
 
+class RecleanRequest(BaseModel):
+    keep_threshold: float = 0.5
+
+
 class FeedbackRequest(BaseModel):
     note_id: str
     sentence_id: str
@@ -25,6 +31,7 @@ class TrainRequest(BaseModel):
     lr: float = 0.001
     dropout: float = 0.2
     batch_size: int = 32
+    sentence_model: Optional[Literal["tfidf", "hashing"]] = None
 
 
 class SpanCreate(BaseModel):
@@ -41,6 +48,14 @@ class SentenceLabelIn(BaseModel):
 
 
 class BatchInferRequest(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    texts: List[str] = Field(max_length=MAX_BATCH_TEXTS)
+    model_version_id: Optional[str] = None
+    keep_threshold: float = 0.5
+
+
+# Streamed batches hold at most a few chunks in memory, so they are not capped.
+class StreamBatchInferRequest(BaseModel):
     model_config = ConfigDict(protected_namespaces=())
     texts: List[str]
     model_version_id: Optional[str] = None
@@ -49,3 +64,11 @@ class BatchInferRequest(BaseModel):
 
 class LabelRequest(BaseModel):
     label: str
+
+
+class InferenceJobCreate(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    texts: List[str] = Field(min_length=1)
+    model_version_id: Optional[str] = None
+    keep_threshold: float = 0.5
+    chunk_size: int = Field(64, ge=1, le=1000)
@@ -0,0 +1,27 @@
+import json
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .sentence_scorer import SentenceScorer, export_sentence_model
+
+ARTIFACT_FORMAT = "mnc-sentence-v2"
+
+
+def save_sentence_artifact(model: dict[str, Any], path: Path) -> None:
+    meta, arrays = export_sentence_model(model)
+    path.mkdir(parents=True, exist_ok=True)
+    for name, arr in arrays.items():
+        np.save(path / f"{name}.npy", arr)
+    (path / "meta.json").write_text(json.dumps({"format": ARTIFACT_FORMAT, **meta, "arrays": sorted(arrays)}))
+
+
+def load_sentence_artifact(path: Path) -> SentenceScorer:
+    # Memory-mapped read-only, so every worker process shares the same pages.
+    meta = json.loads((path / "meta.json").read_text())
+    if meta.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"Unsupported sentence model format: {meta.get('format')}")
+    meta["params"]["ngram_range"] = tuple(meta["params"]["ngram_range"])
+    arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in meta["arrays"]}
+    return SentenceScorer(meta, arrays)
@@ -0,0 +1,154 @@
+from typing import Any
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.special import expit
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.utils import murmurhash3_32
+
+TEXT_PARAMS = ("lowercase", "ngram_range", "token_pattern", "strip_accents", "stop_words", "binary", "norm")
+# Bytes of each term kept in the fixed-width prefix table; the full terms live in one
+# variable-length blob, so one very long token doesn't widen every entry.
+VOCAB_PREFIX = 16
+
+
+class SentenceScorer:
+    # The sentence classifier reduced to what scoring needs: the vectorizer's analyzer, a
+    # sorted UTF-8 term blob with offsets (or the hashing trick), idf, coef and intercept. A batch is one
+    # CSR build and one matrix-vector product, without sklearn's per-call input validation.
+    def __init__(self, meta: dict[str, Any], arrays: dict[str, np.ndarray]):
+        params = meta["params"]
+        self.kind = meta["kind"]
+        self.binary = params["binary"]
+        self.norm = params["norm"]
+        self.sublinear_tf = meta.get("sublinear_tf", False)
+        self.n_features = meta.get("n_features", 0)
+        self.alternate_sign = meta.get("alternate_sign", False)
+        self.intercept = float(meta["intercept"])
+        self.vocab_blob = arrays.get("vocab_blob")
+        self.vocab_offsets = arrays.get("vocab_offsets")
+        self.vocab_prefix = arrays.get("vocab_prefix")
+        self.idf = arrays.get("idf")
+        self.coef = arrays["coef"]
+        self.n_cols = self.n_features if self.kind == "hashing" else len(self.vocab_offsets) - 1
+        self._analyze = TfidfVectorizer(**{k: params[k] for k in TEXT_PARAMS}).build_analyzer()
+
+    @classmethod
+    def from_sklearn(cls, model: dict[str, Any]) -> "SentenceScorer":
+        return cls(*export_sentence_model(model))
+
+    def _columns(self, terms: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self.kind == "hashing":
+            # Same bucket and sign as sklearn's FeatureHasher.
+            h = np.array([murmurhash3_32(t, 0) for t in terms], dtype=np.int64)
+            cols = np.where(h == -(2 ** 31), 2 ** 31 - 1 - (self.n_features - 1), np.abs(h)) % self.n_features
+            values = np.where(h < 0, -1.0, 1.0) if self.alternate_sign else np.ones(len(h))
+            return cols, values, np.ones(len(h), dtype=bool)
+        encoded = [t.encode("utf-8") for t in terms]
+        if not encoded or not self.n_cols:
+            return np.zeros(len(encoded), dtype=np.int64), np.ones(len(encoded)), np.zeros(len(encoded), dtype=bool)
+        # One byte wider than the longest query, so a longer term never compares equal to it.
+        width = max(map(len, encoded)) + 1
+        query = np.array(encoded, dtype=f"S{width}")
+        # A query shorter than the prefix table's width matches only an entry equal to it. A
+        # term absent from the table lands on a neighbour (or past the end); the check drops it.
+        prefix = query.astype(self.vocab_prefix.dtype)
+        lo = np.searchsorted(self.vocab_prefix, prefix)
+        cols = np.minimum(lo, self.n_cols - 1)
+        found = self.vocab_prefix[cols] == prefix
+        if width > VOCAB_PREFIX:
+            # Longer queries share their prefix with a run of terms; a binary search over the
+            # full terms in the blob finds the first one in the run not below the query.
+            long = np.flatnonzero(np.char.str_len(query) >= VOCAB_PREFIX)
+            lo_long = lo[long]
+            end = np.searchsorted(self.vocab_prefix, prefix[long], "right")
+            hi = end.copy()
+            searching = np.flatnonzero(lo_long < hi)
+            while len(searching):
+                mid = (lo_long[searching] + hi[searching]) // 2
+                below = self._terms(mid, width) < query[long[searching]]
+                lo_long[searching[below]] = mid[below] + 1
+                hi[searching[~below]] = mid[~below]
+                searching = searching[lo_long[searching] < hi[searching]]
+            cols[long] = np.minimum(lo_long, self.n_cols - 1)
+            found[long] = (lo_long < end) & (self._terms(cols[long], width) == query[long])
+        return cols, np.ones(len(cols)), found
+
+    def _terms(self, cols: np.ndarray, width: int) -> np.ndarray:
+        # The first `width` bytes of each term, as a fixed-width array comparable with the query.
+        idx = self.vocab_offsets[cols][:, None] + np.arange(width)
+        out = self.vocab_blob[np.minimum(idx, len(self.vocab_blob) - 1)]
+        out[idx >= self.vocab_offsets[cols + 1][:, None]] = 0
+        return out.view(f"S{width}").ravel()
+
+    def _csr(self, texts: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Builds the CSR arrays with numpy directly; scipy's COO -> CSR conversion costs more
+        # than the whole rest of scoring for a short note.
+        analyzed = [self._analyze(text) for text in texts]
+        cols, values, found = self._columns([t for doc in analyzed for t in doc])
+        rows = np.repeat(np.arange(len(texts)), [len(doc) for doc in analyzed])[found]
+        keys, inverse = np.unique(rows * self.n_cols + cols[found], return_inverse=True)
+        # bincount returns int64 for an empty batch of terms, which the in-place float ops below reject.
+        data = np.bincount(inverse, values[found], minlength=len(keys)).astype(np.float64, copy=False)
+        row_of = keys // self.n_cols
+        indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(row_of, minlength=len(texts)), out=indptr[1:])
+        if self.binary:
+            data[:] = 1.0
+        if self.sublinear_tf:
+            np.log(data, data)
+            data += 1
+        indices = keys % self.n_cols
+        if self.idf is not None:
+            data *= self.idf[indices]
+        if self.norm:
+            mass = np.abs(data) if self.norm == "l1" else data ** 2
+            norms = np.bincount(row_of, mass, minlength=len(texts))
+            if self.norm == "l2":
+                norms = np.sqrt(norms)
+            norms[norms == 0] = 1.0
+            data /= norms[row_of]
+        return data, indices, indptr
+
+    def transform(self, texts: list[str]) -> sp.csr_matrix:
+        return sp.csr_matrix(self._csr(texts), shape=(len(texts), self.n_cols))
+
+    def keep_probs(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.empty(0)
+        data, indices, indptr = self._csr(texts)
+        # The CSR matrix-vector product, row sums taken with bincount over the row of each entry.
+        row_of = np.repeat(np.arange(len(texts)), np.diff(indptr))
+        return expit(np.bincount(row_of, data * self.coef[indices], minlength=len(texts)) + self.intercept)
+
+
+def export_sentence_model(model: dict[str, Any]) -> tuple[dict[str, Any], dict[str, np.ndarray]]:
+    vec, clf = model["vectorizer"], model["classifier"]
+    if vec.analyzer != "word" or vec.tokenizer is not None or vec.preprocessor is not None:
+        raise ValueError("Only word analyzers with the default tokenizer can be exported")
+    if list(clf.classes_) != [0, 1]:
+        raise ValueError("Only binary KEEP/DROP classifiers can be exported")
+    meta: dict[str, Any] = {"params": {k: vec.get_params()[k] for k in TEXT_PARAMS}, "intercept": float(clf.intercept_[0])}
+    coef = np.asarray(clf.coef_[0], dtype=np.float64)
+    if isinstance(vec, HashingVectorizer):
+        meta.update(kind="hashing", n_features=vec.n_features, alternate_sign=vec.alternate_sign)
+        return meta, {"coef": coef}
+    # Columns are reordered to the byte order of the UTF-8 terms, which is what the lookup needs.
+    terms = sorted((t.encode("utf-8"), i) for t, i in vec.vocabulary_.items())
+    order = np.array([i for _, i in terms], dtype=np.int64)
+    arrays = {**_pack_vocab([t for t, _ in terms]), "coef": coef[order]}
+    if vec.use_idf:
+        arrays["idf"] = np.asarray(vec.idf_, dtype=np.float64)[order]
+    meta.update(kind="tfidf", sublinear_tf=vec.sublinear_tf)
+    return meta, arrays
+
+
+def _pack_vocab(terms: list[bytes]) -> dict[str, np.ndarray]:
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum([len(t) for t in terms], out=offsets[1:])
+    return {
+        "vocab_blob": np.frombuffer(b"".join(terms), dtype=np.uint8),
+        "vocab_offsets": offsets,
+        "vocab_prefix": np.array([t[:VOCAB_PREFIX] for t in terms], dtype=f"S{VOCAB_PREFIX}"),
+    }
+
@@ -1,114 +1,276 @@
 import json
-import pickle
+import os
+import random
+import shutil
+import zlib
+from itertools import islice
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
 import spacy
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score, f1_score, precision_recall_fscore_support
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import accuracy_score, f1_score
 from sklearn.model_selection import train_test_split
 from spacy.training import Example
+from spacy.util import compounding, minibatch
 
-from .database import db, new_id, now_iso, row_to_dict
-from .nlp import group_spans_by_note
+from . import database
+from .database import db, new_id, now_iso
+from .evaluation import Note, evaluate_ner
+from .model_registry import model_registry
+from .sentence_artifact import save_sentence_artifact
+from .training_data import TRAIN_CHUNK, iter_annotated_notes, iter_labeled_sentences, iter_ner_examples, ner_labels
+from .training_jobs import STAGING_PREFIX, check_cancelled, complete_training_job, report_progress
 
-MODEL_DIR = Path(__file__).resolve().parents[1] / "models"
-MODEL_DIR.mkdir(exist_ok=True)
+NER_DEV_FRACTION = float(os.environ.get("MNC_NER_DEV_FRACTION", "0.2"))
+NER_DEV_MAX = int(os.environ.get("MNC_NER_DEV_MAX", "500"))
+NER_SHUFFLE_BUFFER = int(os.environ.get("MNC_NER_SHUFFLE_BUFFER", "1000"))
+# Early stopping: evaluate on the dev notes every NER_EVAL_EVERY updates and stop after
+# NER_PATIENCE evaluations without a better entity F1.
+NER_EVAL_EVERY = int(os.environ.get("MNC_NER_EVAL_EVERY", "20"))
+NER_PATIENCE = int(os.environ.get("MNC_NER_PATIENCE", "5"))
+# tfidf fits TfidfVectorizer + LogisticRegression in memory; hashing streams the labels
+# through HashingVectorizer + SGDClassifier.partial_fit, so memory doesn't grow with the corpus.
+SENTENCE_MODEL = os.environ.get("MNC_SENTENCE_MODEL", "tfidf")
+SGD_EPOCHS = int(os.environ.get("MNC_SGD_EPOCHS", "5"))
+SGD_SHUFFLE_BUFFER = int(os.environ.get("MNC_SGD_SHUFFLE_BUFFER", "10000"))
+SENTENCE_VAL_EVERY = 5
+TRAIN_SEED = 42
 
-_training_progress: dict = {"status": "idle", "progress": 0, "metrics": None}
 
+def _shuffled(items: Iterable, buffer_size: int, rng: random.Random) -> Iterator:
+    buf = []
+    for item in items:
+        buf.append(item)
+        if len(buf) >= buffer_size:
+            i = rng.randrange(len(buf))
+            buf[i], buf[-1] = buf[-1], buf[i]
+            yield buf.pop()
+    rng.shuffle(buf)
+    yield from buf
 
-def get_training_progress() -> dict:
-    return _training_progress
 
+def _train_sentence_tfidf(max_steps: int) -> tuple[dict, dict]:
+    # TfidfVectorizer and LogisticRegression fit in memory, so this path loads every labeled sentence.
+    rows = [r for chunk in iter_labeled_sentences() for r in chunk]
+    texts = [t for t, _, _ in rows]
+    y = [label for _, label, _ in rows]
+    if len(texts) < 4:
+        raise ValueError("Not enough sentence labels to train")
+    X_train, X_val, y_train, y_val = train_test_split(texts, y, test_size=0.2, random_state=42, stratify=y)
+    vec = TfidfVectorizer(ngram_range=(1, 2), min_df=1)
+    Xtr = vec.fit_transform(X_train)
+    Xv = vec.transform(X_val)
+    clf = LogisticRegression(max_iter=max_steps)
+    clf.fit(Xtr, y_train)
+    pred = clf.predict(Xv)
+    return {"vectorizer": vec, "classifier": clf}, {"accuracy": float(accuracy_score(y_val, pred)), "f1": float(f1_score(y_val, pred))}
 
-def train_all(max_steps: int = 200, lr: float = 0.001, base_model: str = "en") -> dict:
-    global _training_progress
-    _training_progress = {"status": "training", "progress": 0, "metrics": None}
-    try:
-        with db() as conn:
-            sent_rows = [row_to_dict(r) for r in conn.execute(
-                "SELECT s.text, sl.label FROM sentence_labels sl JOIN sentences s ON s.id=sl.sentence_id"
-            ).fetchall()]
-            note_rows = [row_to_dict(r) for r in conn.execute("SELECT id, raw_text FROM notes").fetchall()]
-            span_rows = [row_to_dict(r) for r in conn.execute("SELECT note_id,start_char,end_char,label FROM span_annotations").fetchall()]
-
-        _training_progress["progress"] = 20
-
-        texts = [r["text"] for r in sent_rows]
-        y = [1 if r["label"] == "KEEP" else 0 for r in sent_rows]
-        if len(texts) < 4:
-            raise ValueError("Not enough sentence labels to train")
-        X_train, X_val, y_train, y_val = train_test_split(texts, y, test_size=0.2, random_state=42, stratify=y)
-        vec = TfidfVectorizer(ngram_range=(1, 2), min_df=1)
-        Xtr = vec.fit_transform(X_train)
-        Xv = vec.transform(X_val)
-        clf = LogisticRegression(max_iter=max_steps)
-        clf.fit(Xtr, y_train)
-        pred = clf.predict(Xv)
-
-        acc = accuracy_score(y_val, pred)
-        f1 = f1_score(y_val, pred)
-
-        _training_progress["progress"] = 50
-
-        nlp = spacy.blank("en") if base_model == "en" else spacy.blank("en")
-        ner = nlp.add_pipe("ner")
-        grouped = group_spans_by_note(span_rows)
-        train_examples = []
-        for n in note_rows:
-            ents = grouped.get(n["id"], [])
-            if not ents:
-                continue
-            for _, _, lbl in ents:
-                ner.add_label(lbl)
-            train_examples.append((n["raw_text"], {"entities": ents}))
-
-        examples = []
-        for txt, ann in train_examples:
-            doc = nlp.make_doc(txt)
-            examples.append(Example.from_dict(doc, ann))
-        if examples:
-            optimizer = nlp.begin_training()
-            for step in range(min(max_steps, 30)):
-                nlp.update(examples, sgd=optimizer, losses={})
-                _training_progress["progress"] = 50 + int((step / min(max_steps, 30)) * 40)
-
-        _training_progress["progress"] = 90
-
-        model_id = new_id()
-        sent_path = MODEL_DIR / f"sentence_{model_id}.pkl"
-        ner_path = MODEL_DIR / f"spacy_{model_id}"
-        with open(sent_path, "wb") as f:
-            pickle.dump({"vectorizer": vec, "classifier": clf}, f)
+
+def _is_sentence_val(note_id: str) -> bool:
+    # Held out by note, so one note's sentences never land on both sides and adding labels doesn't move the split.
+    return zlib.crc32(note_id.encode()) % SENTENCE_VAL_EVERY == 0
+
+
+def _sentence_rows(val: bool) -> Iterator[tuple[str, int]]:
+    return ((t, label) for chunk in iter_labeled_sentences() for t, label, note_id in chunk if _is_sentence_val(note_id) == val)
+
+
+def _train_sentence_hashing(epochs: int = SGD_EPOCHS, job_id: str | None = None) -> tuple[dict, dict]:
+    vec = HashingVectorizer(ngram_range=(1, 2), alternate_sign=False, n_features=2 ** 20)
+    clf = SGDClassifier(loss="log_loss", random_state=TRAIN_SEED)
+    rng = random.Random(TRAIN_SEED)
+    trained = 0
+    for _ in range(epochs):
+        trained = 0
+        # The cursor comes back in sentence-id order; each epoch reshuffles it through a bounded buffer.
+        for batch in minibatch(_shuffled(_sentence_rows(False), SGD_SHUFFLE_BUFFER, rng), size=TRAIN_CHUNK):
+            check_cancelled(job_id)
+            clf.partial_fit(vec.transform([t for t, _ in batch]), [label for _, label in batch], classes=[0, 1])
+            trained += len(batch)
+    if trained < 4:
+        raise ValueError("Not enough sentence labels to train")
+    tp = fp = fn = tn = 0
+    for batch in minibatch(_sentence_rows(True), size=TRAIN_CHUNK):
+        for (_, label), p in zip(batch, clf.predict(vec.transform([t for t, _ in batch]))):
+            tp += label == 1 and p == 1
+            fp += label == 0 and p == 1
+            fn += label == 1 and p == 0
+            tn += label == 0 and p == 0
+    total = tp + fp + fn + tn
+    metrics = {
+        "accuracy": float((tp + tn) / total) if total else 0.0,
+        "f1": float(2 * tp / (2 * tp + fp + fn)) if tp else 0.0,
+    }
+    return {"vectorizer": vec, "classifier": clf}, metrics
+
+
+def _train_ner(
+    nlp,
+    examples: Callable[[], Iterable[Example]],
+    max_steps: int,
+    lr: float,
+    dropout: float,
+    batch_size: int,
+    ner_path: Path,
+    job_id: str | None = None,
+) -> tuple[dict, list[Note]]:
+    # examples() is re-read every epoch. Only the dev set (at most NER_DEV_MAX notes) and a
+    # NER_SHUFFLE_BUFFER window are held in memory, whatever the corpus size.
+    rng = random.Random(TRAIN_SEED)
+    dev_every = round(1 / NER_DEV_FRACTION) if NER_DEV_FRACTION > 0 else 0
+    dev = []
+    total = 0
+    for i, ex in enumerate(examples()):
+        total += 1
+        if dev_every and i % dev_every == 0 and len(dev) < NER_DEV_MAX:
+            dev.append(ex)
+    if total < 5:
+        dev_every, dev = 0, []
+
+    def is_dev(i: int) -> bool:
+        return bool(dev_every) and i % dev_every == 0 and i // dev_every < NER_DEV_MAX
+
+    def train_stream() -> Iterator[Example]:
+        return (ex for i, ex in enumerate(examples()) if not is_dev(i))
+
+    optimizer = nlp.initialize(lambda: islice(train_stream(), 100))
+    optimizer.learn_rate = lr
+    best = {"ents_f": -1.0, "step": 0}
+    evals_since_best = 0
+    step = 0
+    epoch = 0
+    while step < max_steps and evals_since_best < NER_PATIENCE:
+        check_cancelled(job_id)
+        epoch += 1
+        # Batches grow from 4 up to batch_size, so early updates are frequent and later ones stable.
+        for batch in minibatch(_shuffled(train_stream(), NER_SHUFFLE_BUFFER, rng), size=compounding(4.0, max(4, batch_size), 1.001)):
+            losses: dict = {}
+            nlp.update(batch, drop=dropout, sgd=optimizer, losses=losses)
+            step += 1
+            report_progress(job_id, 50 + int(step / max_steps * 40), "ner", losses.get("ner"))
+            if dev and step % NER_EVAL_EVERY == 0:
+                scores = nlp.evaluate(dev)
+                if (scores["ents_f"] or 0.0) > best["ents_f"]:
+                    best = {"ents_f": scores["ents_f"] or 0.0, "ents_p": scores["ents_p"] or 0.0, "ents_r": scores["ents_r"] or 0.0, "step": step}
+                    evals_since_best = 0
+                    nlp.to_disk(ner_path)
+                else:
+                    evals_since_best += 1
+            if step >= max_steps or evals_since_best >= NER_PATIENCE:
+                break
+        if step == 0:
+            break
+    if dev:
+        scores = nlp.evaluate(dev)
+        if (scores["ents_f"] or 0.0) > best["ents_f"]:
+            best = {"ents_f": scores["ents_f"] or 0.0, "ents_p": scores["ents_p"] or 0.0, "ents_r": scores["ents_r"] or 0.0, "step": step}
+            nlp.to_disk(ner_path)
+    else:
         nlp.to_disk(ner_path)
+    summary = {
+        "steps": step,
+        "epochs": epoch,
+        "train_examples": total - len(dev),
+        "dev_examples": len(dev),
+        "early_stopped": evals_since_best >= NER_PATIENCE,
+        "best": best if dev else None,
+    }
+    held_out = [(ex.reference.text, [(e.start_char, e.end_char, e.label_) for e in ex.reference.ents]) for ex in dev]
+    return summary, held_out
 
-        ner_metrics: dict = {"per_label": {}}
-        if examples:
-            gold = []
-            pred_labels = []
-            for txt, ann in train_examples:
-                d = nlp(txt)
-                gold.extend([e[2] for e in ann["entities"]])
-                pred_labels.extend([e.label_ for e in d.ents])
-            labels = sorted(list(set(gold) | set(pred_labels)))
-            p, r, f_score, _ = precision_recall_fscore_support(gold, pred_labels[:len(gold)] if pred_labels else ["OTHER"] * len(gold), labels=labels, average=None, zero_division=0)
-            ner_metrics["per_label"] = {labels[i]: {"precision": float(p[i]), "recall": float(r[i]), "f1": float(f_score[i])} for i in range(len(labels))}
-
-        metrics = {
-            "sentence": {"accuracy": float(acc), "f1": float(f1)},
-            "ner": ner_metrics,
-        }
 
+def _train_version(
+    version_dir: Path,
+    sent_model: dict,
+    sentence_metrics: dict,
+    max_steps: int,
+    lr: float,
+    dropout: float,
+    batch_size: int,
+    job_id: str | None,
+) -> dict:
+    nlp = spacy.blank("en")
+    ner = nlp.add_pipe("ner")
+    labels = ner_labels()
+    for lbl in labels:
+        ner.add_label(lbl)
+
+    version_dir.mkdir(parents=True)
+    ner_path = version_dir / "spacy"
+    ner_training = None
+    held_out: list[Note] = []
+    if labels:
+        ner_training, held_out = _train_ner(nlp, lambda: iter_ner_examples(nlp), max_steps, lr, dropout, batch_size, ner_path, job_id)
+    else:
+        nlp.to_disk(ner_path)
+
+    report_progress(job_id, 90, "saving")
+
+    save_sentence_artifact(sent_model, version_dir / "sentence")
+
+    ner_metrics: dict = {"per_label": {}, "training": ner_training}
+    if labels:
+        report_progress(job_id, 92, "evaluating")
+        # Scored on the notes early stopping held out; only a corpus too small to split is scored on what it trained on.
+        notes = held_out or list(iter_annotated_notes())
+        ner_metrics.update(evaluate_ner(str(ner_path), notes))
+        ner_metrics["held_out"] = bool(held_out)
+
+    return {
+        "sentence": sentence_metrics,
+        "ner": ner_metrics,
+    }
+
+
+def train_all(
+    max_steps: int = 200,
+    lr: float = 0.001,
+    base_model: str = "en",
+    dropout: float = 0.2,
+    batch_size: int = 32,
+    job_id: str | None = None,
+    sentence_model: str | None = None,
+) -> dict:
+    sentence_model = sentence_model or SENTENCE_MODEL
+    report_progress(job_id, 10, "sentence_model")
+    if sentence_model == "hashing":
+        sent_model, sentence_metrics = _train_sentence_hashing(job_id=job_id)
+    elif sentence_model == "tfidf":
+        sent_model, sentence_metrics = _train_sentence_tfidf(max_steps)
+    else:
+        raise ValueError(f"Unknown sentence model: {sentence_model}")
+
+    report_progress(job_id, 50, "ner")
+
+    model_dir = database.MODEL_DIR
+    model_dir.mkdir(parents=True, exist_ok=True)
+    model_id = new_id()
+    # Everything is written under a staging directory that is renamed to the version directory
+    # only once training and evaluation succeed; a cancelled or failed run removes it.
+    staging = model_dir / f"{STAGING_PREFIX}{model_id}"
+    version_dir = model_dir / model_id
+    try:
+        metrics = _train_version(staging, sent_model, sentence_metrics, max_steps, lr, dropout, batch_size, job_id)
+        check_cancelled(job_id)
+        staging.rename(version_dir)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    config = {"max_steps": max_steps, "lr": lr, "base_model": base_model, "dropout": dropout, "batch_size": batch_size, "sentence_model": sentence_model}
+    try:
         with db() as conn:
             conn.execute(
                 "INSERT INTO model_versions (id, created_at, spacy_model_path, sentence_model_path, metrics_json, training_config_json) VALUES (?, ?, ?, ?, ?, ?)",
-                (model_id, now_iso(), str(ner_path), str(sent_path), json.dumps(metrics), json.dumps({"max_steps": max_steps, "lr": lr, "base_model": base_model})),
+                (model_id, now_iso(), str(version_dir / "spacy"), str(version_dir / "sentence"), json.dumps(metrics), json.dumps(config)),
             )
-
-        _training_progress = {"status": "complete", "progress": 100, "metrics": metrics}
-        return {"model_version_id": model_id, "metrics": metrics}
-
-    except Exception as e:
-        _training_progress = {"status": "error", "progress": 0, "metrics": None, "error": str(e)}
+            # Same transaction: a run cancelled at the last moment leaves no model_versions row.
+            complete_training_job(conn, job_id, model_id, metrics)
+    except BaseException:
+        shutil.rmtree(version_dir, ignore_errors=True)
         raise
+    model_registry.invalidate()
+
+    return {"model_version_id": model_id, "metrics": metrics}
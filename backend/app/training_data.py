@@ -0,0 +1,55 @@
+import os
+from itertools import groupby
+from typing import Any, Iterator
+
+from spacy.training import Example
+
+from .database import connect
+
+TRAIN_CHUNK = int(os.environ.get("MNC_TRAIN_CHUNK", "500"))
+
+
+def iter_labeled_sentences(chunk_size: int = TRAIN_CHUNK) -> Iterator[list[tuple[str, int, str]]]:
+    # A dedicated connection, so a long training pass doesn't hold a pooled connection's snapshot.
+    # Ordered by sentence id, which ux_sentence_labels_sentence_id already yields, so every pass
+    # sees the same sequence without a sort.
+    conn = connect()
+    try:
+        cur = conn.execute(
+            "SELECT s.text, sl.label, s.note_id FROM sentence_labels sl CROSS JOIN sentences s ON s.id=sl.sentence_id ORDER BY sl.sentence_id"
+        )
+        while rows := cur.fetchmany(chunk_size):
+            yield [(r[0], 1 if r[1] == "KEEP" else 0, r[2]) for r in rows]
+    finally:
+        conn.close()
+
+
+def ner_labels() -> list[str]:
+    conn = connect()
+    try:
+        return [r[0] for r in conn.execute("SELECT DISTINCT label FROM span_annotations ORDER BY label")]
+    finally:
+        conn.close()
+
+
+def iter_annotated_notes(chunk_size: int = TRAIN_CHUNK) -> Iterator[tuple[str, list[tuple[int, int, str]]]]:
+    conn = connect()
+    try:
+        spans = conn.execute("SELECT note_id, start_char, end_char, label FROM span_annotations ORDER BY note_id")
+        by_note = ((note_id, [(r[1], r[2], r[3]) for r in rows]) for note_id, rows in groupby(spans, key=lambda r: r[0]))
+        while True:
+            chunk = [g for _, g in zip(range(chunk_size), by_note)]
+            if not chunk:
+                return
+            marks = ",".join("?" * len(chunk))
+            texts = dict(conn.execute(f"SELECT id, raw_text FROM notes WHERE id IN ({marks})", [n for n, _ in chunk]).fetchall())
+            for note_id, ents in chunk:
+                if note_id in texts:
+                    yield texts[note_id], ents
+    finally:
+        conn.close()
+
+
+def iter_ner_examples(nlp: Any, chunk_size: int = TRAIN_CHUNK) -> Iterator[Example]:
+    for text, ents in iter_annotated_notes(chunk_size):
+        yield Example.from_dict(nlp.make_doc(text), {"entities": ents})
@@ -0,0 +1,261 @@
+import atexit
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from . import database
+from .database import db, new_id, now_iso
+from .model_registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+# Training runs at lower CPU priority so the API process keeps serving inference.
+TRAIN_NICE = int(os.environ.get("MNC_TRAIN_NICE", "10"))
+# An active job with no progress report for this long belonged to a process that died.
+TRAIN_STALE_SECONDS = float(os.environ.get("MNC_TRAIN_STALE_SECONDS", "900"))
+# Per-step NER progress is written at most this often, so training doesn't compete with API writes.
+PROGRESS_INTERVAL = float(os.environ.get("MNC_TRAIN_PROGRESS_SECONDS", "1"))
+# How long shutdown waits for a cancelled run to stop before killing it.
+SHUTDOWN_GRACE = float(os.environ.get("MNC_TRAIN_SHUTDOWN_GRACE", "10"))
+STAGING_PREFIX = ".staging_"
+
+_mp = multiprocessing.get_context("spawn")
+_local_procs: dict[str, multiprocessing.process.BaseProcess] = {}
+_local_procs_lock = threading.Lock()
+# Set by SIGTERM in the training process; the training loops check it between steps.
+_cancel_requested = threading.Event()
+_progress_state: dict[str, dict[str, Any]] = {}
+
+
+class TrainingBusy(Exception):
+    def __init__(self, job_id: str | None):
+        super().__init__(f"Training job {job_id} is already running")
+        self.job_id = job_id
+
+
+class TrainingCancelled(Exception):
+    pass
+
+
+def _job_from_row(row: sqlite3.Row) -> dict[str, Any]:
+    job = dict(row)
+    job["config"] = json.loads(job.pop("config_json"))
+    job["losses"] = json.loads(job.pop("losses_json"))
+    job["metrics"] = json.loads(job.pop("metrics_json") or "null")
+    return job
+
+
+def get_training_job(job_id: str) -> dict[str, Any] | None:
+    with db() as conn:
+        row = conn.execute("SELECT * FROM training_jobs WHERE id = ?", (job_id,)).fetchone()
+    return _job_from_row(row) if row else None
+
+
+def list_training_jobs(limit: int = 20) -> list[dict[str, Any]]:
+    with db() as conn:
+        rows = conn.execute("SELECT * FROM training_jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+    return [_job_from_row(r) for r in rows]
+
+
+def get_training_progress() -> dict[str, Any]:
+    with db() as conn:
+        row = conn.execute("SELECT * FROM training_jobs ORDER BY created_at DESC LIMIT 1").fetchone()
+    if row is None:
+        return {"status": "idle", "progress": 0, "metrics": None}
+    job = _job_from_row(row)
+    return {
+        "status": job["status"],
+        "progress": job["progress"],
+        "metrics": job["metrics"],
+        "error": job["error"],
+        "job_id": job["id"],
+        "stage": job["stage"],
+        "losses": job["losses"],
+        "model_version_id": job["model_version_id"],
+    }
+
+
+def check_cancelled(job_id: str | None) -> None:
+    if job_id is not None and _cancel_requested.is_set():
+        raise TrainingCancelled(job_id)
+
+
+def report_progress(job_id: str | None, progress: int, stage: str, loss: float | None = None) -> None:
+    if job_id is None:
+        return
+    check_cancelled(job_id)
+    state = _progress_state.setdefault(job_id, {"written": 0.0, "losses": []})
+    if loss is not None:
+        state["losses"].append(float(loss))
+        # Step reports are buffered; a stage change or the next interval writes them all at once.
+        if time.monotonic() - state["written"] < PROGRESS_INTERVAL:
+            return
+    losses = state["losses"]
+    ts = now_iso()
+    with db() as conn:
+        cur = conn.execute(
+            "UPDATE training_jobs SET progress=?, stage=?, losses_json=json_insert(losses_json" + ", '$[#]', ?" * len(losses)
+            + "), heartbeat_at=?, updated_at=? WHERE id=? AND status='training'",
+            (progress, stage, *losses, ts, ts, job_id),
+        )
+    state["written"] = time.monotonic()
+    losses.clear()
+    # A cancelled job no longer matches, which is how cancellation reaches a training loop in
+    # another process than the one that cancelled it.
+    if cur.rowcount == 0:
+        raise TrainingCancelled(job_id)
+
+
+def complete_training_job(conn: sqlite3.Connection, job_id: str | None, model_id: str, metrics: dict[str, Any]) -> None:
+    if job_id is None:
+        return
+    ts = now_iso()
+    cur = conn.execute(
+        "UPDATE training_jobs SET status='complete', progress=100, stage='done', metrics_json=?, model_version_id=?, finished_at=?, updated_at=? WHERE id=? AND status='training'",
+        (json.dumps(metrics), model_id, ts, ts, job_id),
+    )
+    if cur.rowcount == 0:
+        raise TrainingCancelled(job_id)
+
+
+def _fail(job_id: str, error: str) -> None:
+    ts = now_iso()
+    with db() as conn:
+        conn.execute(
+            "UPDATE training_jobs SET status='error', error=?, finished_at=?, updated_at=? WHERE id=? AND status IN ('queued','training')",
+            (error, ts, ts, job_id),
+        )
+
+
+def _expire_stale(stale_seconds: float = TRAIN_STALE_SECONDS) -> None:
+    stale = (datetime.utcnow() - timedelta(seconds=stale_seconds)).isoformat()
+    ts = now_iso()
+    with db() as conn:
+        conn.execute(
+            "UPDATE training_jobs SET status='error', error='Training process stopped reporting progress', finished_at=?, updated_at=? "
+            "WHERE status IN ('queued','training') AND COALESCE(heartbeat_at, created_at) < ?",
+            (ts, ts, stale),
+        )
+
+
+def _request_cancel(signum: int, frame: Any) -> None:
+    _cancel_requested.set()
+
+
+def _run_job(job_id: str, db_path: str, model_dir: str) -> None:
+    # cancel_training sends SIGTERM; the run stops at its next check and cleans up its artifacts
+    # instead of dying in the middle of a write.
+    signal.signal(signal.SIGTERM, _request_cancel)
+    database.DB_PATH = Path(db_path)
+    database.MODEL_DIR = Path(model_dir)
+    if TRAIN_NICE:
+        os.nice(TRAIN_NICE)
+    from .training import train_all
+
+    ts = now_iso()
+    with db() as conn:
+        cur = conn.execute(
+            "UPDATE training_jobs SET status='training', pid=?, started_at=?, heartbeat_at=?, updated_at=? WHERE id=? AND status='queued'",
+            (os.getpid(), ts, ts, ts, job_id),
+        )
+        row = conn.execute("SELECT config_json FROM training_jobs WHERE id=?", (job_id,)).fetchone()
+    if cur.rowcount == 0:
+        return
+    config = json.loads(row["config_json"])
+    try:
+        train_all(
+            config["max_steps"],
+            config["lr"],
+            config["base_model"],
+            dropout=config.get("dropout", 0.2),
+            batch_size=config.get("batch_size", 32),
+            job_id=job_id,
+            sentence_model=config.get("sentence_model"),
+        )
+    except TrainingCancelled:
+        pass
+    except Exception as exc:
+        logger.exception("Training job %s failed", job_id)
+        _fail(job_id, str(exc))
+
+
+def _watch(job_id: str, proc: multiprocessing.process.BaseProcess) -> None:
+    proc.join()
+    if proc.exitcode:
+        _fail(job_id, f"Training process exited with code {proc.exitcode}")
+    # This process learns about the new model immediately; other API workers pick it up
+    # when their cached "latest" expires (MNC_MODEL_LATEST_TTL).
+    model_registry.invalidate()
+    with _local_procs_lock:
+        _local_procs.pop(job_id, None)
+
+
+def start_training(config: dict[str, Any]) -> dict[str, Any]:
+    _expire_stale()
+    job_id = new_id()
+    ts = now_iso()
+    try:
+        with db() as conn:
+            conn.execute(
+                "INSERT INTO training_jobs (id, created_at, updated_at, status, config_json) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, ts, ts, json.dumps(config)),
+            )
+    except sqlite3.IntegrityError:
+        with db() as conn:
+            active = conn.execute("SELECT id FROM training_jobs WHERE status IN ('queued','training')").fetchone()
+        raise TrainingBusy(active["id"] if active else None)
+    # Only one run is active, so any staging directory left now belonged to a killed process.
+    for path in database.MODEL_DIR.glob(f"{STAGING_PREFIX}*"):
+        shutil.rmtree(path, ignore_errors=True)
+    # Not daemonic: evaluation fans out to its own process pool, which a daemonic process may not
+    # start. shutdown_training (atexit) cancels the run before multiprocessing joins it at exit.
+    proc = _mp.Process(target=_run_job, args=(job_id, str(database.DB_PATH), str(database.MODEL_DIR)), name=f"mnc-train-{job_id[:8]}")
+    proc.start()
+    with _local_procs_lock:
+        _local_procs[job_id] = proc
+    threading.Thread(target=_watch, args=(job_id, proc), name="mnc-train-watch", daemon=True).start()
+    return get_training_job(job_id)
+
+
+def cancel_training(job_id: str) -> dict[str, Any] | None:
+    ts = now_iso()
+    with db() as conn:
+        cur = conn.execute(
+            "UPDATE training_jobs SET status='cancelled', finished_at=?, updated_at=? WHERE id=? AND status IN ('queued','training')",
+            (ts, ts, job_id),
+        )
+        row = conn.execute("SELECT pid FROM training_jobs WHERE id=?", (job_id,)).fetchone()
+    # The training process turns the signal into a flag its loops check; a run in another
+    # container notices at its next progress write.
+    if cur.rowcount and row and row["pid"]:
+        try:
+            os.kill(row["pid"], signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    return get_training_job(job_id)
+
+
+def shutdown_training() -> None:
+    with _local_procs_lock:
+        job_ids = list(_local_procs)
+    for job_id in job_ids:
+        cancel_training(job_id)
+    with _local_procs_lock:
+        procs = list(_local_procs.values())
+    deadline = time.monotonic() + SHUTDOWN_GRACE
+    for proc in procs:
+        proc.join(max(0.0, deadline - time.monotonic()))
+        if proc.is_alive():
+            proc.kill()
+
+
+atexit.register(shutdown_training)
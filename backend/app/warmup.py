@@ -0,0 +1,92 @@
+import logging
+import os
+import threading
+import time
+from typing import Any
+
+from .inference import infer_batch
+from .model_registry import model_registry
+from .nlp import get_segmenter
+
+# Under uvicorn's logger so the duration shows up with the default uvicorn logging config.
+logger = logging.getLogger("uvicorn.error").getChild("warmup")
+
+# background: serve immediately, health reports "warming" until done; sync: block startup; off: skip.
+WARMUP_MODE = os.environ.get("MNC_WARMUP", "background")
+# A failed warm-up is retried this many times, waiting MNC_WARMUP_BACKOFF seconds and doubling, before giving up.
+WARMUP_RETRIES = int(os.environ.get("MNC_WARMUP_RETRIES", "3"))
+WARMUP_BACKOFF = float(os.environ.get("MNC_WARMUP_BACKOFF", "1"))
+
+WARMUP_NOTE = (
+    "Warm-up note. MAP 65 on norepi, weaning as tolerated.\n- Na: 138 K: 4.1 Cr: 1.2\n"
+    "No focal deficit. CT head today without hemorrhage. Plan to wean sedation and extubate."
+)
+
+
+class Warmup:
+    def __init__(self, mode: str = WARMUP_MODE, retries: int = WARMUP_RETRIES, backoff: float = WARMUP_BACKOFF):
+        if mode not in ("sync", "background", "off"):
+            raise ValueError(f"Unknown warm-up mode: {mode}")
+        self.mode = mode
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self._state: dict[str, Any] = {
+            "status": "ready" if mode == "off" else "pending",
+            "seconds": None,
+            "model_version_id": None,
+            "attempts": 0,
+            "error": None,
+        }
+
+    def start(self) -> None:
+        with self._lock:
+            if self._state["status"] != "pending":
+                return
+            self._state["status"] = "warming"
+        if self.mode == "sync":
+            self._run()
+        else:
+            threading.Thread(target=self._run, name="mnc-warmup", daemon=True).start()
+
+    def _run(self) -> None:
+        started = time.perf_counter()
+        delay = self.backoff
+        for attempt in range(1, self.retries + 2):
+            try:
+                model_id = self._attempt()
+            except Exception as exc:
+                error = f"{type(exc).__name__}: {exc}"
+                with self._lock:
+                    self._state.update(attempts=attempt, error=error)
+                if attempt > self.retries:
+                    elapsed = time.perf_counter() - started
+                    logger.exception("Warm-up failed after %d attempts in %.2fs", attempt, elapsed)
+                    # Requests still load the model on first use, so the instance keeps serving.
+                    with self._lock:
+                        self._state.update(status="degraded", seconds=elapsed)
+                    return
+                logger.warning("Warm-up attempt %d failed (%s), retrying in %.1fs", attempt, error, delay)
+                time.sleep(delay)
+                delay *= 2
+                continue
+            elapsed = time.perf_counter() - started
+            logger.info("Warm-up finished in %.2fs (model %s)", elapsed, model_id or "none")
+            with self._lock:
+                self._state.update(status="ready", seconds=elapsed, model_version_id=model_id, attempts=attempt, error=None)
+            return
+
+    def _attempt(self) -> str | None:
+        # The latest model, the segmenter, then one note through segmentation, the keep
+        # scorer, NER and structuring, so the first real request pays none of the first-call costs.
+        model_id, _, _ = model_registry.get(None)
+        get_segmenter()
+        infer_batch([WARMUP_NOTE], model_id, persist=False)
+        return model_id
+
+    def state(self) -> dict[str, Any]:
+        with self._lock:
+            return dict(self._state)
+
+
+warmup = Warmup()
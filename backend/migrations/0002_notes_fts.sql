@@ -0,0 +1,26 @@
+-- Full-text index over notes.raw_text. External content: the text lives only in notes,
+-- keyed by notes.rowid. Triggers index every row written after this migration.
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(raw_text, content='notes', content_rowid='rowid');
+
+CREATE TRIGGER IF NOT EXISTS notes_fts_ai AFTER INSERT ON notes BEGIN
+  INSERT INTO notes_fts(rowid, raw_text) VALUES (new.rowid, new.raw_text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS notes_fts_ad AFTER DELETE ON notes BEGIN
+  INSERT INTO notes_fts(notes_fts, rowid, raw_text) VALUES ('delete', old.rowid, old.raw_text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS notes_fts_au AFTER UPDATE OF raw_text ON notes BEGIN
+  INSERT INTO notes_fts(notes_fts, rowid, raw_text) VALUES ('delete', old.rowid, old.raw_text);
+  INSERT INTO notes_fts(rowid, raw_text) VALUES (new.rowid, new.raw_text);
+END;
+
+-- Rows up to `upto` predate the triggers and are indexed by backfill_notes_fts().
+CREATE TABLE IF NOT EXISTS fts_backfill (
+  name TEXT PRIMARY KEY,
+  cursor INTEGER NOT NULL,
+  upto INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO fts_backfill (name, cursor, upto)
+SELECT 'notes_fts', 0, COALESCE(MAX(rowid), 0) FROM notes;
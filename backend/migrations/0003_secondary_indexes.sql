@@ -0,0 +1,15 @@
+-- submit_label upserts on sentence_id; keep the newest label per sentence before enforcing it.
+DELETE FROM sentence_labels
+WHERE rowid NOT IN (SELECT MAX(rowid) FROM sentence_labels GROUP BY sentence_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_sentence_labels_sentence_id ON sentence_labels(sentence_id);
+
+-- Covers the sentence_labels side of the train_all join without touching the table.
+CREATE INDEX IF NOT EXISTS idx_sentence_labels_sentence_label ON sentence_labels(sentence_id, label);
+CREATE INDEX IF NOT EXISTS idx_sentence_labels_created_at ON sentence_labels(created_at);
+
+CREATE INDEX IF NOT EXISTS idx_sentences_note_id ON sentences(note_id, idx);
+CREATE INDEX IF NOT EXISTS idx_span_annotations_note_id ON span_annotations(note_id);
+CREATE INDEX IF NOT EXISTS idx_notes_created_at ON notes(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_inference_runs_created_at ON inference_runs(created_at);
+CREATE INDEX IF NOT EXISTS idx_model_versions_created_at ON model_versions(created_at);
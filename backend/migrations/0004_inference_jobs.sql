@@ -0,0 +1,31 @@
+CREATE TABLE IF NOT EXISTS inference_jobs (
+  id TEXT PRIMARY KEY,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL,
+  status TEXT NOT NULL CHECK(status IN ('queued','running','completed','failed','cancelled')),
+  model_version_id TEXT,
+  keep_threshold REAL NOT NULL,
+  chunk_size INTEGER NOT NULL,
+  total INTEGER NOT NULL,
+  next_idx INTEGER NOT NULL DEFAULT 0,
+  processed INTEGER NOT NULL DEFAULT 0,
+  failed INTEGER NOT NULL DEFAULT 0,
+  error TEXT,
+  started_at TEXT,
+  finished_at TEXT,
+  heartbeat_at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_inference_jobs_status ON inference_jobs(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_inference_jobs_created_at ON inference_jobs(created_at);
+
+-- One row per submitted note. text is cleared once the note has a run, whose input_text keeps it.
+CREATE TABLE IF NOT EXISTS inference_job_items (
+  job_id TEXT NOT NULL,
+  idx INTEGER NOT NULL,
+  text TEXT,
+  run_id TEXT,
+  error TEXT,
+  PRIMARY KEY(job_id, idx),
+  FOREIGN KEY(job_id) REFERENCES inference_jobs(id) ON DELETE CASCADE
+) WITHOUT ROWID;
@@ -0,0 +1,23 @@
+CREATE TABLE IF NOT EXISTS training_jobs (
+  id TEXT PRIMARY KEY,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL,
+  status TEXT NOT NULL CHECK(status IN ('queued','training','complete','error','cancelled')),
+  progress INTEGER NOT NULL DEFAULT 0,
+  stage TEXT,
+  config_json TEXT NOT NULL,
+  losses_json TEXT NOT NULL DEFAULT '[]',
+  metrics_json TEXT,
+  error TEXT,
+  model_version_id TEXT,
+  pid INTEGER,
+  started_at TEXT,
+  finished_at TEXT,
+  heartbeat_at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_training_jobs_created_at ON training_jobs(created_at);
+
+-- At most one active training run across all API processes: every active row has the same key.
+CREATE UNIQUE INDEX IF NOT EXISTS ux_training_jobs_active ON training_jobs((status IN ('queued','training')))
+WHERE status IN ('queued','training');
@@ -0,0 +1,44 @@
+-- 0002 keyed notes_fts on the implicit rowid of notes. notes has a TEXT primary key, so VACUUM
+-- may renumber that rowid and the index would then point at the wrong notes. Each note now
+-- gets an explicit INTEGER PRIMARY KEY in notes_fts_keys, which VACUUM keeps, and the index
+-- is rebuilt on it. The text still lives only in notes, read through notes_fts_content.
+DROP TRIGGER IF EXISTS notes_fts_ai;
+DROP TRIGGER IF EXISTS notes_fts_ad;
+DROP TRIGGER IF EXISTS notes_fts_au;
+DROP TABLE IF EXISTS notes_fts;
+
+CREATE TABLE IF NOT EXISTS notes_fts_keys (
+  key INTEGER PRIMARY KEY,
+  note_id TEXT NOT NULL UNIQUE
+);
+
+INSERT INTO notes_fts_keys (note_id) SELECT id FROM notes ORDER BY rowid;
+
+CREATE VIEW IF NOT EXISTS notes_fts_content AS
+SELECT k.key AS key, n.raw_text AS raw_text FROM notes_fts_keys k JOIN notes n ON n.id = k.note_id;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(raw_text, content='notes_fts_content', content_rowid='key');
+
+CREATE TRIGGER IF NOT EXISTS notes_fts_ai AFTER INSERT ON notes BEGIN
+  INSERT INTO notes_fts_keys (note_id) VALUES (new.id);
+  INSERT INTO notes_fts(rowid, raw_text) SELECT key, new.raw_text FROM notes_fts_keys WHERE note_id = new.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS notes_fts_ad AFTER DELETE ON notes BEGIN
+  INSERT INTO notes_fts(notes_fts, rowid, raw_text) SELECT 'delete', key, old.raw_text FROM notes_fts_keys
+  WHERE note_id = old.id AND NOT EXISTS (SELECT 1 FROM fts_backfill b WHERE b.name = 'notes_fts' AND key > b.cursor AND key <= b.upto);
+  DELETE FROM notes_fts_keys WHERE note_id = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS notes_fts_au AFTER UPDATE OF raw_text ON notes BEGIN
+  INSERT INTO notes_fts(notes_fts, rowid, raw_text) SELECT 'delete', key, old.raw_text FROM notes_fts_keys
+  WHERE note_id = old.id AND NOT EXISTS (SELECT 1 FROM fts_backfill b WHERE b.name = 'notes_fts' AND key > b.cursor AND key <= b.upto);
+  INSERT INTO notes_fts(rowid, raw_text) SELECT key, new.raw_text FROM notes_fts_keys
+  WHERE note_id = new.id AND NOT EXISTS (SELECT 1 FROM fts_backfill b WHERE b.name = 'notes_fts' AND key > b.cursor AND key <= b.upto);
+END;
+
+-- The notes that existed before this migration are indexed again by backfill_notes_fts(),
+-- now walking the stable keys. Until it reaches a note, the triggers leave its (absent) index
+-- entry alone: deleting an entry that was never added corrupts an external-content index.
+INSERT OR IGNORE INTO fts_backfill (name, cursor, upto) VALUES ('notes_fts', 0, 0);
+UPDATE fts_backfill SET cursor = 0, upto = (SELECT COALESCE(MAX(key), 0) FROM notes_fts_keys) WHERE name = 'notes_fts';
@@ -0,0 +1,23 @@
+import pytest
+
+from app import database
+from app.model_registry import model_registry
+
+
+@pytest.fixture(autouse=True)
+def model_dir(tmp_path_factory, monkeypatch):
+    # Models trained by tests (in-process or in a training subprocess) stay out of backend/models.
+    path = tmp_path_factory.mktemp("models")
+    monkeypatch.setattr(database, "MODEL_DIR", path)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def db_path(tmp_path_factory, monkeypatch):
+    # Every test gets a fresh, migrated database instead of backend/mednotecleaner.db.
+    path = tmp_path_factory.mktemp("db") / "test.db"
+    monkeypatch.setattr(database, "DB_PATH", path)
+    model_registry.invalidate()
+    database.init_db()
+    yield path
+    model_registry.invalidate()
@@ -1,13 +1,17 @@
+import pytest
 from fastapi.testclient import TestClient
 
-from app.database import init_db, seed_data_if_empty
+from app.database import seed_data_if_empty
 from app.main import app
 
-init_db()
-seed_data_if_empty()
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def seeded():
+    seed_data_if_empty()
+
+
 def test_segmentation_offsets_correctness():
     note = client.post('/api/notes', json={"raw_text": "Alpha. Beta sentence."}).json()
     segments = client.post(f"/api/notes/{note['note_id']}/segment").json()
@@ -0,0 +1,90 @@
+from app.batch import chunk_texts
+from app.inference import infer_batch
+
+
+def test_chunk_texts_preserves_order():
+    texts = [str(i) for i in range(50)]
+    chunks = chunk_texts(texts, workers=4, min_chunk=8)
+    assert len(chunks) == 4
+    assert [t for c in chunks for t in c] == texts
+    assert chunk_texts(texts[:5], workers=4, min_chunk=8) == [texts[:5]]
+
+
+def test_infer_batch_matches_single_note_inference():
+    texts = ["MAP 70 on norepi. No focal deficit.", "Patient awake.\n- Na: 138", "CT head today."]
+    batched = infer_batch(texts, persist=False)
+    single = [infer_batch([t], persist=False)[0] for t in texts]
+    assert batched == single
+
+
+def test_iter_batch_streams_results_and_isolates_errors(monkeypatch):
+    from app import batch
+
+    def flaky(texts, *args, **kwargs):
+        if any("boom" in t for t in texts):
+            raise ValueError("bad note")
+        return infer_batch(texts, *args, **kwargs)
+
+    monkeypatch.setattr(batch, "infer_batch", flaky)
+    texts = ["Patient awake.", "boom", "CT head today.", "No focal deficit."]
+    events = list(batch.iter_batch(iter(texts), workers=1, chunk_size=2, persist=False))
+    results = {e["index"]: e["result"] for e in events if e["event"] == "result"}
+    errors = [e for e in events if e["event"] == "error"]
+    assert sorted(results) == [0, 2, 3]
+    assert errors == [{"event": "error", "index": 1, "detail": "ValueError: bad note"}]
+    assert [e["done"] for e in events if e["event"] == "progress"] == [2, 4]
+    assert events[-1] == {"event": "done", "count": 4, "errors": 1}
+    assert results[2] == infer_batch(["CT head today."], persist=False)[0]
+
+
+def test_stream_endpoint_emits_ndjson_and_sse():
+    import json
+
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    client = TestClient(app)
+    texts = [f"Patient {i} awake. MAP 70." for i in range(120)]
+    resp = client.post('/api/infer/batch/stream', json={"texts": texts, "keep_threshold": 0.4})
+    assert resp.status_code == 200
+    events = [json.loads(line) for line in resp.text.splitlines()]
+    results = [e for e in events if e["event"] == "result"]
+    assert sorted(e["index"] for e in results) == list(range(120))
+    assert all(e["result"]["meta"]["run_id"] for e in results)
+    assert events[-1] == {"event": "done", "count": 120, "errors": 0}
+
+    sse = client.post('/api/infer/batch/stream?format=sse', json={"texts": texts[:3]})
+    assert sse.text.count("event: result") == 3
+    assert client.post('/api/infer/batch', json={"texts": texts}).status_code == 422
+
+
+def test_saturated_db_lane_mid_stream_fails_only_that_chunk(monkeypatch):
+    import asyncio
+
+    from app import batch
+    from app.executor import ExecutorSaturated
+
+    real_run_db = batch.run_db
+    persisted = []
+
+    async def flaky_run_db(fn, *args):
+        if fn is batch._chunk_events:
+            persisted.append(args[0])
+            if args[0] == 2:
+                raise ExecutorSaturated("db")
+        return await real_run_db(fn, *args)
+
+    monkeypatch.setattr(batch, "run_db", flaky_run_db)
+
+    async def collect():
+        texts = ["Patient awake.", "CT head today.", "MAP 70 on norepi.", "No focal deficit.", "Na 138."]
+        return [e async for e in batch.iter_batch_async(texts, workers=1, chunk_size=2)]
+
+    events = asyncio.run(collect())
+    assert persisted == [0, 2, 4]
+    assert sorted(e["index"] for e in events if e["event"] == "result") == [0, 1, 4]
+    assert [e for e in events if e["event"] == "error"] == [
+        {"event": "error", "index": i, "detail": "ExecutorSaturated: db executor is saturated"} for i in (2, 3)
+    ]
+    assert events[-1] == {"event": "done", "count": 5, "errors": 2}
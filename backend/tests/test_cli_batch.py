@@ -0,0 +1,72 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from app import database
+
+CLI = Path(__file__).resolve().parents[2] / "scripts" / "mednotecleaner_cli.py"
+
+
+def _infer_batch(src, out, *extra):
+    # The CLI process uses the test's database and model directory, not backend/mednotecleaner.db.
+    env = {**os.environ, "MNC_DB_PATH": str(database.DB_PATH), "MNC_MODEL_DIR": str(database.MODEL_DIR)}
+    subprocess.run(
+        [sys.executable, str(CLI), "infer-batch", "--in", str(src), "--out", str(out), "--workers", "1", "--chunk-size", "2", "--no-persist", *extra],
+        check=True,
+        capture_output=True,
+        env=env,
+    )
+    return [json.loads(line) for line in out.read_text().splitlines()]
+
+
+def test_jsonl_input_streams_ndjson_and_resumes(tmp_path):
+    src = tmp_path / "notes.jsonl"
+    out = tmp_path / "out.ndjson"
+    notes = [{"id": f"n{i}", "text": f"Patient {i} awake. MAP 70."} for i in range(5)]
+    src.write_text("\n".join(json.dumps(n) for n in notes[:3]) + "\n\n")
+    first = _infer_batch(src, out)
+    assert [e["id"] for e in first] == ["n0", "n1", "n2"]
+    assert [e["index"] for e in first] == [0, 1, 2]
+
+    with src.open("a") as f:
+        f.write("\n".join(json.dumps(n) for n in notes[3:]) + "\n")
+    resumed = _infer_batch(src, out, "--resume")
+    assert resumed[:3] == first
+    assert [e["id"] for e in resumed] == ["n0", "n1", "n2", "n3", "n4"]
+    assert [e["index"] for e in resumed] == [0, 1, 2, 3, 4]
+    assert json.loads(Path(f"{out}.checkpoint").read_text())["notes"] == 5
+
+
+def test_plain_text_input_is_one_note_per_line(tmp_path):
+    src = tmp_path / "notes.txt"
+    src.write_text("Patient awake.\n\nCT head today.\n")
+    events = _infer_batch(src, tmp_path / "out.ndjson")
+    assert [e["event"] for e in events] == ["result", "result"]
+    assert "id" not in events[0]
+
+
+def test_malformed_lines_become_error_events_and_resume_continues(tmp_path):
+    src = tmp_path / "notes.jsonl"
+    out = tmp_path / "out.ndjson"
+    lines = [
+        json.dumps({"id": "a", "text": "Patient awake."}),
+        '{"id":"b","text": broken',
+        json.dumps({"id": "c", "text": "CT head today."}),
+        json.dumps({"id": "d", "body": "wrong field"}),
+    ]
+    src.write_text("\n".join(lines) + "\n")
+    events = _infer_batch(src, out)
+    assert [e["event"] for e in events] == ["result", "error", "result", "error"]
+    assert [e.get("id") for e in events] == ["a", None, "c", None]
+    assert [e["index"] for e in events] == [0, 1, 2, 3]
+    assert events[1]["offset"] == len(lines[0]) + 1
+    assert events[3]["offset"] == sum(len(line) + 1 for line in lines[:3])
+    assert "'text'" in events[3]["detail"]
+
+    with src.open("a") as f:
+        f.write(json.dumps({"id": "e", "text": "MAP 70."}) + "\n")
+    resumed = _infer_batch(src, out, "--resume")
+    assert resumed[:4] == events
+    assert [e.get("id") for e in resumed[4:]] == ["e"] and resumed[4]["index"] == 4
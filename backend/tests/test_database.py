@@ -0,0 +1,34 @@
+import threading
+
+import pytest
+
+from app.database import db, get_conn, new_id, now_iso
+
+
+def test_connections_are_reused_per_thread():
+    assert get_conn() is get_conn()
+    other = []
+    t = threading.Thread(target=lambda: other.append(get_conn()))
+    t.start()
+    t.join()
+    assert other[0] is not get_conn()
+
+
+def test_pragmas_applied():
+    conn = get_conn()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+
+def test_db_rolls_back_on_error():
+    note_id = new_id()
+    with pytest.raises(RuntimeError):
+        with db() as conn:
+            conn.execute(
+                "INSERT INTO notes (id, created_at, source, raw_text) VALUES (?, ?, 'test', 'x')",
+                (note_id, now_iso()),
+            )
+            raise RuntimeError("boom")
+    with db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM notes WHERE id=?", (note_id,)).fetchone()[0] == 0
@@ -0,0 +1,43 @@
+import spacy
+
+from app.evaluation import evaluate_ner
+
+NOTES = [
+    # Exact match.
+    ("Na 138 this morning.", [(0, 6, "LAB")]),
+    # The ruler tags only "CT", so the gold span is overlapped but not matched exactly.
+    ("CT head negative.", [(0, 7, "IMAGING")]),
+    # A missed gold span and a spurious prediction.
+    ("Cr 1.2 stable, CT later.", [(0, 6, "LAB")]),
+]
+
+
+def _model(tmp_path):
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns([
+        {"label": "LAB", "pattern": [{"LOWER": "na"}, {"LIKE_NUM": True}]},
+        {"label": "IMAGING", "pattern": "CT"},
+    ])
+    nlp.to_disk(tmp_path / "ner")
+    return str(tmp_path / "ner")
+
+
+def test_exact_and_partial_span_metrics(tmp_path):
+    out = evaluate_ner(_model(tmp_path), NOTES, workers=1)
+    assert out["documents"] == 3
+    lab, imaging = out["per_label"]["LAB"], out["per_label"]["IMAGING"]
+    assert (lab["precision"], lab["recall"], lab["support"]) == (1.0, 0.5, 2)
+    assert lab["partial"]["recall"] == 0.5
+    assert (imaging["precision"], imaging["recall"]) == (0.0, 0.0)
+    # One of the two "CT" predictions overlaps the gold "CT head" span.
+    assert imaging["partial"] == {"precision": 0.5, "recall": 1.0, "f1": 2 / 3}
+    assert out["exact"]["precision"] == 1 / 3 and out["exact"]["recall"] == 1 / 3
+    assert out["partial"]["precision"] == 2 / 3 and out["partial"]["recall"] == 2 / 3
+
+
+def test_pooled_evaluation_matches_inline(tmp_path):
+    path = _model(tmp_path)
+    pooled, inline = evaluate_ner(path, NOTES, workers=2, min_chunk=1), evaluate_ner(path, NOTES, workers=1)
+    assert (pooled.pop("processes"), inline.pop("processes")) == (2, 1)
+    assert pooled == inline
@@ -0,0 +1,63 @@
+import asyncio
+import gc
+import threading
+from functools import partial
+
+from fastapi.testclient import TestClient
+
+from app import batch, main
+from app.executor import ExecutorSaturated, Lane, infer_lane
+from app.main import app
+
+
+def test_lane_rejects_when_full():
+    lane = Lane("test", workers=1, max_pending=2)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.create_task(lane.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        try:
+            await lane.run(lambda: None)
+        except ExecutorSaturated:
+            rejected = True
+        else:
+            rejected = False
+        release.set()
+        await asyncio.gather(*running)
+        return rejected
+
+    assert asyncio.run(scenario())
+    assert lane.stats()["rejected"] == 1
+    assert lane.stats()["pending"] == 0
+    lane.shutdown()
+
+
+def test_saturated_infer_lane_returns_503(monkeypatch):
+    monkeypatch.setattr(infer_lane, "max_pending", 0)
+    r = TestClient(app).post("/api/infer", json={"text": "Patient awake."})
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "1"
+
+
+def test_saturated_process_pool_returns_503_for_batches(monkeypatch):
+    # Force the pool path regardless of this host's CPU count.
+    monkeypatch.setattr(main, "run_batch_async", partial(batch.run_batch_async, workers=4))
+    monkeypatch.setattr(main, "open_batch_stream", partial(batch.open_batch_stream, workers=4))
+    monkeypatch.setattr(batch.pool_lane, "max_pending", 0)
+    client = TestClient(app)
+    texts = [f"Patient {i} awake." for i in range(40)]
+    for path in ("/api/infer/batch", "/api/infer/batch/stream"):
+        r = client.post(path, json={"texts": texts})
+        assert r.status_code == 503
+        assert r.headers["retry-after"] == "1"
+    assert batch.pool_lane.stats()["pending"] == 0
+
+
+def test_unconsumed_stream_returns_its_pool_slots(monkeypatch):
+    monkeypatch.setattr(batch.pool_lane, "max_pending", 8)
+    events = batch.open_batch_stream(["Patient awake."], workers=2)
+    assert batch.pool_lane.stats()["pending"] == 2 * batch.STREAM_INFLIGHT
+    del events
+    gc.collect()
+    assert batch.pool_lane.stats()["pending"] == 0
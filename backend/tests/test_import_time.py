@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parents[2] / "scripts"
+HEAVY = ("spacy", "sklearn", "scipy", "numpy", "app.training", "app.inference")
+# Cumulative import time of the CLI module for non-ML subcommands; ~30 ms locally.
+CLI_IMPORT_BUDGET_US = 500_000
+
+
+def _import_times(module, cwd=SCRIPTS):
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    times = {}
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_import_skips_ml_stack_and_fits_budget():
+    times = _import_times("mednotecleaner_cli")
+    assert not [m for m in times if m.split(".")[0] in HEAVY or m in HEAVY]
+    assert times["mednotecleaner_cli"] < CLI_IMPORT_BUDGET_US
+
+
+def test_model_registry_import_defers_spacy():
+    # The registry is imported by lightweight modules (jobs, warm-up); spaCy loads with the first model.
+    times = _import_times("app.model_registry", cwd=SCRIPTS.parent / "backend")
+    assert "spacy" not in times
+
+
+def _modules_after(argv, env=None):
+    # Runs the CLI's main() in-process and reports which modules it left loaded, --help exit included.
+    code = (
+        "import json, sys\n"
+        "import mednotecleaner_cli\n"
+        f"sys.argv = ['mednotecleaner_cli.py', *{argv!r}]\n"
+        "try:\n"
+        "    mednotecleaner_cli.main()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(json.dumps(sorted(sys.modules)), file=sys.stderr)\n"
+    )
+    res = subprocess.run([sys.executable, "-c", code], cwd=SCRIPTS, env=env, check=True, capture_output=True, text=True)
+    return json.loads(res.stderr.splitlines()[-1])
+
+
+def test_export_help_and_export_never_load_the_ml_stack(tmp_path):
+    env = {**os.environ, "MNC_DB_PATH": str(tmp_path / "cli.db"), "MNC_MODEL_DIR": str(tmp_path / "models")}
+    for argv in (["export", "--help"], ["export", "--out", str(tmp_path / "spans.jsonl")]):
+        loaded = _modules_after(argv, env)
+        assert not [m for m in loaded if m.split(".")[0] in HEAVY or m in HEAVY], argv
+    assert (tmp_path / "spans.jsonl").exists()
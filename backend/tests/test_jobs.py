@@ -0,0 +1,130 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import batch, database, jobs
+from app.database import db, init_db
+from app.jobs import JobRunner, cancel_job, claim_job, get_job, iter_job_results, submit_job
+from app.main import app
+from app.model_registry import model_registry
+
+TEXTS = [f"Patient {i} awake. MAP 70 on norepi." for i in range(5)]
+
+
+@pytest.fixture
+def job_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "jobs.db")
+    model_registry.invalidate()
+    init_db()
+    yield
+    model_registry.invalidate()
+
+
+def _run_count():
+    with db() as conn:
+        return conn.execute("SELECT COUNT(*) FROM inference_runs").fetchone()[0]
+
+
+def test_job_processes_all_chunks_in_order(job_db):
+    job = submit_job(TEXTS, keep_threshold=0.4, chunk_size=2)
+    assert job["status"] == "queued" and job["total"] == 5
+    JobRunner(processes=1).run_job(claim_job())
+    done = get_job(job["id"])
+    assert (done["status"], done["processed"], done["failed"]) == ("completed", 5, 0)
+    results = list(iter_job_results(job["id"]))
+    assert [r["index"] for r in results] == list(range(5))
+    assert _run_count() == 5
+
+
+def test_job_resumes_from_last_committed_chunk(job_db, monkeypatch):
+    job = submit_job(TEXTS, chunk_size=2)
+    runner = JobRunner(processes=1)
+    real = jobs._infer_chunk_outcomes
+
+    def stop_after_first_chunk(*args):
+        runner._stop.set()
+        return real(*args)
+
+    monkeypatch.setattr(jobs, "_infer_chunk_outcomes", stop_after_first_chunk)
+    runner.run_job(claim_job())
+    paused = get_job(job["id"])
+    assert (paused["status"], paused["processed"]) == ("queued", 2)
+
+    monkeypatch.setattr(jobs, "_infer_chunk_outcomes", real)
+    resumed = claim_job()
+    assert resumed["next_idx"] == 2
+    JobRunner(processes=1).run_job(resumed)
+    assert get_job(job["id"])["processed"] == 5
+    assert _run_count() == 5
+
+
+def test_stale_running_job_is_reclaimed(job_db):
+    job = submit_job(TEXTS[:1])
+    assert claim_job()["id"] == job["id"]
+    assert claim_job() is None
+    with db() as conn:
+        conn.execute("UPDATE inference_jobs SET heartbeat_at='2000-01-01T00:00:00' WHERE id=?", (job["id"],))
+    assert claim_job()["id"] == job["id"]
+
+
+def test_cancelled_job_is_not_claimed(job_db):
+    job = submit_job(TEXTS)
+    assert cancel_job(job["id"])["status"] == "cancelled"
+    assert claim_job() is None
+    assert cancel_job("missing") is None
+
+
+def test_job_endpoints_submit_poll_download(job_db):
+    with TestClient(app) as client:
+        job = client.post('/api/inference-jobs', json={"texts": TEXTS, "chunk_size": 2}).json()
+        deadline = time.monotonic() + 60
+        while client.get(f"/api/inference-jobs/{job['id']}").json()["status"] != "completed":
+            assert time.monotonic() < deadline
+            time.sleep(0.1)
+        lines = client.get(f"/api/inference-jobs/{job['id']}/results").text.splitlines()
+        assert len(lines) == 5
+        assert client.get('/api/inference-jobs/missing').status_code == 404
+
+
+def test_slow_chunk_keeps_its_job_from_being_reclaimed(job_db, monkeypatch):
+    job = submit_job(TEXTS[:2])
+    real = jobs._infer_chunk_outcomes
+    reclaimed = []
+
+    def slow(*args):
+        # Held for several stale windows; the worker's heartbeat must keep the job its own.
+        for _ in range(6):
+            time.sleep(0.25)
+            reclaimed.append(claim_job(stale_seconds=0.5))
+        return real(*args)
+
+    monkeypatch.setattr(jobs, "_infer_chunk_outcomes", slow)
+    JobRunner(processes=1, stale_seconds=0.5).run_job(claim_job())
+    assert reclaimed == [None] * 6
+    assert get_job(job["id"])["processed"] == 2
+
+
+def test_job_waits_for_a_saturated_pool_instead_of_failing(job_db, monkeypatch):
+    monkeypatch.setattr(jobs, "get_pool", lambda workers: ThreadPoolExecutor(1))
+    job = submit_job(TEXTS[:2])
+    rejected = batch.pool_lane.stats()["rejected"]
+    held = batch.pool_lane.reserve(batch.pool_lane.max_pending)
+    runner = JobRunner(processes=2, poll_interval=0.05, stale_seconds=0.4)
+    thread = threading.Thread(target=runner.run_job, args=(claim_job(),))
+    thread.start()
+    try:
+        time.sleep(1)
+        # Still running on a fresh heartbeat, with nothing failed and no rejection counted.
+        waiting = get_job(job["id"])
+        assert (waiting["status"], waiting["processed"], waiting["failed"]) == ("running", 0, 0)
+        assert claim_job(stale_seconds=0.4) is None
+        assert batch.pool_lane.stats()["rejected"] == rejected
+    finally:
+        held.release()
+    thread.join(60)
+    done = get_job(job["id"])
+    assert (done["status"], done["processed"], done["failed"]) == ("completed", 2, 0)
+    assert batch.pool_lane.stats()["pending"] == 0
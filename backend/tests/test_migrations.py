@@ -0,0 +1,77 @@
+import pytest
+
+from app import database
+from app.database import db, init_db, new_id, now_iso
+from app.db.repository import Repository
+from app.migrations import applied_versions, discover, migrate, split_statements
+
+HOT_QUERIES = {
+    "train_all sentence join": "SELECT s.text, sl.label FROM sentence_labels sl CROSS JOIN sentences s ON s.id=sl.sentence_id",
+    "sentences by note": "SELECT * FROM sentences WHERE note_id=? ORDER BY idx",
+    "spans by note": "SELECT * FROM span_annotations WHERE note_id=?",
+    "training spans in note order": "SELECT note_id, start_char, end_char, label FROM span_annotations ORDER BY note_id",
+    "inference history": "SELECT * FROM inference_runs ORDER BY created_at DESC LIMIT 20",
+    "latest model": "SELECT id FROM model_versions ORDER BY created_at DESC LIMIT 1",
+    "notes newest first": "SELECT id FROM notes ORDER BY created_at DESC, id DESC LIMIT 50",
+    "label upsert target": "SELECT id FROM sentence_labels WHERE sentence_id=?",
+    "next queued job": "SELECT id FROM inference_jobs WHERE status='queued' ORDER BY created_at LIMIT 1",
+    "job chunk": "SELECT idx, text FROM inference_job_items WHERE job_id=? AND idx>=? ORDER BY idx LIMIT 64",
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_queries_use_indexes(name):
+    sql = HOT_QUERIES[name]
+    with db() as conn:
+        plan = [r["detail"] for r in conn.execute(f"EXPLAIN QUERY PLAN {sql}", (None,) * sql.count("?"))]
+    for step in plan:
+        assert "TEMP B-TREE" not in step, (name, plan)
+        if step.startswith("SCAN"):
+            assert "INDEX" in step, (name, plan)
+
+
+def test_all_migrations_applied_once():
+    with db() as conn:
+        assert applied_versions(conn) == {v for v, _, _ in discover()}
+        assert migrate(conn) == []
+
+
+def test_submit_label_upserts_one_row_per_sentence():
+    note_id, sentence_id = new_id(), new_id()
+    with db() as conn:
+        conn.execute("INSERT INTO notes (id, created_at, source, raw_text) VALUES (?, ?, 'test', 'x')", (note_id, now_iso()))
+        conn.execute("INSERT INTO sentences (id, note_id, idx, text, start_char, end_char) VALUES (?, ?, 0, 'x', 0, 1)", (sentence_id, note_id))
+    repo = Repository()
+    repo.submit_label(sentence_id, "KEEP")
+    repo.submit_label(sentence_id, "REMOVE")
+    with db() as conn:
+        rows = conn.execute("SELECT label FROM sentence_labels WHERE sentence_id=?", (sentence_id,)).fetchall()
+    assert [r["label"] for r in rows] == ["REMOVE"]
+
+
+def test_unique_index_migration_dedupes_existing_labels(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "m.db")
+    with db() as conn:
+        migrate(conn, target=2)
+        conn.execute("INSERT INTO notes (id, created_at, source, raw_text) VALUES ('n', 'now', 'test', 'x')")
+        conn.execute("INSERT INTO sentences (id, note_id, idx, text, start_char, end_char) VALUES ('s', 'n', 0, 'x', 0, 1)")
+        for i, label in enumerate(["KEEP", "REMOVE"]):
+            conn.execute("INSERT INTO sentence_labels (id, sentence_id, label, created_at) VALUES (?, 's', ?, 'now')", (f"l{i}", label))
+        conn.commit()
+        migrate(conn)
+        assert [r[0] for r in conn.execute("SELECT label FROM sentence_labels")] == ["REMOVE"]
+
+
+def test_split_statements_keeps_trigger_bodies():
+    sql = "-- c\nCREATE TABLE t (x);\nCREATE TRIGGER tr AFTER INSERT ON t BEGIN\n  SELECT 1;\n  SELECT 2;\nEND;\n-- trailing\n"
+    stmts = list(split_statements(sql))
+    assert len(stmts) == 2 and stmts[1].endswith("END;")
+
+
+def test_seed_loads_into_fresh_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "seed.db")
+    init_db()
+    database.seed_data_if_empty()
+    with db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0] > 0
+        assert conn.execute("SELECT COUNT(*) FROM sentence_labels").fetchone()[0] > 0
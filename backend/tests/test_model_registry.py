@@ -0,0 +1,46 @@
+from app.model_registry import ModelRegistry
+
+
+def _fake_registry(max_models=2):
+    loads = []
+    latest = {"id": "m1"}
+
+    def loader(model_id):
+        loads.append(model_id)
+        return {"model": model_id}, f"nlp-{model_id}"
+
+    reg = ModelRegistry(max_models=max_models, loader=loader, latest_resolver=lambda: latest["id"], latest_ttl=3600)
+    return reg, loads, latest
+
+
+def test_registry_caches_and_resolves_latest_once():
+    reg, loads, _ = _fake_registry()
+    for _ in range(5):
+        model_id, sent_model, nlp = reg.get(None)
+    assert model_id == "m1" and nlp == "nlp-m1"
+    assert loads == ["m1"]
+    stats = reg.stats()
+    assert stats["hits"] == 4 and stats["misses"] == 1
+    assert stats["latest_lookups"] == 1
+
+
+def test_registry_lru_eviction():
+    reg, loads, _ = _fake_registry(max_models=2)
+    reg.get("a")
+    reg.get("b")
+    reg.get("a")
+    reg.get("c")
+    assert reg.stats()["resident"] == ["a", "c"]
+    reg.get("b")
+    assert loads == ["a", "b", "c", "b"]
+    assert reg.stats()["evictions"] == 2
+
+
+def test_registry_invalidate_picks_up_new_latest():
+    reg, loads, latest = _fake_registry()
+    assert reg.get(None)[0] == "m1"
+    latest["id"] = "m2"
+    assert reg.get(None)[0] == "m1"
+    reg.invalidate()
+    assert reg.get(None)[0] == "m2"
+    assert loads == ["m1", "m2"]
@@ -0,0 +1,103 @@
+from app.nlp import get_segmenter, segment_many, segment_text
+
+
+def test_segmenter_is_built_once():
+    assert get_segmenter() is get_segmenter()
+
+
+def test_segment_many_matches_segment_text():
+    texts = ["Alpha. Beta sentence.", "Neuro intact.\n- MAP 70\n- Na 138", ""]
+    assert segment_many(texts) == [segment_text(t) for t in texts]
+
+
+ICU_FRAGMENTS = [
+    "Neuro: GCS 15, no focal deficit.",
+    "MAP 72 on norepi 0.05",
+    "Na: 138 K: 4.1",
+    "CT head without acute hemorrhage.",
+    "Plan to wean sedation.",
+    "Plan to wean sedation.",
+    "Vent: AC 450/16 PEEP 8 FiO2 40%",
+    "no change",
+    "  ",
+    "-",
+]
+SEPARATORS = ["\n- ", "\n* ", "\n-", "\n", " ", "  ", ". ", "\n\n"]
+
+
+def test_segment_offsets_roundtrip_on_synthetic_notes():
+    import random
+
+    rng = random.Random(1234)
+    for _ in range(50):
+        parts = []
+        for _ in range(rng.randint(50, 300)):
+            parts.append(rng.choice(SEPARATORS))
+            parts.append(rng.choice(ICU_FRAGMENTS))
+        text = "".join(parts)
+        sents = segment_text(text)
+        assert sents
+        prev_end = 0
+        for i, s in enumerate(sents):
+            assert s["idx"] == i
+            assert text[s["start_char"]:s["end_char"]] == s["text"]
+            assert s["text"] == s["text"].strip()
+            assert s["start_char"] >= prev_end
+            prev_end = s["end_char"]
+
+
+def _entities_for(text, words):
+    out = []
+    for w in words:
+        i = text.index(w)
+        out.append({"text": w, "start_char": i, "end_char": i + len(w)})
+    return out
+
+
+def test_entity_context_uses_sentence_scope():
+    from app.nlp import assign_entity_context
+
+    text = "Denies chest pain or fever but reports headache. History of stroke. Plan CT head today."
+    ents = assign_entity_context(text, segment_text(text), _entities_for(text, ["chest pain", "fever", "headache", "stroke", "CT head"]))
+    got = {e["text"]: (e["negated"], e["temporal"]) for e in ents}
+    assert got == {
+        "chest pain": (True, None),
+        "fever": (True, None),
+        "headache": (False, None),
+        "stroke": (False, "history"),
+        "CT head": (False, "plan"),
+    }
+
+
+def test_negation_window_is_configurable():
+    from app.nlp import assign_entity_context
+
+    text = "No hemorrhage, edema, shift, mass effect or hydrocephalus."
+    sents = segment_text(text)
+    narrow = assign_entity_context(text, sents, _entities_for(text, ["hemorrhage", "hydrocephalus"]), negation_window=2)
+    wide = assign_entity_context(text, sents, _entities_for(text, ["hemorrhage", "hydrocephalus"]), negation_window=10)
+    assert [e["negated"] for e in narrow] == [True, False]
+    assert [e["negated"] for e in wide] == [True, True]
+
+
+def test_assemble_structured_many_matches_single_doc():
+    from app.nlp import assemble_structured, assemble_structured_many
+
+    docs = [
+        [
+            {"label": "NEURO_EXAM", "text": " GCS 15 "},
+            {"label": "HEMODYNAMICS", "text": "MAP 72 on norepi"},
+            {"label": "HEMODYNAMICS", "text": "MAP: 65"},
+            {"label": "LAB", "text": "Na: 138 K: 4.1"},
+            {"label": "LAB", "text": "Na=140"},
+            {"label": "OTHER", "text": "ignored"},
+        ],
+        [],
+    ]
+    out = assemble_structured_many(docs)
+    assert out == [assemble_structured(d) for d in docs]
+    assert out[0]["neuro_exam"] == "GCS 15"
+    assert out[0]["hemodynamics"]["map"] == 65
+    assert out[0]["hemodynamics"]["pressors"] == ["MAP 72 on norepi"]
+    assert out[0]["labs"]["values"] == {"Na": "140", "K": "4.1"}
+    assert out[1]["labs"]["values"] == {} and out[1]["assessment"] == ""
@@ -0,0 +1,39 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.database import db, new_id, now_iso
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_keyset_pages_match_stream():
+    with db() as conn:
+        stamp = now_iso()
+        conn.executemany(
+            "INSERT INTO notes (id, created_at, source, raw_text) VALUES (?, ?, 'test', ?)",
+            [(new_id(), stamp, "x" * 1000) for _ in range(5)],
+        )
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 7, "fields": "preview"}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/api/notes/all", params=params).json()
+        assert len(page["results"]) <= 7
+        assert all(len(n["text"]) <= 300 for n in page["results"])
+        ids += [n["id"] for n in page["results"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    r = client.get("/api/notes/all/stream", params={"fields": "preview"})
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    streamed = [json.loads(line)["id"] for line in r.text.splitlines()]
+    assert ids == streamed
+    assert len(set(ids)) == len(ids)
+
+
+def test_notes_page_rejects_bad_cursor_and_fields():
+    assert client.get("/api/notes/all", params={"cursor": "garbage"}).status_code == 400
+    assert client.get("/api/notes/all", params={"fields": "everything"}).status_code == 422
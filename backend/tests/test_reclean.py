@@ -0,0 +1,45 @@
+from fastapi.testclient import TestClient
+
+from app import inference
+from app.database import db
+from app.main import app
+from app.run_writer import run_writer
+
+client = TestClient(app)
+
+NOTE = "MAP 70 on norepi. No focal deficit. CT head today."
+
+
+def _run_count():
+    run_writer.flush(timeout=5)
+    with db() as conn:
+        return conn.execute("SELECT COUNT(*) FROM inference_runs").fetchone()[0]
+
+
+def test_reclean_matches_full_inference_without_new_run(monkeypatch):
+    first = client.post('/api/infer', json={"text": NOTE, "keep_threshold": 0.5}).json()
+    run_id = first["meta"]["run_id"]
+    expected = {t: client.post('/api/infer', json={"text": NOTE, "keep_threshold": t}).json() for t in (0.0, 1.01)}
+
+    def fail(*args, **kwargs):
+        raise AssertionError("models should not run")
+
+    monkeypatch.setattr(inference, "_load_model", fail)
+    before = _run_count()
+    for t, full in expected.items():
+        out = client.post(f'/api/inference-runs/{run_id}/reclean', json={"keep_threshold": t})
+        assert out.status_code == 200
+        body = out.json()
+        assert body["cleaned_text"] == full["cleaned_text"]
+        assert body["meta"]["kept_sentence_count"] == full["meta"]["kept_sentence_count"]
+        assert body["meta"]["total_sentence_count"] == full["meta"]["total_sentence_count"]
+    assert _run_count() == before
+
+
+def test_reclean_unknown_run_is_404():
+    assert client.post('/api/inference-runs/missing/reclean', json={"keep_threshold": 0.5}).status_code == 404
+
+
+def test_clean_by_threshold_falls_back_to_sentence_text():
+    probs = [{"sentence": "Keep me.", "prob_keep": 0.9}, {"sentence": "Drop me.", "prob_keep": 0.1}]
+    assert inference.clean_by_threshold("ignored", probs, 0.5) == ("Keep me.", 1)
@@ -0,0 +1,52 @@
+from app import inference
+from app.inference import infer_batch
+from app.result_cache import ResultCache, cache_key, result_cache
+
+
+def test_cache_key_ignores_trailing_whitespace_only():
+    assert cache_key("CT head today.", "m1") == cache_key("CT head today.\n\n", "m1")
+    assert cache_key("CT head today.", "m1") != cache_key(" CT head today.", "m1")
+    assert cache_key("CT head today.", "m1") != cache_key("CT head today.", "m2")
+
+
+def test_memory_tier_evicts_least_recently_used_by_bytes():
+    cache = ResultCache(max_bytes=60, disk_path=None)
+    cache.put("a", {"v": "x" * 20})
+    cache.put("b", {"v": "y" * 20})
+    assert cache.get("a") == {"v": "x" * 20}
+    cache.put("c", {"v": "z" * 20})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= 60
+
+
+def test_disk_tier_survives_memory_eviction(tmp_path):
+    path = tmp_path / "cache.db"
+    cache = ResultCache(max_bytes=1024, disk_path=path)
+    cache.put("a", {"sentences": [], "probs": [0.2]})
+    fresh = ResultCache(max_bytes=1024, disk_path=path)
+    assert fresh.get("a") == {"sentences": [], "probs": [0.2]}
+    assert fresh.stats()["disk_hits"] == 1
+    assert fresh.get("a") is not None
+    assert fresh.stats()["memory_hits"] == 1
+
+
+def test_threshold_change_is_served_from_cache(monkeypatch):
+    result_cache.clear()
+    text = "MAP 70 on norepi. No focal deficit. CT head today."
+    first = infer_batch([text], keep_threshold=0.5, persist=False)[0]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cache miss")
+
+    monkeypatch.setattr(inference, "segment_many", fail)
+    monkeypatch.setattr(inference, "_keep_probs", fail)
+    monkeypatch.setattr(inference, "_entities", fail)
+    again = infer_batch([text], keep_threshold=0.5, persist=False)[0]
+    assert again == first
+    strict = infer_batch([text], keep_threshold=1.01, persist=False)[0]
+    assert strict["cleaned_text"] == ""
+    assert strict["meta"]["total_sentence_count"] == first["meta"]["total_sentence_count"]
+    assert strict["confidence"] == first["confidence"]
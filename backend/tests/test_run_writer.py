@@ -0,0 +1,52 @@
+import threading
+
+from app.database import db, new_id, now_iso
+from app.run_writer import RunWriter
+
+
+def _rows(n):
+    return [(new_id(), now_iso(), None, "txt", "txt", "{}", "{}") for _ in range(n)]
+
+
+def _count(ids):
+    with db() as conn:
+        marks = ",".join("?" * len(ids))
+        return conn.execute(f"SELECT COUNT(*) FROM inference_runs WHERE id IN ({marks})", ids).fetchone()[0]
+
+
+def test_async_writer_batches_and_flushes():
+    writer = RunWriter(mode="async", flush_rows=3, flush_interval=60)
+    rows = _rows(7)
+    writer.write(rows)
+    assert writer.flush(timeout=5)
+    assert _count([r[0] for r in rows]) == 7
+    assert writer.stats()["written"] == 7
+    assert writer.stats()["flushes"] == 3
+    writer.close()
+
+
+def test_close_flushes_pending_rows():
+    writer = RunWriter(mode="async", flush_rows=1000, flush_interval=60)
+    rows = _rows(4)
+    writer.write(rows)
+    writer.close()
+    assert _count([r[0] for r in rows]) == 4
+
+
+def test_off_mode_skips_persistence():
+    writer = RunWriter(mode="off")
+    rows = _rows(2)
+    writer.write(rows)
+    assert _count([r[0] for r in rows]) == 0
+    assert writer.stats()["dropped"] == 2
+
+
+def test_counters_are_exact_under_concurrent_writes():
+    writer = RunWriter(mode="off")
+    row = _rows(1)
+    threads = [threading.Thread(target=lambda: [writer.write(row) for _ in range(5000)]) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert writer.stats()["dropped"] == 40000
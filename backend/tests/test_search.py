@@ -0,0 +1,88 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import database
+from app.database import backfill_notes_fts, db, new_id, now_iso
+from app.db.repository import Repository
+from app.main import app
+from app.migrations import migrate
+
+client = TestClient(app)
+
+
+def _add_notes(texts):
+    with db() as conn:
+        conn.executemany(
+            "INSERT INTO notes (id, created_at, source, raw_text) VALUES (?, ?, 'test', ?)",
+            [(new_id(), now_iso(), t) for t in texts],
+        )
+
+
+def test_search_ranked_prefix_and_paginated():
+    tag = new_id().replace("-", "")[:10]
+    _add_notes([f"zq{tag} vasospasm"] * 5 + [f"zq{tag} zq{tag} zq{tag} vasospasm vasospasm"])
+    first = client.get("/api/notes/search", params={"q": f"zq{tag[:6]}", "limit": 4}).json()
+    assert len(first["results"]) == 4
+    assert "<mark>" in first["results"][0]["snippet"]
+    assert first["results"][0]["text"].count(f"zq{tag}") == 3
+    second = client.get("/api/notes/search", params={"q": f"zq{tag[:6]}", "limit": 4, "cursor": first["next_cursor"]}).json()
+    assert len(second["results"]) == 2 and second["next_cursor"] is None
+    ids = [r["id"] for r in first["results"] + second["results"]]
+    assert len(set(ids)) == 6
+    exact = client.get("/api/notes/search", params={"q": f"zq{tag[:6]}", "prefix": False}).json()
+    assert exact["results"] == []
+
+
+def test_search_tolerates_fts_syntax_and_bad_cursor():
+    assert client.get("/api/notes/search", params={"q": 'fever AND ("'}).status_code == 200
+    assert client.get("/api/notes/search", params={"q": "***"}).json() == {"results": [], "next_cursor": None}
+    assert client.get("/api/notes/search", params={"q": "fever", "cursor": "nope"}).status_code == 400
+
+
+@pytest.mark.parametrize("cursor", ["AAAA", "MQ==", "W10=", "WzEsIHt9XQ==", "%%%", "é"])
+def test_malformed_cursors_are_400(cursor):
+    # Undecodable bytes, a bare number, an empty list, a non-scalar value and non-base64 input.
+    assert client.get("/api/notes/search", params={"q": "fever", "cursor": cursor}).status_code == 400
+    assert client.get("/api/notes/all", params={"cursor": cursor}).status_code == 400
+
+
+def test_backfill_indexes_preexisting_notes(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "fts.db")
+    with db() as conn:
+        migrate(conn, target=1)
+    _add_notes([f"legacy note {i} hemicraniectomy" for i in range(5)])
+    with db() as conn:
+        migrate(conn)
+    assert Repository().search_notes("hemicraniectomy")["results"] == []
+    _add_notes(["fresh note hemicraniectomy"])
+    assert backfill_notes_fts(chunk_size=2) == 5
+    assert backfill_notes_fts(chunk_size=2) == 0
+    assert len(Repository().search_notes("hemicraniectomy")["results"]) == 6
+
+
+def test_search_survives_vacuum_renumbering_notes():
+    tag = new_id().replace("-", "")[:10]
+    _add_notes([f"filler {i}" for i in range(20)])
+    _add_notes([f"zq{tag} craniotomy {i}" for i in range(3)])
+    with db() as conn:
+        conn.execute("DELETE FROM notes WHERE raw_text LIKE 'filler %'")
+    # notes has a TEXT primary key, so VACUUM is free to renumber its rowids.
+    database.get_conn().execute("VACUUM")
+    results = Repository().search_notes(f"zq{tag}")["results"]
+    assert sorted(r["text"] for r in results) == [f"zq{tag} craniotomy {i}" for i in range(3)]
+
+
+def test_notes_changed_before_backfill_keep_the_index_consistent(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "fts.db")
+    with db() as conn:
+        migrate(conn, target=1)
+    _add_notes([f"legacy note {i} ventriculostomy" for i in range(4)])
+    with db() as conn:
+        migrate(conn)
+        conn.execute("DELETE FROM notes WHERE raw_text = 'legacy note 0 ventriculostomy'")
+        conn.execute("UPDATE notes SET raw_text = 'legacy note 1 lumbar drain' WHERE raw_text = 'legacy note 1 ventriculostomy'")
+    assert backfill_notes_fts() == 3
+    with db() as conn:
+        conn.execute("INSERT INTO notes_fts(notes_fts) VALUES ('integrity-check')")
+    assert len(Repository().search_notes("ventriculostomy")["results"]) == 2
+    assert len(Repository().search_notes("lumbar")["results"]) == 1
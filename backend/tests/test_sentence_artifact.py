@@ -0,0 +1,70 @@
+import json
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+from app.inference import load_sentence_model
+from app.sentence_artifact import save_sentence_artifact
+from app.sentence_scorer import VOCAB_PREFIX
+
+TEXTS = [
+    "Na 138 this morning.",
+    "Café au lait spots noted on exam.",
+    "CT head negative for bleed.",
+    "Plan to wean sedation.",
+    "No focal deficit.",
+    "MAP 65 on norepi.",
+] * 3
+LABELS = [1, 0, 1, 0, 1, 0] * 3
+UNSEEN = ["café spots", "CT head today, negative", "zzz qqq", "", "ñandú"]
+
+
+@pytest.mark.parametrize("vec,clf", [
+    (TfidfVectorizer(ngram_range=(1, 2)), LogisticRegression()),
+    (TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True), LogisticRegression()),
+    (HashingVectorizer(ngram_range=(1, 2), alternate_sign=False, n_features=2 ** 12), SGDClassifier(loss="log_loss", random_state=0)),
+])
+def test_compact_artifact_matches_sklearn(tmp_path, vec, clf):
+    clf.fit(vec.fit_transform(TEXTS), LABELS)
+    save_sentence_artifact({"vectorizer": vec, "classifier": clf}, tmp_path / "sentence")
+    model = load_sentence_model(tmp_path / "sentence")
+    assert isinstance(model.coef, np.memmap)
+    expected = clf.predict_proba(vec.transform(TEXTS + UNSEEN))[:, 1]
+    np.testing.assert_allclose(model.keep_probs(TEXTS + UNSEEN), expected, rtol=0, atol=1e-9)
+
+
+def test_long_token_costs_only_its_own_bytes(tmp_path):
+    texts = TEXTS + ["_" * 400 + " noted", "_" * 399 + " noted"]
+    vec = TfidfVectorizer(ngram_range=(1, 2))
+    clf = LogisticRegression().fit(vec.fit_transform(texts), LABELS + [1, 0])
+    save_sentence_artifact({"vectorizer": vec, "classifier": clf}, tmp_path / "sentence")
+    term_bytes = sum(len(t.encode("utf-8")) for t in vec.vocabulary_)
+    size = sum(f.stat().st_size for f in (tmp_path / "sentence").glob("vocab_*.npy"))
+    # Each term adds an offset and a prefix-table entry next to its bytes; .npy headers are 128 bytes.
+    assert size <= term_bytes + (len(vec.vocabulary_) + 1) * (8 + VOCAB_PREFIX) + 3 * 128
+    queries = texts + ["_" * 401, "_" * 400, "_" * 16, "_" * 17 + " noted"]
+    expected = clf.predict_proba(vec.transform(queries))[:, 1]
+    np.testing.assert_allclose(load_sentence_model(tmp_path / "sentence").keep_probs(queries), expected, rtol=0, atol=1e-9)
+
+
+def test_unknown_artifact_format_is_rejected(tmp_path):
+    vec = TfidfVectorizer()
+    clf = LogisticRegression().fit(vec.fit_transform(TEXTS), LABELS)
+    path = tmp_path / "sentence"
+    save_sentence_artifact({"vectorizer": vec, "classifier": clf}, path)
+    meta = json.loads((path / "meta.json").read_text())
+    (path / "meta.json").write_text(json.dumps({**meta, "format": "mnc-sentence-v1"}))
+    with pytest.raises(ValueError, match="mnc-sentence-v1"):
+        load_sentence_model(path)
+
+
+def test_legacy_pickle_still_loads(tmp_path):
+    vec = TfidfVectorizer()
+    clf = LogisticRegression().fit(vec.fit_transform(TEXTS), LABELS)
+    with open(tmp_path / "sentence.pkl", "wb") as f:
+        pickle.dump({"vectorizer": vec, "classifier": clf}, f)
+    expected = clf.predict_proba(vec.transform(UNSEEN))[:, 1]
+    np.testing.assert_allclose(load_sentence_model(tmp_path / "sentence.pkl").keep_probs(UNSEEN), expected, rtol=0, atol=1e-9)
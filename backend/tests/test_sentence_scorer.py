@@ -0,0 +1,45 @@
+import random
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+from app.sentence_scorer import SentenceScorer
+
+WORDS = ["na", "k", "cr", "ct", "mri", "head", "négative", "plan", "wean", "sedation", "no", "the", "of", "focal", "deficit", "138", "4.1", "café"]
+
+
+def _corpus(n, seed):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12))) for _ in range(n)]
+
+
+@pytest.mark.parametrize("vec,clf", [
+    (TfidfVectorizer(ngram_range=(1, 2)), LogisticRegression(max_iter=200)),
+    (TfidfVectorizer(ngram_range=(1, 3), sublinear_tf=True, strip_accents="unicode", stop_words="english"), LogisticRegression(max_iter=200)),
+    (TfidfVectorizer(binary=True, norm="l1", use_idf=False, lowercase=False), LogisticRegression(max_iter=200)),
+    (HashingVectorizer(ngram_range=(1, 2), alternate_sign=False, n_features=2 ** 10), SGDClassifier(loss="log_loss", random_state=0)),
+    (HashingVectorizer(ngram_range=(1, 2), n_features=2 ** 6), SGDClassifier(loss="log_loss", random_state=0)),
+])
+def test_scorer_matches_sklearn_probabilities(vec, clf):
+    texts = _corpus(400, 0)
+    clf.fit(vec.fit_transform(texts), [i % 2 for i in range(len(texts))])
+    scorer = SentenceScorer.from_sklearn({"vectorizer": vec, "classifier": clf})
+    unseen = _corpus(200, 1) + ["", "zzz unseen words", "CAFÉ Négative"]
+    expected = clf.predict_proba(vec.transform(unseen))[:, 1]
+    np.testing.assert_allclose(scorer.keep_probs(unseen), expected, rtol=0, atol=1e-9)
+    if isinstance(vec, TfidfVectorizer):
+        # Columns are in the scorer's term order, so compare the values and per-row nonzero counts.
+        X, Y = scorer.transform(unseen), vec.transform(unseen)
+        np.testing.assert_allclose(np.sort(X.data), np.sort(Y.data), rtol=0, atol=1e-12)
+        assert (np.diff(X.indptr) == np.diff(Y.indptr)).all()
+
+
+def test_scorer_handles_empty_batches_and_unknown_terms():
+    vec = TfidfVectorizer()
+    clf = LogisticRegression().fit(vec.fit_transform(["keep this", "drop that"]), [1, 0])
+    scorer = SentenceScorer.from_sklearn({"vectorizer": vec, "classifier": clf})
+    assert scorer.keep_probs([]).shape == (0,)
+    unknown = ["Pt 3.", "zzz qqq", ""]
+    np.testing.assert_allclose(scorer.keep_probs(unknown), clf.predict_proba(vec.transform(unknown))[:, 1], rtol=0, atol=1e-9)
@@ -0,0 +1,44 @@
+import spacy
+from spacy.training import Example
+
+from app import training
+from app.training import _train_ner
+
+NOTES = [
+    ("Na 138 this morning.", [(0, 6, "LAB")]),
+    ("K 4.1 after repletion.", [(0, 5, "LAB")]),
+    ("CT head negative.", [(0, 7, "IMAGING")]),
+    ("MRI brain pending.", [(0, 9, "IMAGING")]),
+    ("Cr 1.2 stable.", [(0, 6, "LAB")]),
+    ("CTA neck today.", [(0, 8, "IMAGING")]),
+]
+
+
+def _examples():
+    nlp = spacy.blank("en")
+    ner = nlp.add_pipe("ner")
+    for label in ("LAB", "IMAGING"):
+        ner.add_label(label)
+    return nlp, [Example.from_dict(nlp.make_doc(t), {"entities": ents}) for t, ents in NOTES]
+
+
+def test_train_ner_respects_step_budget_and_checkpoints_best(tmp_path, monkeypatch):
+    monkeypatch.setattr(training, "NER_EVAL_EVERY", 1)
+    monkeypatch.setattr(training, "NER_PATIENCE", 1000)
+    nlp, examples = _examples()
+    out, _ = _train_ner(nlp, lambda: iter(examples), max_steps=7, lr=0.001, dropout=0.1, batch_size=4, ner_path=tmp_path / "ner")
+    assert out["steps"] == 7
+    assert out["dev_examples"] == 2 and out["train_examples"] == 4
+    assert out["best"]["step"] <= 7
+    assert spacy.load(tmp_path / "ner").pipe_names == ["ner"]
+
+
+def test_train_ner_stops_early_without_dev_improvement(tmp_path, monkeypatch):
+    monkeypatch.setattr(training, "NER_EVAL_EVERY", 1)
+    monkeypatch.setattr(training, "NER_PATIENCE", 2)
+    nlp, examples = _examples()
+    # With a learning rate of zero the dev F1 can never improve after the first evaluation.
+    out, _ = _train_ner(nlp, lambda: iter(examples), max_steps=500, lr=0.0, dropout=0.0, batch_size=4, ner_path=tmp_path / "ner")
+    assert out["early_stopped"]
+    assert out["steps"] == 3
+    assert out["best"]["step"] == 1
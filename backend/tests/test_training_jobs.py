@@ -0,0 +1,134 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from app import database, training_jobs
+from app.database import db, init_db, seed_data_if_empty
+from app.model_registry import model_registry
+from app.training_jobs import (
+    _local_procs,
+    TrainingBusy,
+    TrainingCancelled,
+    _expire_stale,
+    cancel_training,
+    get_training_job,
+    get_training_progress,
+    report_progress,
+    start_training,
+)
+
+CONFIG = {"base_model": "en", "max_steps": 5, "lr": 0.001, "dropout": 0.2, "batch_size": 32}
+
+
+@pytest.fixture
+def train_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "train.db")
+    model_registry.invalidate()
+    init_db()
+    seed_data_if_empty()
+    yield
+    # Let watcher threads finish against this database before it is swapped out.
+    deadline = time.monotonic() + 60
+    while _local_procs and time.monotonic() < deadline:
+        time.sleep(0.1)
+    model_registry.invalidate()
+
+
+def _wait(job_id, timeout=120):
+    deadline = time.monotonic() + timeout
+    while (job := get_training_job(job_id))["status"] in ("queued", "training"):
+        assert time.monotonic() < deadline
+        time.sleep(0.2)
+    return job
+
+
+def _insert_job(job_id, status, heartbeat=None):
+    with db() as conn:
+        conn.execute(
+            "INSERT INTO training_jobs (id, created_at, updated_at, status, config_json, heartbeat_at) VALUES (?, '2000-01-01T00:00:00', '', ?, '{}', ?)",
+            (job_id, status, heartbeat),
+        )
+
+
+def test_training_runs_in_subprocess_and_persists_progress(train_db, model_dir):
+    assert get_training_progress()["status"] == "idle"
+    job = start_training(CONFIG)
+    with pytest.raises(TrainingBusy):
+        start_training(CONFIG)
+    done = _wait(job["id"])
+    assert done["status"] == "complete", done["error"]
+    assert done["progress"] == 100
+    assert len(done["losses"]) == 5
+    assert done["metrics"]["sentence"]
+    with db() as conn:
+        row = conn.execute("SELECT spacy_model_path, sentence_model_path FROM model_versions WHERE id=?", (done["model_version_id"],)).fetchone()
+    # The subprocess writes into the configured model directory, not backend/models.
+    assert {Path(row["spacy_model_path"]).parent, Path(row["sentence_model_path"]).parent} == {model_dir / done["model_version_id"]}
+    assert [p.name for p in model_dir.iterdir()] == [done["model_version_id"]]
+    assert get_training_progress()["model_version_id"] == done["model_version_id"]
+
+
+def test_cancelled_training_leaves_no_model(train_db):
+    job = start_training(CONFIG)
+    assert cancel_training(job["id"])["status"] == "cancelled"
+    assert get_training_job(job["id"])["status"] == "cancelled"
+    with db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM model_versions").fetchone()[0] == 0
+
+
+def test_cancelling_a_run_in_flight_leaves_nothing_behind(train_db, model_dir):
+    # No dev split on the seed corpus, so nothing stops NER early; the run is cancelled mid-loop.
+    job = start_training({**CONFIG, "max_steps": 100000})
+    deadline = time.monotonic() + 120
+    while not get_training_job(job["id"])["losses"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.2)
+    proc = _local_procs[job["id"]]
+    assert cancel_training(job["id"])["status"] == "cancelled"
+    proc.join(60)
+    # SIGTERM is handled: the process cleans up and exits normally rather than dying mid-write.
+    assert proc.exitcode == 0
+    assert list(model_dir.iterdir()) == []
+    with db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM model_versions").fetchone()[0] == 0
+
+
+def test_step_progress_is_throttled(train_db, monkeypatch):
+    monkeypatch.setattr(training_jobs, "PROGRESS_INTERVAL", 60)
+    _insert_job("t1", "training")
+    for loss in (1.0, 2.0, 3.0):
+        report_progress("t1", 60, "ner", loss)
+    assert get_training_job("t1")["losses"] == [1.0]
+    # A stage change writes the buffered step losses along with it.
+    report_progress("t1", 90, "saving")
+    job = get_training_job("t1")
+    assert (job["losses"], job["stage"]) == ([1.0, 2.0, 3.0], "saving")
+
+
+def test_report_progress_raises_once_cancelled(train_db, monkeypatch):
+    monkeypatch.setattr(training_jobs, "PROGRESS_INTERVAL", 0)
+    _insert_job("t1", "training")
+    report_progress("t1", 10, "ner", 1.5)
+    assert get_training_job("t1")["losses"] == [1.5]
+    cancel_training("t1")
+    with pytest.raises(TrainingCancelled):
+        report_progress("t1", 20, "ner", 1.0)
+
+
+def test_stale_active_job_no_longer_blocks_training(train_db):
+    _insert_job("old", "training", heartbeat="2000-01-01T00:00:00")
+    _expire_stale()
+    assert get_training_job("old")["status"] == "error"
+
+
+def test_training_subprocess_can_evaluate_with_a_process_pool(train_db, monkeypatch):
+    # The training child re-reads these at import: every held-out note becomes its own chunk,
+    # so evaluation opens a pool from inside the training process.
+    monkeypatch.setenv("MNC_EVAL_MIN_CHUNK", "1")
+    monkeypatch.setenv("MNC_EVAL_WORKERS", "2")
+    done = _wait(start_training(CONFIG)["id"])
+    assert done["status"] == "complete", done["error"]
+    ner = done["metrics"]["ner"]
+    assert ner["documents"] > 1
+    assert ner["processes"] == 2
@@ -0,0 +1,69 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import database, main, warmup as warmup_module
+from app.database import init_db
+from app.model_registry import model_registry
+from app.warmup import Warmup
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "warmup.db")
+    init_db()
+    model_registry.invalidate()
+    return TestClient(main.app)
+
+
+def test_health_reports_ready_only_after_warmup(client, monkeypatch):
+    w = Warmup("sync")
+    monkeypatch.setattr(main, "warmup", w)
+    res = client.get("/api/health")
+    assert res.status_code == 503 and res.json()["status"] == "pending"
+    assert client.get("/api/ready").status_code == 503
+    w.start()
+    res = client.get("/api/health")
+    assert res.status_code == 200
+    body = res.json()
+    assert body["status"] == "ready" and body["seconds"] > 0 and body["error"] is None
+
+
+def test_failed_warmup_retries_then_reports_degraded(client, monkeypatch):
+    calls = []
+
+    def broken(*args, **kwargs):
+        calls.append(1)
+        raise RuntimeError("model files missing")
+
+    monkeypatch.setattr(warmup_module, "infer_batch", broken)
+    w = Warmup("sync", retries=2, backoff=0)
+    monkeypatch.setattr(main, "warmup", w)
+    w.start()
+    assert len(calls) == 3
+    res = client.get("/api/health")
+    assert res.status_code == 200
+    body = res.json()
+    assert body["status"] == "degraded" and body["attempts"] == 3 and "model files missing" in body["error"]
+    assert client.get("/api/ready").status_code == 503
+
+
+def test_warmup_recovers_from_a_transient_failure(client, monkeypatch):
+    calls = []
+
+    def flaky(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(warmup_module, "infer_batch", flaky)
+    w = Warmup("sync", retries=2, backoff=0)
+    monkeypatch.setattr(main, "warmup", w)
+    w.start()
+    body = client.get("/api/health").json()
+    assert body["status"] == "ready" and body["attempts"] == 2 and body["error"] is None
+    assert client.get("/api/ready").status_code == 200
+
+
+def test_warmup_off_is_ready_immediately(client, monkeypatch):
+    monkeypatch.setattr(main, "warmup", Warmup("off"))
+    assert client.get("/api/health").json()["status"] == "ready"
@@ -7,16 +7,31 @@ import { GlassCard } from '@/components/ui/GlassCard'
 
 export default function Batch() {
     const [inputText, setInputText] = useState('')
-    const [results, setResults] = useState<Array<{ input: string; result: InferenceResult }>>([])
+    const [results, setResults] = useState<Array<{ input: string; result?: InferenceResult; error?: string } | undefined>>([])
+    const [progress, setProgress] = useState<{ done: number; total: number; errors: number } | null>(null)
     const [loading, setLoading] = useState(false)
 
     const processBatch = async () => {
         const lines = inputText.split('\n').filter(l => l.trim())
         if (!lines.length) return
         setLoading(true)
+        setResults(new Array(lines.length))
+        setProgress({ done: 0, total: lines.length, errors: 0 })
         try {
-            const resp = await api.inference.batch(lines)
-            setResults(lines.map((input, i) => ({ input, result: resp.results[i] })))
+            await api.inference.batchStream(lines, (event) => {
+                if (event.event === 'result' || event.event === 'error') {
+                    const row = event.event === 'result'
+                        ? { input: lines[event.index], result: event.result }
+                        : { input: lines[event.index], error: event.detail }
+                    setResults(prev => {
+                        const next = [...prev]
+                        next[event.index] = row
+                        return next
+                    })
+                } else if (event.event === 'progress') {
+                    setProgress({ done: event.done, total: lines.length, errors: event.errors })
+                }
+            })
         } catch (error) {
             console.error('Batch failed:', error)
         } finally {
@@ -24,9 +39,13 @@ export default function Batch() {
         }
     }
 
+    const completed = results.filter((r): r is { input: string; result: InferenceResult } => !!r?.result)
+    // Results and errors both keep their input position, so a failed note shows up where it was entered.
+    const tableRows = results.flatMap((r, index) => (r ? [{ ...r, index }] : []))
+
     const downloadCSV = () => {
         const headers = ['Original', 'Cleaned', 'Findings']
-        const rows = results.map(r => [
+        const rows = completed.map(r => [
             `"${r.input.replace(/"/g, '""')}"`,
             `"${r.result.cleaned_text.replace(/"/g, '""')}"`,
             `"${JSON.stringify(r.result.structured_json).replace(/"/g, '""')}"`
@@ -63,12 +82,27 @@ export default function Batch() {
                 >
                     {loading ? 'Processing Batch...' : 'Run Batch Analysis'}
                 </button>
+                {progress && (
+                    <div className="mt-4 space-y-1">
+                        <div className="h-1.5 bg-slate-800 rounded-full overflow-hidden">
+                            <div
+                                className="h-full bg-sky-500 transition-all"
+                                style={{ width: `${(100 * progress.done) / Math.max(1, progress.total)}%` }}
+                            />
+                        </div>
+                        <p className="text-[10px] font-bold text-slate-500 uppercase tracking-widest">
+                            {progress.done} / {progress.total} notes{progress.errors ? ` · ${progress.errors} failed` : ''}
+                        </p>
+                    </div>
+                )}
             </GlassCard>
 
-            {results.length > 0 && (
+            {tableRows.length > 0 && (
                 <div className="space-y-4">
                     <div className="flex items-center justify-between px-2">
-                        <h2 className="text-xl font-bold text-slate-100">Results ({results.length})</h2>
+                        <h2 className="text-xl font-bold text-slate-100">
+                            Results ({completed.length}){tableRows.length > completed.length ? ` · ${tableRows.length - completed.length} failed` : ''}
+                        </h2>
                         <button
                             onClick={downloadCSV}
                             className="text-sm text-sky-400 hover:text-sky-300 font-medium flex items-center gap-2 px-3 py-1.5 bg-sky-500/10 rounded-lg transition-colors border border-sky-500/20"
@@ -86,8 +120,8 @@ export default function Batch() {
                                 </tr>
                             </thead>
                             <tbody className="divide-y divide-slate-800">
-                                {results.map((r, i) => (
-                                    <tr key={i} className="hover:bg-slate-800/30 transition-colors group">
+                                {tableRows.map((r) => r.result ? (
+                                    <tr key={r.index} className="hover:bg-slate-800/30 transition-colors group">
                                         <td className="px-4 py-3 text-slate-500 font-mono truncate max-w-[200px]">{r.input}</td>
                                         <td className="px-4 py-3 text-slate-200">{r.result.cleaned_text.slice(0, 50)}...</td>
                                         <td className="px-4 py-3">
@@ -100,6 +134,13 @@ export default function Batch() {
                                             </div>
                                         </td>
                                     </tr>
+                                ) : (
+                                    <tr key={r.index} className="bg-rose-500/5">
+                                        <td className="px-4 py-3 text-slate-500 font-mono truncate max-w-[200px]">{r.input}</td>
+                                        <td colSpan={2} className="px-4 py-3 text-rose-400 text-xs font-mono break-words">
+                                            Note {r.index + 1} failed: {r.error}
+                                        </td>
+                                    </tr>
                                 ))}
                             </tbody>
                         </table>
@@ -2,25 +2,41 @@
 
 import { useState, useEffect } from 'react'
 import { api } from '@/lib/api'
-import { Note } from '@/lib/types'
+import { Note, NoteSearchResult } from '@/lib/types'
 import { GlassCard } from '@/components/ui/GlassCard'
 import { Skeleton } from '@/components/ui/Skeleton'
 
 export default function History() {
-    const [notes, setNotes] = useState<Note[]>([])
+    const [notes, setNotes] = useState<Array<Note | NoteSearchResult>>([])
+    const [nextCursor, setNextCursor] = useState<string | null>(null)
+    const [activeQuery, setActiveQuery] = useState('')
     const [query, setQuery] = useState('')
     const [loading, setLoading] = useState(false)
 
     const fetchNotes = async (q = '') => {
         setLoading(true)
         try {
-            const data = q ? await api.notes.search(q) : await api.notes.all()
-            setNotes(data)
+            const page = q ? await api.notes.search(q) : await api.notes.all()
+            setNotes(page.results)
+            setNextCursor(page.next_cursor)
+            setActiveQuery(q)
         } finally {
             setLoading(false)
         }
     }
 
+    const loadMore = async () => {
+        if (!nextCursor) return
+        const page = activeQuery ? await api.notes.search(activeQuery, nextCursor) : await api.notes.all(nextCursor)
+        setNotes(prev => [...prev, ...page.results])
+        setNextCursor(page.next_cursor)
+    }
+
+    const renderSnippet = (snippet: string) =>
+        snippet.split(/<mark>(.*?)<\/mark>/g).map((part, i) =>
+            i % 2 ? <mark key={i} className="bg-sky-500/30 text-sky-100 rounded px-0.5">{part}</mark> : part
+        )
+
     useEffect(() => {
         fetchNotes()
     }, [])
@@ -65,13 +81,18 @@ export default function History() {
                                     <span className="text-[10px] font-mono text-sky-500 uppercase tracking-widest">Note #{n.id.slice(0, 6)}</span>
                                     <span className="text-xs text-slate-500">{new Date(n.date).toLocaleDateString()}</span>
                                 </div>
-                                <p className="text-slate-300 line-clamp-2 italic text-sm">"{n.text}"</p>
+                                <p className="text-slate-300 line-clamp-2 italic text-sm">"{'snippet' in n ? renderSnippet(n.snippet) : n.text}"</p>
                                 <div className="mt-4 flex items-center gap-4 text-[10px] text-slate-500 font-bold uppercase">
                                     <span className="group-hover:text-sky-400 transition-colors">📄 View Details</span>
                                     <span className="group-hover:text-emerald-400 transition-colors">🧠 Re-run Inference</span>
                                 </div>
                             </GlassCard>
                         ))}
+                        {nextCursor && (
+                            <button onClick={loadMore} className="w-full btn-primary">
+                                Load more
+                            </button>
+                        )}
                         {notes.length === 0 && (
                             <div className="text-center py-20 border-2 border-dashed border-slate-800 rounded-xl text-slate-600">
                                 No history found for "{query}"
@@ -24,13 +24,28 @@ export default function Infer() {
     }
   }, [text, threshold])
 
-  // Debounced inference
+  // Debounced inference; only text edits re-run the models
   useEffect(() => {
     const timer = setTimeout(() => {
       if (text.length > 10) runInference()
     }, 800)
     return () => clearTimeout(timer)
-  }, [text, threshold, runInference])
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [text])
+
+  // Slider moves re-filter the stored sentence probabilities of the last run
+  const runId = result?.meta.run_id
+  useEffect(() => {
+    if (!runId || result?.meta.keep_threshold === threshold) return
+    let cancelled = false
+    api.inference.reclean(runId, threshold)
+      .then((out) => {
+        if (!cancelled) setResult((prev) => prev && { ...prev, cleaned_text: out.cleaned_text, meta: { ...prev.meta, ...out.meta } })
+      })
+      .catch((err) => console.error('Re-clean failed:', err))
+    return () => { cancelled = true }
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [runId, threshold])
 
   return (
     <div className="flex flex-col h-[calc(100vh-80px)] space-y-6">
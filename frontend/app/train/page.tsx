@@ -2,11 +2,11 @@
 
 import { useEffect, useState } from 'react'
 import { api } from '@/lib/api'
-import { Model } from '@/lib/types'
+import { Model, TrainingProgress } from '@/lib/types'
 import { GlassCard } from '@/components/ui/GlassCard'
 
 export default function Train() {
-  const [progress, setProgress] = useState<{ status: string; progress: number }>({ status: 'idle', progress: 0 })
+  const [progress, setProgress] = useState<TrainingProgress>({ status: 'idle', progress: 0, metrics: null })
   const [models, setModels] = useState<Model[]>([])
   const [config, setConfig] = useState({
     base_model: 'en_core_web_sm',
@@ -29,9 +29,12 @@ export default function Train() {
   }, [])
 
   const startTraining = () => {
-    api.models.train(config)
+    api.models.train(config).catch((err) => console.error('Training not started:', err))
   }
 
+  const active = progress.status === 'queued' || progress.status === 'training'
+  const lastLoss = progress.losses?.length ? progress.losses[progress.losses.length - 1] : null
+
   return (
     <div className="space-y-8 max-w-5xl">
       <header>
@@ -97,10 +100,10 @@ export default function Train() {
 
             <button
               onClick={startTraining}
-              disabled={progress.status === 'training'}
+              disabled={active}
               className="w-full btn-primary h-12 text-lg mt-8"
             >
-              {progress.status === 'training' ? 'Training in Progress...' : 'Launch Training Pipeline'}
+              {active ? 'Training in Progress...' : 'Launch Training Pipeline'}
             </button>
           </GlassCard>
 
@@ -113,8 +116,18 @@ export default function Train() {
                 />
               </div>
               <p className="text-xs text-slate-500 text-center mt-4">
-                Processing components: <span className="text-slate-300">ner, parser, tagger</span>
+                {progress.error
+                  ? <span className="text-rose-400">{progress.error}</span>
+                  : <>Stage: <span className="text-slate-300">{progress.stage ?? progress.status}</span>{lastLoss !== null && <> · loss <span className="text-slate-300">{lastLoss.toFixed(3)}</span></>}</>}
               </p>
+              {active && progress.job_id && (
+                <button
+                  onClick={() => api.models.cancel(progress.job_id!)}
+                  className="w-full mt-4 py-2 border border-slate-700 hover:border-rose-500/50 rounded-lg text-xs font-bold text-slate-400 uppercase tracking-widest transition-all"
+                >
+                  Cancel Training
+                </button>
+              )}
             </GlassCard>
           )}
         </div>
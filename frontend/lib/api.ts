@@ -1,4 +1,4 @@
-import { DashboardStats, InferenceResult, Model, Note } from './types';
+import { BatchStreamEvent, DashboardStats, InferenceResult, Model, NotePage, NoteSearchPage, RecleanResult, TrainingProgress } from './types';
 
 const API_BASE = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
@@ -19,6 +19,32 @@ async function request<T>(path: string, options?: RequestInit): Promise<T> {
     return response.json();
 }
 
+async function streamNdjson<T>(path: string, body: unknown, onEvent: (event: T) => void): Promise<void> {
+    const response = await fetch(`${API_BASE}${path}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body),
+    });
+    if (!response.ok || !response.body) {
+        const error = await response.json().catch(() => ({ detail: 'Unknown error' }));
+        throw new Error(error.detail || response.statusText);
+    }
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+        const { done, value } = await reader.read();
+        buffer += decoder.decode(value, { stream: !done });
+        const lines = buffer.split('\n');
+        buffer = lines.pop() ?? '';
+        for (const line of lines) {
+            if (line.trim()) onEvent(JSON.parse(line));
+        }
+        if (done) break;
+    }
+    if (buffer.trim()) onEvent(JSON.parse(buffer));
+}
+
 export const api = {
     stats: {
         get: () => request<DashboardStats>('/api/dashboard/stats'),
@@ -26,11 +52,14 @@ export const api = {
     models: {
         list: () => request<Model[]>('/api/models'),
         train: (config: any) => request('/api/train', { method: 'POST', body: JSON.stringify(config) }),
-        progress: () => request<{ status: string; progress: number }>('/api/train/progress'),
+        progress: () => request<TrainingProgress>('/api/train/progress'),
+        cancel: (jobId: string) => request<unknown>(`/api/train/jobs/${jobId}/cancel`, { method: 'POST' }),
     },
     notes: {
-        all: () => request<Note[]>('/api/notes/all'),
-        search: (q: string) => request<Note[]>(`/api/notes/search?q=${encodeURIComponent(q)}`),
+        all: (cursor?: string) =>
+            request<NotePage>(`/api/notes/all?fields=preview${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`),
+        search: (q: string, cursor?: string) =>
+            request<NoteSearchPage>(`/api/notes/search?q=${encodeURIComponent(q)}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`),
     },
     inference: {
         run: (text: string, modelId?: string, threshold?: number) =>
@@ -38,6 +67,13 @@ export const api = {
                 method: 'POST',
                 body: JSON.stringify({ text, model_version_id: modelId, keep_threshold: threshold }),
             }),
+        reclean: (runId: string, threshold: number) =>
+            request<RecleanResult>(`/api/inference-runs/${runId}/reclean`, {
+                method: 'POST',
+                body: JSON.stringify({ keep_threshold: threshold }),
+            }),
+        batchStream: (texts: string[], onEvent: (event: BatchStreamEvent) => void, modelId?: string, threshold?: number) =>
+            streamNdjson<BatchStreamEvent>('/api/infer/batch/stream', { texts, model_version_id: modelId, keep_threshold: threshold }, onEvent),
         batch: (texts: string[], modelId?: string, threshold?: number) =>
             request<{ count: number; results: InferenceResult[] }>('/api/infer/batch/export', {
                 method: 'POST',
@@ -4,6 +4,21 @@ export interface Note {
     date: string;
 }
 
+export interface NotePage {
+    results: Note[];
+    next_cursor: string | null;
+}
+
+export interface NoteSearchResult extends Note {
+    snippet: string;
+    rank: number;
+}
+
+export interface NoteSearchPage {
+    results: NoteSearchResult[];
+    next_cursor: string | null;
+}
+
 export interface Model {
     id: string;
     version: string;
@@ -37,14 +52,40 @@ export interface InferenceResult {
     cleaned_text: string;
     structured_json: Record<string, unknown>;
     confidence: {
-        sentence_keep_probs: Array<{ sentence: string; prob_keep: number }>;
+        sentence_keep_probs: Array<{ sentence: string; prob_keep: number; start_char?: number; end_char?: number }>;
         entities: InferenceEntity[];
     };
     warnings: string[];
-    meta: {
-        model_version_id: string | null;
-        keep_threshold: number;
-        kept_sentence_count: number;
-        total_sentence_count: number;
-    };
+    meta: InferenceMeta;
+}
+
+export interface InferenceMeta {
+    model_version_id: string | null;
+    keep_threshold: number;
+    kept_sentence_count: number;
+    total_sentence_count: number;
+    run_id?: string;
+}
+
+export interface RecleanResult {
+    run_id: string;
+    cleaned_text: string;
+    meta: InferenceMeta;
+}
+
+export type BatchStreamEvent =
+    | { event: 'result'; index: number; result: InferenceResult }
+    | { event: 'error'; index: number; detail: string }
+    | { event: 'progress'; done: number; errors: number; total: number | null }
+    | { event: 'done'; count: number; errors: number };
+
+export interface TrainingProgress {
+    status: 'idle' | 'queued' | 'training' | 'complete' | 'error' | 'cancelled';
+    progress: number;
+    metrics: Record<string, unknown> | null;
+    error?: string | null;
+    job_id?: string;
+    stage?: string | null;
+    losses?: number[];
+    model_version_id?: string | null;
 }
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""assemble_structured: legacy if/elif + string +=, a dispatch table built per document, and assemble_structured_many with its setup hoisted per batch."""
+import argparse
+import gc
+import random
+import re
+import time
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'backend'))
+from app.nlp import LAB_RE, MAP_RE, assemble_structured, assemble_structured_many
+
+SAMPLES = {
+    "NEURO_EXAM": ["GCS 15", " pupils equal ", "no focal deficit"],
+    "IMAGING": ["CT head negative", "MRI brain pending"],
+    "VENT": ["AC 450/16 PEEP 8", "FiO2 40%"],
+    "HEMODYNAMICS": ["MAP 72 on norepi", "MAP: 65", "vasopressin 0.04", "HR 88"],
+    "LAB": ["Na: 138 K: 4.1", "Cr=0.9", "lactate 1.8"],
+    "MEDICATION": ["propofol", "keppra 500 bid"],
+    "PROCEDURE": ["EVD placement", "art line"],
+    "ASSESSMENT": ["SAH day 4", " vasospasm watch "],
+    "OTHER": ["misc"],
+}
+
+
+def legacy_assemble_structured(entities):
+    out = {
+        "neuro_exam": "", "imaging": [], "vent": {"raw": []},
+        "hemodynamics": {"pressors": [], "map": None, "raw": []},
+        "labs": {"values": {}, "raw": []}, "medications": [], "procedures": [], "assessment": "",
+    }
+    lab_re = re.compile(r"([A-Za-z]+)\s*[:=]\s*([0-9.]+)")
+    map_re = re.compile(r"MAP\s*[:=]?\s*(\d+)", re.I)
+    for e in entities:
+        txt = e["text"]
+        label = e["label"]
+        if label == "NEURO_EXAM":
+            out["neuro_exam"] += (" " + txt).strip()
+        elif label == "IMAGING":
+            out["imaging"].append(txt)
+        elif label == "VENT":
+            out["vent"]["raw"].append(txt)
+        elif label == "HEMODYNAMICS":
+            out["hemodynamics"]["raw"].append(txt)
+            mm = map_re.search(txt)
+            if mm:
+                out["hemodynamics"]["map"] = int(mm.group(1))
+            if "norepi" in txt.lower() or "vaso" in txt.lower():
+                out["hemodynamics"]["pressors"].append(txt)
+        elif label == "LAB":
+            out["labs"]["raw"].append(txt)
+            for m in lab_re.finditer(txt):
+                out["labs"]["values"][m.group(1)] = m.group(2)
+        elif label == "MEDICATION":
+            out["medications"].append(txt)
+        elif label == "PROCEDURE":
+            out["procedures"].append(txt)
+        elif label == "ASSESSMENT":
+            out["assessment"] += (" " + txt).strip()
+    return out
+
+
+def per_doc_dispatch_assemble_structured(entities):
+    # The previous implementation: eight bound append methods and two regex lookups per document.
+    out = {
+        "neuro_exam": [], "imaging": [], "vent": {"raw": []},
+        "hemodynamics": {"pressors": [], "map": None, "raw": []},
+        "labs": {"values": {}, "raw": []}, "medications": [], "procedures": [], "assessment": [],
+    }
+    sinks = {
+        "NEURO_EXAM": out["neuro_exam"].append, "IMAGING": out["imaging"].append,
+        "VENT": out["vent"]["raw"].append, "HEMODYNAMICS": out["hemodynamics"]["raw"].append,
+        "LAB": out["labs"]["raw"].append, "MEDICATION": out["medications"].append,
+        "PROCEDURE": out["procedures"].append, "ASSESSMENT": out["assessment"].append,
+    }
+    for e in entities:
+        add = sinks.get(e["label"])
+        if add is not None:
+            add(e["text"])
+    out["neuro_exam"] = "".join([t.strip() for t in out["neuro_exam"]])
+    out["assessment"] = "".join([t.strip() for t in out["assessment"]])
+    hemo = out["hemodynamics"]
+    for txt in hemo["raw"]:
+        mm = MAP_RE.search(txt)
+        if mm:
+            hemo["map"] = int(mm.group(1))
+        lowered = txt.lower()
+        if "norepi" in lowered or "vaso" in lowered:
+            hemo["pressors"].append(txt)
+    if out["labs"]["raw"]:
+        out["labs"]["values"] = dict(LAB_RE.findall("\0".join(out["labs"]["raw"])))
+    return out
+
+
+def timed(fn, repeat):
+    # Collector pauses depend on what earlier runs left alive; keep them out of the comparison.
+    # The best of `repeat` runs is reported, which filters out scheduler noise.
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            out = fn()
+            elapsed = time.perf_counter() - started
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return out, best
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--docs', type=int, default=2000)
+    p.add_argument('--entities', type=int, default=60)
+    p.add_argument('--repeat', type=int, default=7)
+    a = p.parse_args()
+    rng = random.Random(7)
+    labels = list(SAMPLES)
+    docs = [[{"label": (l := rng.choice(labels)), "text": rng.choice(SAMPLES[l])} for _ in range(a.entities)] for _ in range(a.docs)]
+
+    legacy, t_legacy = timed(lambda: [legacy_assemble_structured(d) for d in docs], a.repeat)
+    per_doc, t_per_doc = timed(lambda: [per_doc_dispatch_assemble_structured(d) for d in docs], a.repeat)
+    single, t_single = timed(lambda: [assemble_structured(d) for d in docs], a.repeat)
+    many, t_many = timed(lambda: assemble_structured_many(docs), a.repeat)
+
+    assert legacy == per_doc == single == many, "outputs differ"
+    n = a.docs * a.entities
+    print(f"{a.docs} docs x {a.entities} entities, best of {a.repeat}; outputs identical")
+    for label, t in [
+        ("legacy if/elif + +=", t_legacy),
+        ("per-doc dispatch table", t_per_doc),
+        ("assemble_structured", t_single),
+        ("assemble_structured_many", t_many),
+    ]:
+        print(f"{label:<26} {t * 1000:8.1f} ms  {t * 1e9 / n:7.0f} ns/entity  x{t_legacy / t:4.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Batch inference throughput: per-note loop vs vectorized batch vs process pool."""
+import argparse
+import time
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'backend'))
+from app.batch import run_batch, shutdown_pool
+from app.inference import infer_batch
+
+NOTE = (
+    "Note {i}. MAP {map} on norepi.\n- Na: {na} K: 4.1\n"
+    "No focal deficit. CT head today without hemorrhage. Plan to wean sedation."
+)
+
+
+def timed(label, fn, n):
+    started = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<24} {elapsed:7.3f} s  {n / elapsed:8.1f} notes/s")
+    return out
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--notes', type=int, default=100)
+    p.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    a = p.parse_args()
+    texts = [NOTE.format(i=i, map=60 + i % 30, na=130 + i % 10) for i in range(a.notes)]
+    infer_batch(texts[:2], persist=False)  # load models outside the timed region
+    serial = timed('per-note loop', lambda: [infer_batch([t], persist=False)[0] for t in texts], len(texts))
+    timed('vectorized batch', lambda: infer_batch(texts, persist=False), len(texts))
+    for w in a.workers:
+        if w < 2:
+            continue
+        run_batch(texts, workers=w)  # start workers and load models in them
+        out = timed(f'process pool x{w}', lambda: run_batch(texts, workers=w), len(texts))
+        assert [r['cleaned_text'] for r in out] == [r['cleaned_text'] for r in serial]
+    shutdown_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Negation/temporal tagging: per-entity pattern loop vs one trigger scan per sentence."""
+import argparse
+import re
+import time
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'backend'))
+from app.nlp import NEGATION_PATTERNS, TEMPORAL_PATTERNS, assign_entity_context, segment_text
+
+SENTENCES = [
+    "Denies chest pain, dyspnea or fever but reports headache.",
+    "History of stroke and prior craniotomy.",
+    "MAP 72 on norepi, lactate 1.8, Na 138.",
+    "No acute hemorrhage, edema or midline shift on CT head.",
+    "Plan to wean propofol and consider extubation today.",
+]
+ENTITY_WORDS = ["chest pain", "dyspnea", "fever", "headache", "stroke", "craniotomy", "MAP 72", "norepi",
+                "lactate 1.8", "Na 138", "acute hemorrhage", "edema", "midline shift", "CT head", "propofol", "extubation"]
+
+
+def legacy(entities):
+    for e in entities:
+        lowered = e["text"].lower()
+        e["negated"] = any(re.search(p, lowered) for p in NEGATION_PATTERNS)
+        e["temporal"] = None
+        for k, patterns in TEMPORAL_PATTERNS.items():
+            if any(re.search(p, lowered) for p in patterns):
+                e["temporal"] = k
+                break
+
+
+def build_note(repeats):
+    text = " ".join(SENTENCES * repeats)
+    entities, cursor = [], 0
+    for s in SENTENCES * repeats:
+        base = text.index(s, cursor)
+        for w in ENTITY_WORDS:
+            i = s.find(w)
+            if i >= 0:
+                entities.append({"text": w, "start_char": base + i, "end_char": base + i + len(w)})
+        cursor = base + len(s)
+    return text, entities
+
+
+def timed(label, fn, iterations, n_entities):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    per_note = (time.perf_counter() - started) / iterations
+    print(f"{label:<34} {per_note * 1e6:9.1f} us/note  {per_note * 1e6 / n_entities:6.2f} us/entity")
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--repeats', type=int, default=4)
+    p.add_argument('--iterations', type=int, default=500)
+    a = p.parse_args()
+    text, entities = build_note(a.repeats)
+    sents = segment_text(text)
+    print(f"{len(entities)} entities, {len(sents)} sentences")
+    timed('per-entity re.search (entity text)', lambda: legacy(entities), a.iterations, len(entities))
+    timed('compiled scan per sentence (NegEx)', lambda: assign_entity_context(text, sents, entities), a.iterations, len(entities))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Sentence model cold load: pickle vs compact mmap artifact (load time, RSS, per-process memory)."""
+import argparse
+import json
+import pickle
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'backend'))
+
+CHILD = """
+import json, sys, time
+sys.path.append({backend!r})
+
+def mem():
+    out = {{}}
+    for line in open('/proc/self/smaps_rollup'):
+        key, _, rest = line.partition(':')
+        if key in ('Rss', 'Anonymous'):
+            out[key] = int(rest.split()[0])
+    # File-backed pages (the mmap'd arrays) are shared by every worker; anonymous ones are per process.
+    return out['Rss'], out['Anonymous']
+
+import numpy, scipy.sparse, sklearn.feature_extraction.text, sklearn.linear_model
+from app.inference import load_sentence_model
+rss0, anon0 = mem()
+started = time.perf_counter()
+model = load_sentence_model({path!r})
+loaded = time.perf_counter() - started
+model.keep_probs({texts!r})
+first = time.perf_counter() - started - loaded
+rss1, anon1 = mem()
+print(json.dumps({{'load_ms': loaded * 1000, 'first_call_ms': first * 1000, 'rss_mb': (rss1 - rss0) / 1024, 'anon_mb': (anon1 - anon0) / 1024}}))
+"""
+
+WORDS = [f"w{i}" for i in range(6000)] + ["na", "k", "ct", "mri", "head", "map", "norepi", "wean", "sedation"]
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--sentences', type=int, default=50000)
+    p.add_argument('--runs', type=int, default=3)
+    a = p.parse_args()
+
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from app.sentence_artifact import save_sentence_artifact
+
+    rng = random.Random(0)
+    texts = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 14))) for _ in range(a.sentences)]
+    labels = [i % 2 for i in range(a.sentences)]
+    vec = TfidfVectorizer(ngram_range=(1, 2))
+    clf = LogisticRegression(max_iter=50).fit(vec.fit_transform(texts), labels)
+    model = {"vectorizer": vec, "classifier": clf}
+    print(f"vocabulary: {len(vec.vocabulary_)} terms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pkl, compact = Path(tmp) / "sentence.pkl", Path(tmp) / "sentence"
+        with open(pkl, "wb") as f:
+            pickle.dump(model, f)
+        save_sentence_artifact(model, compact)
+        size = sum(f.stat().st_size for f in compact.iterdir())
+        print(f"on disk: pickle {pkl.stat().st_size / 2**20:.1f} MB, compact {size / 2**20:.1f} MB")
+        backend = str(Path(__file__).resolve().parents[1] / 'backend')
+        for label, path in (("pickle", pkl), ("compact", compact)):
+            runs = [
+                json.loads(subprocess.run([sys.executable, "-c", CHILD.format(backend=backend, path=str(path), texts=texts[:32])], check=True, capture_output=True, text=True).stdout)
+                for _ in range(a.runs)
+            ]
+            best = min(runs, key=lambda r: r["load_ms"])
+            print(
+                f"{label:<8} load {best['load_ms']:8.1f} ms  first batch {best['first_call_ms']:6.1f} ms  "
+                f"RSS +{best['rss_mb']:6.1f} MB  anonymous +{best['anon_mb']:6.1f} MB"
+            )
+
+
+if __name__ == '__main__':
+    main()
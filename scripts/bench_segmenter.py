@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Per-note segmentation latency: fresh pipeline per call vs cached segmenter vs segment_many."""
+import argparse
+import time
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'backend'))
+import spacy
+from app.nlp import _normalize_for_segmentation, _sentences_from_doc, segment_many, segment_text
+
+NOTE = (
+    "Neuro: GCS 15, no focal deficit. Pupils equal and reactive.\n"
+    "- MAP 72 on norepi 0.05\n- Na: 138 K: 4.1 Cr: 0.9\n"
+    "CT head today without acute hemorrhage. Plan to wean sedation and consider extubation tomorrow."
+)
+
+
+def legacy_segment_text(text):
+    nlp = spacy.blank('en')
+    nlp.add_pipe('sentencizer')
+    normalized, offset_map = _normalize_for_segmentation(text)
+    return _sentences_from_doc(text, nlp(normalized), offset_map)
+
+
+def bench(label, fn, notes):
+    started = time.perf_counter()
+    fn(notes)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed * 1000 / len(notes):8.3f} ms/note")
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--notes', type=int, default=100)
+    a = p.parse_args()
+    notes = [NOTE] * a.notes
+    segment_text(NOTE)  # build the shared segmenter outside the timed region
+    bench('fresh pipeline per call', lambda ns: [legacy_segment_text(n) for n in ns], notes)
+    bench('cached segmenter', lambda ns: [segment_text(n) for n in ns], notes)
+    bench('segment_many (nlp.pipe)', segment_many, notes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Sentence keep scoring: sklearn transform/predict_proba vs the exported SentenceScorer."""
+import argparse
+import random
+import time
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'backend'))
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from app.sentence_scorer import SentenceScorer
+
+WORDS = [f"w{i}" for i in range(3000)] + ["na", "k", "ct", "mri", "head", "map", "norepi", "wean", "sedation"]
+
+
+def per_sentence_us(fn, texts, repeats):
+    fn(texts)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn(texts)
+    return (time.perf_counter() - started) / (repeats * len(texts)) * 1e6
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--train', type=int, default=20000)
+    p.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 64, 512])
+    p.add_argument('--sentences', type=int, default=2048, help='sentences scored per batch size')
+    a = p.parse_args()
+
+    rng = random.Random(0)
+    make = lambda: " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 15)))
+    train = [make() for _ in range(a.train)]
+    vec = TfidfVectorizer(ngram_range=(1, 2))
+    clf = LogisticRegression(max_iter=100).fit(vec.fit_transform(train), [i % 2 for i in range(a.train)])
+    scorer = SentenceScorer.from_sklearn({"vectorizer": vec, "classifier": clf})
+    sklearn_probs = lambda texts: clf.predict_proba(vec.transform(texts))[:, 1]
+
+    print(f"{'batch':>6} {'sklearn us/sent':>16} {'scorer us/sent':>15} {'speedup':>8}")
+    for bs in a.batch_sizes:
+        texts = [make() for _ in range(bs)]
+        assert np.abs(scorer.keep_probs(texts) - sklearn_probs(texts)).max() < 1e-9
+        repeats = max(1, a.sentences // bs)
+        base = per_sentence_us(sklearn_probs, texts, repeats)
+        lean = per_sentence_us(scorer.keep_probs, texts, repeats)
+        print(f"{bs:>6} {base:>16.1f} {lean:>15.1f} {base / lean:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
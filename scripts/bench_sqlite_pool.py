@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Concurrent dashboard reads during a labeling write storm: per-op connections (rollback journal) vs pooled WAL."""
+import argparse
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / 'backend'))
+from app import database
+from app.db.repository import Repository
+from app.migrations import migrate
+
+
+def legacy_conn(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def prepare(path, sentences):
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    conn.execute("INSERT INTO notes (id, created_at, source, raw_text) VALUES ('n', 'now', 'bench', 'x')")
+    conn.executemany(
+        "INSERT INTO sentences (id, note_id, idx, text, start_char, end_char) VALUES (?, 'n', ?, 'x', 0, 1)",
+        [(f"s{i}", i) for i in range(sentences)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def run(label, get_conn, release, seconds, readers, writers):
+    stop = threading.Event()
+    read_lat, writes = [], [0]
+
+    def reader():
+        while not stop.is_set():
+            conn = get_conn()
+            started = time.perf_counter()
+            Repository(conn).get_stats()
+            read_lat.append(time.perf_counter() - started)
+            release(conn)
+
+    def writer(wid):
+        i = 0
+        while not stop.is_set():
+            conn = get_conn()
+            conn.execute(
+                "INSERT INTO sentence_labels (id, sentence_id, label, created_at) VALUES (?, ?, 'KEEP', datetime('now'))",
+                (f"w{wid}-{i}", f"s{i % 1000}"),
+            )
+            conn.commit()
+            release(conn)
+            writes[0] += 1
+            i += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    read_lat.sort()
+    print(f"{label:<30} reads={len(read_lat):6d}  p50={read_lat[len(read_lat) // 2] * 1000:7.2f} ms  "
+          f"p99={read_lat[int(len(read_lat) * 0.99)] * 1000:7.2f} ms  mean={statistics.mean(read_lat) * 1000:7.2f} ms  writes={writes[0]}")
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--seconds', type=float, default=5)
+    p.add_argument('--readers', type=int, default=4)
+    p.add_argument('--writers', type=int, default=2)
+    a = p.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = str(Path(tmp) / 'legacy.db')
+        pooled_path = Path(tmp) / 'pooled.db'
+        prepare(legacy_path, 1000)
+        prepare(str(pooled_path), 1000)
+        run('connect per op (DELETE journal)', lambda: legacy_conn(legacy_path), lambda c: c.close(), a.seconds, a.readers, a.writers)
+        database.DB_PATH = pooled_path
+        run('pooled per-thread (WAL)', database.get_conn, lambda c: None, a.seconds, a.readers, a.writers)
+        database.close_all_conns()
+
+
+if __name__ == '__main__':
+    main()
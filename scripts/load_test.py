@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Probe /api/dashboard/stats latency while /api/infer is saturated.
+
+Run against a live server, e.g. `uvicorn app.main:app --app-dir backend --port 8000`.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+NOTE = (
+    "Neuro: GCS 15, no focal deficit.\n- MAP 72 on norepi 0.05\n- Na: 138 K: 4.1\n"
+    "CT head today without acute hemorrhage. Plan to wean sedation."
+) * 20
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+
+async def probe_stats(client, seconds):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        r = await client.get('/api/dashboard/stats')
+        r.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.05)
+    return latencies
+
+
+async def hammer_infer(client, stop, counts):
+    while not stop.is_set():
+        r = await client.post('/api/infer', json={'text': NOTE})
+        counts[r.status_code] = counts.get(r.status_code, 0) + 1
+        if r.status_code == 503:
+            await asyncio.sleep(0.05)
+
+
+def report(label, latencies):
+    print(f"{label:<22} n={len(latencies):4d}  p50={pct(latencies, 0.5):7.1f} ms  "
+          f"p99={pct(latencies, 0.99):7.1f} ms  mean={statistics.mean(latencies) * 1000:7.1f} ms")
+
+
+async def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--url', default='http://localhost:8000')
+    p.add_argument('--seconds', type=float, default=10)
+    p.add_argument('--concurrency', type=int, default=32)
+    a = p.parse_args()
+    async with httpx.AsyncClient(base_url=a.url, timeout=120) as client:
+        report('stats (idle)', await probe_stats(client, a.seconds))
+        stop, counts = asyncio.Event(), {}
+        workers = [asyncio.create_task(hammer_infer(client, stop, counts)) for _ in range(a.concurrency)]
+        report('stats (infer load)', await probe_stats(client, a.seconds))
+        stop.set()
+        await asyncio.gather(*workers)
+        print('infer responses by status:', dict(sorted(counts.items())))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,16 +1,19 @@
 #!/usr/bin/env python3
 import argparse
 import json
+import os
+from collections import deque
 from pathlib import Path
 import sys
 
 sys.path.append(str(Path(__file__).resolve().parents[1] / 'backend'))
-from app.inference import infer_text
-from app.training import train_all
+# spaCy/sklearn are imported inside the commands that need them, so export and --help start in milliseconds.
 from app.database import db, row_to_dict, init_db, seed_data_if_empty
 
 
 def cmd_infer(args):
+    from app.inference import infer_text
+
     text = Path(args.input).read_text()
     out = infer_text(text, None if args.model == 'latest' else args.model, args.keep_threshold)
     Path(args.out).write_text(json.dumps(out, indent=2))
@@ -19,16 +22,111 @@ def cmd_infer(args):
 
 
 
+def _parse_line(raw, fmt, text_field, id_field):
+    line = raw.decode('utf-8').strip()
+    if fmt != 'jsonl':
+        return None, line
+    rec = json.loads(line)
+    if isinstance(rec, str):
+        return None, rec
+    if not isinstance(rec, dict):
+        raise ValueError(f"expected an object or a string, got {type(rec).__name__}")
+    if not isinstance(rec.get(text_field), str):
+        raise ValueError(f"missing or non-string {text_field!r} field")
+    return rec.get(id_field), rec[text_field]
+
+
+def read_notes(path, fmt, text_field, id_field, start_offset=0):
+    # Yields (line start offset, offset just past the line, id, text, error); blank lines are
+    # skipped but counted in offsets. A line that can't be parsed comes back with an error
+    # instead of a text, so one bad record doesn't end the run.
+    with open(path, 'rb') as f:
+        f.seek(start_offset)
+        offset = start_offset
+        for raw in f:
+            start, offset = offset, offset + len(raw)
+            if not raw.strip():
+                continue
+            try:
+                note_id, text = _parse_line(raw, fmt, text_field, id_field)
+            except (ValueError, UnicodeDecodeError) as exc:
+                yield start, offset, None, None, f"{type(exc).__name__}: {exc}"
+                continue
+            yield start, offset, note_id, text, None
+
+
+def _write_checkpoint(path, state):
+    tmp = Path(f"{path}.tmp")
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, path)
+
+
 def cmd_infer_batch(args):
-    texts = [line.strip() for line in Path(args.input).read_text().splitlines() if line.strip()]
-    out = [
-        infer_text(text, None if args.model == 'latest' else args.model, args.keep_threshold)
-        for text in texts
-    ]
-    Path(args.out).write_text(json.dumps({"count": len(out), "results": out}, indent=2))
+    from app.batch import BATCH_WORKERS, iter_batch
+
+    fmt = args.format or ('jsonl' if Path(args.input).suffix in ('.jsonl', '.ndjson') else 'text')
+    ckpt_path = Path(args.checkpoint or f"{args.out}.checkpoint")
+    state = {'input': str(Path(args.input).resolve()), 'input_offset': 0, 'output_offset': 0, 'notes': 0}
+    if args.resume and ckpt_path.exists():
+        saved = json.loads(ckpt_path.read_text())
+        if saved['input'] != state['input']:
+            sys.exit(f"Checkpoint {ckpt_path} belongs to {saved['input']}")
+        state = saved
+    out = open(args.out, 'r+b' if state['output_offset'] else 'wb')
+    out.truncate(state['output_offset'])
+    out.seek(state['output_offset'])
+
+    # Results come back in input order, so after each chunk everything up to the newest
+    # finished note is on disk and the checkpoint can advance to that note's line.
+    # Unparseable lines wait in the same queue and are written as errors in their place.
+    pending = deque()
+    bad_lines = 0
+
+    def texts():
+        for start, end, note_id, text, error in read_notes(args.input, fmt, args.text_field, args.id_field, state['input_offset']):
+            pending.append((start, end, note_id, error))
+            if error is None:
+                yield text
+
+    def write(event, end, note_id):
+        event['index'] = state['notes']
+        if note_id is not None:
+            event['id'] = note_id
+        out.write((json.dumps(event) + '\n').encode('utf-8'))
+        state['notes'] += 1
+        state['input_offset'] = end
+
+    def write_bad_lines():
+        nonlocal bad_lines
+        while pending and pending[0][3] is not None:
+            start, end, _, error = pending.popleft()
+            write({'event': 'error', 'offset': start, 'detail': f"Unreadable input line: {error}"}, end, None)
+            bad_lines += 1
+
+    def checkpoint(errors):
+        out.flush()
+        state['output_offset'] = out.tell()
+        _write_checkpoint(ckpt_path, state)
+        print(f"{state['notes']} notes ({errors + bad_lines} failed in this run)", file=sys.stderr)
+
+    model = None if args.model == 'latest' else args.model
+    with out:
+        for event in iter_batch(texts(), model, args.keep_threshold, workers=args.workers or BATCH_WORKERS, chunk_size=args.chunk_size, persist=not args.no_persist, ordered=True):
+            if event['event'] in ('result', 'error'):
+                write_bad_lines()
+                _, end, note_id, _ = pending.popleft()
+                write(event, end, note_id)
+            elif event['event'] == 'progress':
+                checkpoint(event['errors'])
+            elif event['event'] == 'done':
+                write_bad_lines()
+                checkpoint(event['errors'])
+
 
 def cmd_train(args):
-    out = train_all(max_steps=args.max_steps, lr=0.001, base_model='en')
+    from app.training import train_all
+
+    out = train_all(max_steps=args.max_steps, lr=args.lr, base_model='en', dropout=args.dropout, batch_size=args.batch_size, sentence_model=args.sentence_model)
     print(json.dumps(out, indent=2))
 
 
@@ -40,14 +138,17 @@ def cmd_export(args):
 
 
 def main():
-    init_db(); seed_data_if_empty()
     p = argparse.ArgumentParser()
     sub = p.add_subparsers(dest='cmd', required=True)
     i = sub.add_parser('infer'); i.add_argument('--model', default='latest'); i.add_argument('--in', dest='input', required=True); i.add_argument('--out', required=True); i.add_argument('--cleaned', required=True); i.add_argument('--keep-threshold', type=float, default=0.5); i.set_defaults(func=cmd_infer)
-    b = sub.add_parser('infer-batch'); b.add_argument('--model', default='latest'); b.add_argument('--in', dest='input', required=True); b.add_argument('--out', required=True); b.add_argument('--keep-threshold', type=float, default=0.5); b.set_defaults(func=cmd_infer_batch)
-    t = sub.add_parser('train'); t.add_argument('--max-steps', type=int, default=2000); t.set_defaults(func=cmd_train)
+    b = sub.add_parser('infer-batch'); b.add_argument('--model', default='latest'); b.add_argument('--in', dest='input', required=True); b.add_argument('--out', required=True); b.add_argument('--keep-threshold', type=float, default=0.5); b.add_argument('--workers', type=int, help='default: MNC_BATCH_WORKERS')
+    b.add_argument('--format', choices=['text', 'jsonl']); b.add_argument('--text-field', default='text'); b.add_argument('--id-field', default='id'); b.add_argument('--chunk-size', type=int, default=64)
+    b.add_argument('--checkpoint'); b.add_argument('--resume', action='store_true'); b.add_argument('--no-persist', action='store_true'); b.set_defaults(func=cmd_infer_batch)
+    t = sub.add_parser('train'); t.add_argument('--max-steps', type=int, default=2000); t.add_argument('--lr', type=float, default=0.001); t.add_argument('--dropout', type=float, default=0.2); t.add_argument('--batch-size', type=int, default=32); t.add_argument('--sentence-model', choices=['tfidf', 'hashing']); t.set_defaults(func=cmd_train)
     e = sub.add_parser('export'); e.add_argument('--out', required=True); e.set_defaults(func=cmd_export)
-    a = p.parse_args(); a.func(a)
+    a = p.parse_args()
+    init_db(); seed_data_if_empty()
+    a.func(a)
 
 
 if __name__ == '__main__':